@@ -29,6 +29,13 @@ from services.reestructurador_excel import ReestructuradorExcel
 from services.comparador_avista import ComparadorAvista
 from services.normalizador_excel import NormalizadorExcel
 from services.consolidador_final import ConsolidadorFinal
+from services.revalidacion_dirigida import RevalidacionDirigida, leer_operaciones
+from utils.config_ejecucion import ConfigEjecucion
+from utils.checkpoint import corrida_a_reanudar
+from services.orquestador import (
+    Orquestador, Etapa, OK, ERROR, EJECUTANDO, OMITIDA, CANCELADA,
+    JSONS, CLON, REESTRUCTURADO, EVIDENCIA, NORMALIZADO, UNIFICADO,
+)
 
 
 # =========================
@@ -155,14 +162,14 @@ def _mover_no_json(carpeta_src: Path, carpeta_destino: Path, log_fn):
         log_fn(f"📦 Movidos {movidos} archivo(s) no-JSON a: {carpeta_destino}")
 
 
-def _depurar_wrapper(modo: int, log_fn) -> bool:
+def _depurar_wrapper(modo: int, log_fn, cfg: ConfigEjecucion) -> bool:
     """
     Depuración tolerante:
     - Si no hay no-JSON, no corta the pipeline.
     - Mueve no-JSON a 'archivos conflicto' según modo.
     - Soporta versión 'nueva' o 'vieja' de Depurador (constructor flexible).
     """
-    src = Path(str(config.RUTA_JSONS))
+    src = Path(cfg.ruta_jsons)
     if not src.exists():
         log_fn(f"⚠️ Carpeta de JSON no existe: {src}")
         return True  # no cortamos
@@ -171,14 +178,14 @@ def _depurar_wrapper(modo: int, log_fn) -> bool:
     if modo == 1:
         conflict = _desktop_conflict_folder()
     else:
-        conflict = Path(str(config.CARPETA_RESULTADOS_DAVINCI)) / "archivos conflicto"
+        conflict = cfg.carpeta_resultados / "archivos conflicto"
     _mover_no_json(src, conflict, log_fn)
 
     # Ejecutar Depurador "oficial" por compatibilidad (si falla no detenemos)
     try:
         # Nueva firma
         dep = Depurador(
-            carpeta_fuente=str(config.RUTA_JSONS),
+            carpeta_fuente=cfg.ruta_jsons,
             carpeta_conflicto_destino=str(conflict),
             modo_ingesta=modo,
             logger=get_logger()
@@ -193,7 +200,7 @@ def _depurar_wrapper(modo: int, log_fn) -> bool:
     except TypeError:
         # Firma antigua: Depurador(RUTA_JSONS, RUTA_NO_JSON)
         try:
-            dep = Depurador(str(config.RUTA_JSONS), str(config.RUTA_NO_JSON))
+            dep = Depurador(cfg.ruta_jsons, cfg.ruta_no_json)
             ok = dep.ejecutar()
             if ok:
                 log_fn("✅ Depuración completada (firma antigua).")
@@ -210,49 +217,53 @@ def _depurar_wrapper(modo: int, log_fn) -> bool:
 # =========================
 # Wrappers de etapas
 # =========================
-def etapa_depurar(modo, log):     return _depurar_wrapper(modo, log)
-def etapa_clonar(modo, log):
+# Cada etapa recibe la configuración de su corrida (ConfigEjecucion): rutas y carpeta de salida
+def etapa_depurar(modo, log, cfg):     return _depurar_wrapper(modo, log, cfg)
+def etapa_clonar(modo, log, cfg):
     c = ClonadorExcel(
-        carpeta_json_local=config.RUTA_JSONS,
-        carpeta_salida=str(config.CARPETA_EXCEL_CLON),
-        modo_ingesta=modo
+        carpeta_json_local=cfg.ruta_jsons,
+        carpeta_salida=str(cfg.preparar()),
+        modo_ingesta=modo,
+        cfg=cfg,
     )
     ok = c.generar_excel()
     if not ok: log("❌ Error en Clonación")
     return ok
 
-def etapa_reestructurar(log):
+def etapa_reestructurar(log, cfg):
     r = ReestructuradorExcel(
-        carpeta_excel_origen=str(config.CARPETA_EXCEL_CLON),
-        carpeta_excel_destino=str(config.CARPETA_EXCEL_REESTRUCTURADO),
+        carpeta_excel_origen=str(cfg.carpeta_salida),
+        carpeta_excel_destino=str(cfg.carpeta_salida),
+        cfg=cfg,
     )
     ok = r.reestructurar()
     if not ok: log("❌ Error en Reestructurado")
     return ok
 
-def etapa_comparar(log):
+def etapa_comparar(log, cfg):
     c = ComparadorAvista(
-        carpeta_excel_reestructurado=str(config.CARPETA_EXCEL_REESTRUCTURADO),
-        carpeta_bases_avista=str(config.CARPETA_BASES_AVISTA),
-        carpeta_salida=str(config.CARPETA_SALIDA_COMPARACION),
+        carpeta_excel_reestructurado=str(cfg.carpeta_salida),
+        carpeta_bases_avista=str(cfg.carpeta_bases_avista),
+        carpeta_salida=str(cfg.carpeta_salida),
+        cfg=cfg,
     )
     return c.comparar()
 
-def etapa_normalizar(log):
+def etapa_normalizar(log, cfg):
     n = NormalizadorExcel(
-        carpeta_excel_reestructurado=str(config.CARPETA_EXCEL_REESTRUCTURADO),
-        carpeta_salida=str(config.CARPETA_EXCEL_NORMALIZADO),
-        umbral_similitud=float(config.TOLERANCIA_TEXTO),
+        carpeta_excel_reestructurado=str(cfg.carpeta_salida),
+        carpeta_salida=str(cfg.carpeta_salida),
+        umbral_similitud=float(cfg.tolerancia_texto),
     )
     return n.normalizar()
 
-def etapa_consolidar(log):
+def etapa_consolidar(log, cfg):
     z = ConsolidadorFinal(
-        carpeta_clon=str(config.CARPETA_EXCEL_CLON),
-        carpeta_reestructurado=str(config.CARPETA_EXCEL_REESTRUCTURADO),
-        carpeta_normalizado=str(config.CARPETA_EXCEL_NORMALIZADO),
-        carpeta_comparacion=str(config.CARPETA_SALIDA_COMPARACION),
-        carpeta_salida_unificado=str(config.CARPETA_EXCEL_UNIFICADO),
+        carpeta_clon=str(cfg.carpeta_salida),
+        carpeta_reestructurado=str(cfg.carpeta_salida),
+        carpeta_normalizado=str(cfg.carpeta_salida),
+        carpeta_comparacion=str(cfg.carpeta_salida),
+        carpeta_salida_unificado=str(cfg.carpeta_salida),
     )
     salida = z.consolidar()
     if salida:
@@ -262,6 +273,19 @@ def etapa_consolidar(log):
     return False
 
 
+def etapas_pipeline(modo, log, cfg):
+    """DAG del pipeline: Comparar y Normalizar sólo dependen del reestructurado y corren en paralelo."""
+    return [
+        Etapa("Depurar", lambda: etapa_depurar(modo, log, cfg), salidas=["depurado"]),
+        Etapa("Clonar", lambda: etapa_clonar(modo, log, cfg), entradas=["depurado", JSONS], salidas=[CLON]),
+        Etapa("Reestructurar", lambda: etapa_reestructurar(log, cfg), entradas=[CLON], salidas=[REESTRUCTURADO]),
+        Etapa("Comparar", lambda: etapa_comparar(log, cfg), entradas=[REESTRUCTURADO], salidas=[EVIDENCIA]),
+        Etapa("Normalizar", lambda: etapa_normalizar(log, cfg), entradas=[REESTRUCTURADO], salidas=[NORMALIZADO]),
+        Etapa("Consolidar", lambda: etapa_consolidar(log, cfg),
+              entradas=[CLON, REESTRUCTURADO, EVIDENCIA, NORMALIZADO], salidas=[UNIFICADO]),
+    ]
+
+
 # =========================
 # App GUI
 # =========================
@@ -343,6 +367,11 @@ class App(tb.Window):
         tb.Radiobutton(top, text="1 - Local", variable=self.modo_full, value=1, bootstyle="info-toolbutton").pack(side=LEFT)
         tb.Radiobutton(top, text="2 - SFTP",  variable=self.modo_full, value=2, bootstyle="secondary-toolbutton").pack(side=LEFT)
 
+        # Reanudar la última corrida interrumpida (desde sus checkpoints)
+        self.var_reanudar = tk.BooleanVar(value=False)
+        tb.Checkbutton(top, text="Reanudar interrumpida", variable=self.var_reanudar,
+                       bootstyle="round-toggle").pack(side=LEFT, padx=(16, 0))
+
         # Botones
         self.btn_parar_full = tb.Button(top, text="Detener", bootstyle="danger-outline", command=self.cancel_run, state="disabled")
         self.btn_parar_full.pack(side=RIGHT, padx=(6,0))
@@ -463,6 +492,14 @@ class App(tb.Window):
             tb.Separator(card).pack(fill=X, padx=8, pady=8)
             tb.Label(card, text=f"Estado de {name}").pack(pady=(0,6))
 
+        # Re-validación dirigida: sólo estas operaciones, parchando la última corrida
+        reval = tb.Labelframe(self.page_steps, text="Re-validación dirigida", padding=10)
+        reval.pack(fill=X, padx=14, pady=(4, 10))
+        tb.Label(reval, text="Operaciones (separadas por comas o espacios):").pack(side=LEFT)
+        self.ent_operaciones = tb.Entry(reval)
+        self.ent_operaciones.pack(side=LEFT, fill=X, expand=YES, padx=8)
+        tb.Button(reval, text="Re-validar operaciones", bootstyle=WARNING, command=self.run_revalidar).pack(side=RIGHT)
+
     # ======= pestaña "Configuración" =======
     def _build_config(self):
         left = tb.Frame(self.page_config)
@@ -586,23 +623,24 @@ class App(tb.Window):
     def _modo_config(self) -> int:
         return 1 if self.cmb_modo.get().startswith("Carpeta") else 2
 
-    def _apply_runtime_config(self, jsons, nojson, resultados, avista):
-        # toggles de tasa
-        config.MOSTRAR_DETALLE_TASA = bool(self.chk_detalle.instate(["selected"]))
+    def _config_ejecucion(self, jsons, nojson, resultados, avista, modo, corrida=None) -> ConfigEjecucion:
+        """Configuración de una corrida con lo que hay en pantalla (no modifica `config`)."""
+        valores = {"mostrar_detalle_tasa": bool(self.chk_detalle.instate(["selected"]))}
         try:
-            config.TASA_TOLERANCIA = float(self.ent_tol.get())
+            valores["tasa_tolerancia"] = float(self.ent_tol.get())
         except Exception:
             pass
-        # rutas
-        config.RUTA_JSONS = jsons
-        config.RUTA_NO_JSON = nojson
         base = Path(resultados)
         base.mkdir(parents=True, exist_ok=True)
-        for attr in ("CARPETA_RESULTADOS_DAVINCI","CARPETA_EXCEL_CLON","CARPETA_EXCEL_REESTRUCTURADO",
-                     "CARPETA_EXCEL_NORMALIZADO","CARPETA_EXCEL_FALLOS","CARPETA_SALIDA_COMPARACION",
-                     "CARPETA_EXCEL_UNIFICADO"):
-            setattr(config, attr, base)
-        config.CARPETA_BASES_AVISTA = Path(avista)
+        return ConfigEjecucion(
+            corrida=corrida,
+            ruta_jsons=jsons,
+            ruta_no_json=nojson,
+            carpeta_resultados=base,
+            carpeta_bases_avista=Path(avista),
+            modo_ingesta=modo,
+            **valores,
+        )
 
     def append_log(self, s):
         ts = datetime.now().strftime("%H:%M:%S")
@@ -658,56 +696,61 @@ class App(tb.Window):
             self.lbl_status_full.configure(text="Listo.")
             self.running = False
 
-    def _apply_full_paths(self):
-        self._apply_runtime_config(
+    def _config_full(self, modo) -> ConfigEjecucion:
+        return self._config_ejecucion(
             self.var_jsons.get(),
             self.var_nojson.get(),
             self.var_result.get(),
-            self.var_avista.get()
+            self.var_avista.get(),
+            modo,
         )
 
     def run_all_full(self):
         if self.thread and self.thread.is_alive():
             Messagebox.show_warning("Ya hay una ejecución activa.", "Aviso")
             return
-        self._apply_full_paths()
         modo = int(self.modo_full.get())
+        cfg = self._config_full(modo)
+        if self.var_reanudar.get():
+            interrumpida = corrida_a_reanudar(cfg)
+            if interrumpida:
+                cfg = cfg.con(corrida=interrumpida, reanudar=True)
+            else:
+                self.append_log("ℹ️ No hay corrida interrumpida para reanudar: se inicia una nueva.")
+        self.append_log(f"Corrida {cfg.corrida}: resultados en {cfg.carpeta_salida}"
+                        + (" (reanudada)" if cfg.reanudar else ""))
         self.stop_event.clear()
         self._set_full_busy(True)
 
         def job():
-            try:
-                etapas = [
-                    ("Depurar", lambda: etapa_depurar(modo, self.append_log)),
-                    ("Clonar", lambda: etapa_clonar(modo, self.append_log)),
-                    ("Reestructurar", lambda: etapa_reestructurar(self.append_log)),
-                    ("Comparar", lambda: etapa_comparar(self.append_log)),
-                    ("Normalizar", lambda: etapa_normalizar(self.append_log)),
-                    ("Consolidar", lambda: etapa_consolidar(self.append_log)),
-                ]
-                
-                for nombre, funcion in etapas:
-                    if self.stop_event.is_set():
-                        self.append_log("⏹ Proceso cancelado por el usuario.")
-                        break
-                    
-                    # Actualizar la etapa actual en la GUI
-                    self.after(0, lambda n=nombre: self.update_etapa_status(n, "▶️ Ejecutando...", "blue"))
+            visuales = {
+                EJECUTANDO: ("▶️ Ejecutando...", "blue"),
+                OK: ("✅ Completado", "green"),
+                ERROR: ("❌ Error", "red"),
+                OMITIDA: ("⏭ Omitida", "gray"),
+                CANCELADA: ("⏹ Cancelada", "gray"),
+            }
+
+            def al_cambiar(nombre, estado):
+                if estado == EJECUTANDO:
                     self.append_log(f"▶ {nombre}…")
-                    ok = funcion()
-                    
-                    if not ok:
-                        self.append_log(f"❌ Pipeline detenido en: {nombre}")
-                        self.after(0, lambda n=nombre: self.update_etapa_status(n, "❌ Error", "red"))
-                        break
-                        
+                elif estado == OK:
                     self.append_log(f"✅ {nombre} completado.")
-                    self.after(0, lambda n=nombre: self.update_etapa_status(n, "✅ Completado", "green"))
-                    
-                else:
+                elif estado == ERROR:
+                    self.append_log(f"❌ Pipeline detenido en: {nombre}")
+                texto, color = visuales[estado]
+                self.after(0, lambda: self.update_etapa_status(nombre, texto, color))
+
+            try:
+                estados = Orquestador(etapas_pipeline(modo, self.append_log, cfg),
+                                      al_cambiar=al_cambiar, cancelar=self.stop_event, cfg=cfg,
+                                      reanudar_en=cfg.carpeta_salida if cfg.reanudar else None).ejecutar()
+                if all(e == OK for e in estados.values()):
                     self.append_log("🎉 Proceso COMPLETO.")
                     self.after(0, lambda: Messagebox.ok("Proceso completado con éxito.", "Listo"))
-                    
+                elif CANCELADA in estados.values():
+                    self.append_log("⏹ Proceso cancelado por el usuario.")
+
             except Exception as e:
                 self.append_log(f"❗ Error: {e}")
             finally:
@@ -717,13 +760,22 @@ class App(tb.Window):
         self.thread.start()
 
     # ---------- POR ETAPAS ----------
-    def _apply_paths_from_config_tab(self):
-        self._apply_runtime_config(
+    def _config_pasos(self, nueva: bool = False) -> ConfigEjecucion:
+        """
+        Corrida de la pestaña "Por Etapas": las etapas sueltas siguen usando la misma
+        carpeta de corrida (cada una toma lo que dejó la anterior) hasta que se
+        ejecuta todo de nuevo.
+        """
+        previa = getattr(self, "cfg_pasos", None)
+        self.cfg_pasos = self._config_ejecucion(
             self.ent_jsons.get(),
             self.ent_nojson.get(),
             self.ent_result.get(),
-            self.ent_avista.get()
+            self.ent_avista.get(),
+            self._modo_config(),
+            corrida=None if nueva or previa is None else previa.corrida,
         )
+        return self.cfg_pasos
 
     def _reset_steps_progress(self):
         self.steps_completed = 0
@@ -745,14 +797,14 @@ class App(tb.Window):
         if self.thread and self.thread.is_alive():
             Messagebox.show_warning("Ya hay una ejecución activa.", "Aviso")
             return
-        self._apply_paths_from_config_tab()
-        modo = 1 if self.cmb_modo.get().startswith("Carpeta") else 2
+        cfg = self._config_pasos()
+        modo = cfg.modo_ingesta
         self.stop_event.clear()
         self._set_step(name, running=True, status="RUNNING", style=INFO)
 
         def job():
             try:
-                ok = fn(modo) if name == "Depurar" else fn()
+                ok = fn(modo, cfg)
                 self._set_step(name, running=False, status=("OK" if ok else "ERROR"), style=(SUCCESS if ok else DANGER))
                 self.steps_completed += 1
                 self.pb_steps_total.configure(value=self.steps_completed)
@@ -767,31 +819,28 @@ class App(tb.Window):
         if self.thread and self.thread.is_alive():
             Messagebox.show_warning("Ya hay una ejecución activa.", "Aviso")
             return
-        self._apply_paths_from_config_tab()
-        modo = self._modo_config()
+        cfg = self._config_pasos(nueva=True)
+        modo = cfg.modo_ingesta
+        self.append_log(f"Corrida {cfg.corrida}: resultados en {cfg.carpeta_salida}")
         self.stop_event.clear()
         self._reset_steps_progress()
 
         def job():
-            try:
-                steps = [
-                    ("Depurar", lambda: etapa_depurar(modo, self.append_log)),
-                    ("Clonar", etapa_clonar, True),
-                    ("Reestructurar", etapa_reestructurar, False),
-                    ("Comparar", etapa_comparar, False),
-                    ("Normalizar", etapa_normalizar, False),
-                    ("Consolidar", etapa_consolidar, False),
-                ]
-                for name, fn, *rest in steps:
+            def al_cambiar(name, estado):
+                if estado == EJECUTANDO:
                     self._set_step(name, running=True, status="RUNNING", style=INFO)
-                    ok = fn(modo, self.append_log) if rest and rest[0] else fn(self.append_log)
-                    self._set_step(name, running=False, status=("OK" if ok else "ERROR"), style=(SUCCESS if ok else DANGER))
-                    self.steps_completed += 1
-                    self.pb_steps_total.configure(value=self.steps_completed)
-                    if not ok:
-                        self.append_log(f"❌ Pipeline detenido en: {name}")
-                        break
-                else:
+                    return
+                ok = estado == OK
+                self._set_step(name, running=False, status=("OK" if ok else estado), style=(SUCCESS if ok else DANGER))
+                self.steps_completed += 1
+                self.pb_steps_total.configure(value=self.steps_completed)
+                if estado == ERROR:
+                    self.append_log(f"❌ Pipeline detenido en: {name}")
+
+            try:
+                estados = Orquestador(etapas_pipeline(modo, self.append_log, cfg),
+                                      al_cambiar=al_cambiar, cancelar=self.stop_event, cfg=cfg).ejecutar()
+                if all(e == OK for e in estados.values()):
                     self.append_log("🎉 Proceso COMPLETO (por etapas).")
                     self.after(0, lambda: Messagebox.ok("Proceso por etapas completado.", "Listo"))
             except Exception as e:
@@ -800,12 +849,47 @@ class App(tb.Window):
         self.thread = threading.Thread(target=job, daemon=True)
         self.thread.start()
 
-    def run_depurar_single(self):      self._run_single("Depurar", lambda modo: etapa_depurar(modo, self.append_log))
-    def run_clonar_single(self):       self._run_single("Clonar",  lambda _=None: etapa_clonar(self._modo_config(), self.append_log))
-    def run_reestructurar_single(self):self._run_single("Reestructurar", lambda _=None: etapa_reestructurar(self.append_log))
-    def run_comparar_single(self):     self._run_single("Comparar", lambda _=None: etapa_comparar(self.append_log))
-    def run_normalizar_single(self):   self._run_single("Normalizar", lambda _=None: etapa_normalizar(self.append_log))
-    def run_consolidar_single(self):   self._run_single("Consolidar", lambda _=None: etapa_consolidar(self.append_log))
+    def run_depurar_single(self):      self._run_single("Depurar", lambda modo, cfg: etapa_depurar(modo, self.append_log, cfg))
+    def run_clonar_single(self):       self._run_single("Clonar",  lambda modo, cfg: etapa_clonar(modo, self.append_log, cfg))
+    def run_reestructurar_single(self):self._run_single("Reestructurar", lambda modo, cfg: etapa_reestructurar(self.append_log, cfg))
+    def run_comparar_single(self):     self._run_single("Comparar", lambda modo, cfg: etapa_comparar(self.append_log, cfg))
+    def run_normalizar_single(self):   self._run_single("Normalizar", lambda modo, cfg: etapa_normalizar(self.append_log, cfg))
+    def run_consolidar_single(self):   self._run_single("Consolidar", lambda modo, cfg: etapa_consolidar(self.append_log, cfg))
+
+    def run_revalidar(self):
+        if self.thread and self.thread.is_alive():
+            Messagebox.show_warning("Ya hay una ejecución activa.", "Aviso")
+            return
+        operaciones = leer_operaciones(self.ent_operaciones.get())
+        if not operaciones:
+            Messagebox.show_warning("Indica al menos una operación.", "Aviso")
+            return
+        cfg = self._config_ejecucion(
+            self.ent_jsons.get(),
+            self.ent_nojson.get(),
+            self.ent_result.get(),
+            self.ent_avista.get(),
+            self._modo_config(),
+        )
+        self.append_log(f"Re-validando {len(operaciones)} operación(es)…")
+
+        def job():
+            try:
+                resumen = RevalidacionDirigida(cfg, operaciones).ejecutar()
+                if resumen is None:
+                    self.append_log("❌ No se pudo re-validar (ver el log).")
+                    return
+                if resumen["sin_json"]:
+                    self.append_log(f"⚠️ Sin JSON (no se tocaron): {', '.join(resumen['sin_json'])}")
+                if resumen["sin_avista"]:
+                    self.append_log(f"⚠️ Sin fila en Avista: {', '.join(resumen['sin_avista'])}")
+                self.append_log(f"✅ {resumen['jsons']} JSON re-validado(s) en {resumen['corrida']}")
+                self.append_log(f"✅ Unificado final creado: {resumen['unificado']}")
+            except Exception as e:
+                self.append_log(f"❗ Error en la re-validación: {e}")
+
+        self.thread = threading.Thread(target=job, daemon=True)
+        self.thread.start()
 
     def cancel_run(self):
         self.stop_event.set()
@@ -20,6 +20,10 @@ SFTP_DIR_JSONS = "davinci/procesados-qa"   # carpeta remota donde están los .js
 CARPETA_RESULTADOS_DAVINCI = Path(r"C:\Users\jymv1575\Desktop\Resultados Davinci")
 CARPETA_RESULTADOS_DAVINCI.mkdir(parents=True, exist_ok=True)
 
+# True = cada corrida escribe en <CARPETA_RESULTADOS_DAVINCI>/corridas/<fecha>_<id>/
+# (varias corridas/lotes pueden ejecutarse a la vez sin pisarse los archivos)
+CORRIDAS_AISLADAS = True
+
 # Alias internos → todo apunta a la misma carpeta
 CARPETA_EXCEL_CLON = CARPETA_RESULTADOS_DAVINCI              # "Clonación Json"
 CARPETA_EXCEL_REESTRUCTURADO = CARPETA_RESULTADOS_DAVINCI    # "Reestructurado"
@@ -31,6 +35,59 @@ CARPETA_EXCEL_UNIFICADO = CARPETA_RESULTADOS_DAVINCI         # "Davinci_Resultad
 # --- Bases Avista (dinámico = toma el último .xlsx de la carpeta) ---
 CARPETA_BASES_AVISTA = Path(r"C:\Users\jymv1575\Desktop\Base de Datos Avista")
 
+# True  = la evidencia Avista conserva TODAS las columnas de la base (lectura completa)
+# False = sólo se leen/escriben las columnas que usan las reglas (más rápido y liviano)
+AVISTA_SALIDA_COMPLETA = True
+
+# False = se anota la base Avista completa ("NO ENCONTRADO EN REESTRUCTURADO" en el resto)
+# True  = la evidencia sólo trae las operaciones Avista que están en el lote procesado
+#         (opcional; el modo por bloques siempre la acota al lote)
+COMPARACION_SOLO_LOTE = False
+
+# Modo por bloques: clonación -> reestructurado -> comparación -> normalización de a
+# TAMANO_BLOQUE créditos; la memoria pico depende del bloque y no del lote completo.
+# (La comparación queda acotada al lote, como con COMPARACION_SOLO_LOTE = True)
+MODO_POR_BLOQUES = False
+TAMANO_BLOQUE = 500
+
+# Etapas independientes (comparación Avista y normalización) en paralelo; el unificado
+# arranca en cuanto ambas terminan. False = una etapa a la vez, en el orden de siempre.
+ETAPAS_EN_PARALELO = True
+
+# Puntos de control en clonación y comparación Avista: cada CHECKPOINT_CADA unidades
+# se guarda lo procesado en <corrida>/.checkpoints/ para poder reanudar la corrida
+CHECKPOINTS = True
+CHECKPOINT_CADA = 200
+
+# Re-validación incremental: reutiliza la evidencia de las filas (Avista + reestructurado)
+# que no cambiaron desde la corrida anterior. Se guarda en <salida>/.cache/
+CACHE_EVIDENCIA = True
+
+# Servicio residente de validación de un crédito (python -m services.servicio_validacion)
+SERVICIO_HOST = "127.0.0.1"
+SERVICIO_PUERTO = 8765
+
+# Modo trabajador (python -m services.trabajador_cola): varios procesos, en uno o varios
+# equipos con la carpeta de JSON y la de resultados compartidas, se reparten RUTA_JSONS
+# reservando COLA_ARCHIVOS_POR_TOMA archivos a la vez. Una reserva sin renovar por
+# COLA_TTL_RESERVA segundos (trabajador caído) la puede tomar otro.
+COLA_ARCHIVOS_POR_TOMA = 200
+COLA_TTL_RESERVA = 600
+COLA_PROCESOS = 1   # trabajadores que lanza un mismo comando en este equipo
+
+# Vista previa (python -m services.vista_previa): el pipeline sobre una muestra determinística
+# de VISTA_PREVIA_CREDITOS créditos, estratificada por "pagaduria" o "tipos_documento"
+VISTA_PREVIA_CREDITOS = 50
+VISTA_PREVIA_ESTRATO = "pagaduria"
+VISTA_PREVIA_SEMILLA = 0
+
+# Autoajuste (utils/autoajuste): al arrancar se perfilan los JSON, la base Avista y la
+# máquina, y se eligen MODO_POR_BLOQUES, TAMANO_BLOQUE, ETAPAS_EN_PARALELO, COLA_PROCESOS
+# y COLA_ARCHIVOS_POR_TOMA; lo elegido y el porqué quedan en el log.
+# Los nombres en AUTOAJUSTE_FIJOS (en minúscula, p. ej. "tamano_bloque") conservan el valor de arriba.
+AUTOAJUSTE = True
+AUTOAJUSTE_FIJOS = []
+
 # --- Evidencia por documento (9 columnas) ---
 DOCUMENTOS = [
     "CEDULA COMPARADA",
@@ -44,6 +101,101 @@ DOCUMENTOS = [
     "AMORTIZACION",
 ]
 
+# --- Pagadurías sin alias exacto ---
+# True = se resuelven por aproximación (tokens + trigramas) contra alias y nombres canónicos;
+# sólo si todos los tokens informativos tienen par (ver utils/pagadurias).
+# Los valores sin alias exacto se reportan en pagadurias_por_curar_<fecha>.xlsx
+PAGADURIA_RESOLUCION_DIFUSA = False
+PAGADURIA_UMBRAL_CONFIANZA = 0.80   # 0..1; por debajo el valor queda igual y se reporta
+
+# --- Esquema de columnas (tipo lógico por etapa) ---
+# llave:  identificador como texto (sin notación científica, sin ".0", sin separadores)
+# numero: valor numérico (plazos, montos, cuotas)      fecha: texto de fecha (ver utils/fechas)
+# texto:  se deja tal cual                              tasa:  porcentaje / tasa (ver comparador)
+# Columnas no declaradas: el reestructurador las tipa como antes (número si toda la columna lo es).
+_ESQUEMA_DOCUMENTOS = {
+    "NN": "llave",
+    "Numero credito": "llave",
+    "Cedula": "llave",
+    "id_cargue_origen": "llave",
+    "nombre_archivo_origen": "texto",
+    "nombre_json_origen": "texto",
+    "cedula_numero_documento": "llave",
+    "cedula_fecha_nacimiento": "fecha",
+    "desprendible_nomina_numero_documento": "llave",
+    "desprendible_nomina_pagaduria": "texto",
+    "desprendible_nomina_salario": "numero",
+    "desprendible_nomina_vigencia": "fecha",
+    "formato_conocimiento_cedula_firma_electronica": "llave",
+    "formato_conocimiento_plazo_meses": "numero",
+    "formato_conocimiento_valor_total_credito": "numero",
+    "libranza_numero_documento": "llave",
+    "libranza_cedula_firma_electronica": "llave",
+    "libranza_numero_credito": "llave",
+    "libranza_pagaduria": "texto",
+    "libranza_plazo": "numero",
+    "libranza_valor_cuota": "numero",
+    "libranza_valor_prestamo": "numero",
+    "seguro_de_vida_numero_documento": "llave",
+    "seguro_de_vida_cedula_firma_electronica": "llave",
+    "solicitud_fianza_cedula_firma_electronica": "llave",
+    "solicitud_credito_cedula_firma_electronica": "llave",
+    "solicitud_credito_numero_credito": "llave",
+    "solicitud_credito_solicitud": "llave",
+    "amortizacion_numero_documento": "llave",
+    "amortizacion_cedula_firma_electronica": "llave",
+    "amortizacion_numero_solicitud": "llave",
+    "amortizacion_pagaduria": "texto",
+    "amortizacion_plazo_meses": "numero",
+    "amortizacion_tasa_interes": "tasa",
+    "amortizacion_valor_credito": "numero",
+    "amortizacion_valor_cuota": "numero",
+}
+ESQUEMA_COLUMNAS = {
+    "clon": dict(_ESQUEMA_DOCUMENTOS),
+    "reestructurado": dict(_ESQUEMA_DOCUMENTOS),
+    # Avista: encabezados ya normalizados (sin tildes, MAYÚSCULAS)
+    "avista": {
+        "OPERACION": "llave",
+        "CEDULA": "llave",
+        "NOMBRE COMPLETO": "texto",
+        "FECHA NACIMIENTO": "fecha",
+        "FECHA DESEMBOLSO": "fecha",
+        "EMISOR": "texto",
+        "SALARIO": "numero",
+        "PLAZO INICIAL": "numero",
+        "MONTO INICIAL": "numero",
+        "VALOR CUOTA": "numero",
+        "TASA NOMINAL": "tasa",
+    },
+}
+
+# --- Bloques de consistencia del Normalizador ---
+# Cada bloque agrupa columnas del reestructurado que deben decir lo mismo.
+#   tipo "numero": igualdad numérica; tolerancia = diferencia absoluta permitida
+#   tipo "fecha":  mismo día; tolerancia = días de diferencia permitidos
+#   tipo "texto":  similitud promedio por pares >= tolerancia (0..1); sin tolerancia se usa
+#                  el umbral_similitud con el que se crea el Normalizador
+# En la salida queda una columna "Estado <nombre>" por bloque (OK / CON ERRORES / SIN DATOS / N/A)
+BLOQUES_NORMALIZACION = [
+    {"nombre": "PAGADURIA", "tipo": "texto",
+     "columnas": ["desprendible_nomina_pagaduria", "amortizacion_pagaduria", "libranza_pagaduria"]},
+    {"nombre": "PLAZO", "tipo": "numero", "tolerancia": 0,
+     "columnas": ["formato_conocimiento_plazo_meses", "amortizacion_plazo_meses", "libranza_plazo"]},
+    {"nombre": "VALOR CUOTA", "tipo": "numero", "tolerancia": 1,
+     "columnas": ["libranza_valor_cuota", "amortizacion_valor_cuota"]},
+    {"nombre": "VALOR CREDITO", "tipo": "numero", "tolerancia": 1,
+     "columnas": ["libranza_valor_prestamo", "amortizacion_valor_credito", "formato_conocimiento_valor_total_credito"]},
+    {"nombre": "NUMERO SOLICITUD", "tipo": "numero", "tolerancia": 0,
+     "columnas": ["solicitud_credito_solicitud", "amortizacion_numero_solicitud"]},
+]
+
+# --- Consistencia financiera ---
+# Recalcula la cuota (amortización francesa) con MONTO, PLAZO y TASA NOMINAL y la contrasta
+# con libranza_valor_cuota / amortizacion_valor_cuota. Columna "CONSISTENCIA FINANCIERA".
+VALIDAR_CONSISTENCIA_FINANCIERA = True
+CUOTA_TOLERANCIA_RELATIVA = 0.01   # 0.01 = 1% de diferencia permitida frente a la cuota del documento
+
 # Tolerancia (texto) para SequenceMatcher
 TOLERANCIA_TEXTO = 0.00000000001
 
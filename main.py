@@ -11,6 +11,13 @@ from services.reestructurador_excel import ReestructuradorExcel
 from services.comparador_avista import ComparadorAvista
 from services.normalizador_excel import NormalizadorExcel
 from services.consolidador_final import ConsolidadorFinal
+from services.pipeline_bloques import PipelineBloques
+from utils.config_ejecucion import ConfigEjecucion
+from utils.checkpoint import corrida_a_reanudar
+from utils.autoajuste import autoajustar
+from services.orquestador import (
+    Orquestador, Etapa, OK, JSONS, CLON, REESTRUCTURADO, EVIDENCIA, NORMALIZADO, UNIFICADO,
+)
 
 def _ask_path(prompt_txt: str, default_path: Path) -> str:
     """
@@ -38,18 +45,14 @@ if __name__ == "__main__":
     except Exception:
         cambiar = "n"
 
+    # Las rutas elegidas quedan en la configuración de ESTA corrida (no se toca `config`)
+    rutas = {}
     if cambiar == "s":
-        config.RUTA_JSONS = _ask_path("Ruta de entrada de JSON:", Path(config.RUTA_JSONS))
-        config.RUTA_NO_JSON = _ask_path("Ruta auxiliar (no JSON):", Path(config.RUTA_NO_JSON))
-        config.CARPETA_RESULTADOS_DAVINCI = Path(_ask_path("Carpeta de resultados Davinci:", config.CARPETA_RESULTADOS_DAVINCI))
-        # Alias internos recalculados al vuelo
-        config.CARPETA_EXCEL_CLON = config.CARPETA_RESULTADOS_DAVINCI
-        config.CARPETA_EXCEL_REESTRUCTURADO = config.CARPETA_RESULTADOS_DAVINCI
-        config.CARPETA_EXCEL_NORMALIZADO = config.CARPETA_RESULTADOS_DAVINCI
-        config.CARPETA_SALIDA_COMPARACION = config.CARPETA_RESULTADOS_DAVINCI
-        config.CARPETA_EXCEL_UNIFICADO = config.CARPETA_RESULTADOS_DAVINCI
+        rutas["ruta_jsons"] = _ask_path("Ruta de entrada de JSON:", Path(config.RUTA_JSONS))
+        rutas["ruta_no_json"] = _ask_path("Ruta auxiliar (no JSON):", Path(config.RUTA_NO_JSON))
+        rutas["carpeta_resultados"] = Path(_ask_path("Carpeta de resultados Davinci:", config.CARPETA_RESULTADOS_DAVINCI))
         # Base Avista opcional
-        config.CARPETA_BASES_AVISTA = Path(_ask_path("Carpeta Base de Datos Avista:", config.CARPETA_BASES_AVISTA))
+        rutas["carpeta_bases_avista"] = Path(_ask_path("Carpeta Base de Datos Avista:", config.CARPETA_BASES_AVISTA))
 
     # 1) ¿Desde dónde tomamos JSON?
     try:
@@ -58,11 +61,30 @@ if __name__ == "__main__":
     except Exception:
         modo = config.MODO_INGESTA_DEFAULT
 
+    # 1b) ¿Reanudar una corrida interrumpida? (sólo si dejó checkpoints)
+    cfg = ConfigEjecucion(modo_ingesta=modo, **rutas)
+    interrumpida = corrida_a_reanudar(cfg)
+    if interrumpida:
+        try:
+            reanudar = input(f"Hay una corrida interrumpida ({interrumpida}). ¿Reanudarla? [s/N]: ").strip().lower() == "s"
+        except Exception:
+            reanudar = False
+        if reanudar:
+            cfg = cfg.con(corrida=interrumpida, reanudar=True)
+
+    # 1c) Paralelismo y bloques según la entrada y la máquina (una corrida reanudada
+    #     conserva el modo con el que dejó sus checkpoints)
+    cfg = autoajustar(cfg, fijos=["modo_por_bloques"] if cfg.reanudar else [],
+                      parametros=["modo_por_bloques", "tamano_bloque", "etapas_en_paralelo"], logger=logger)
+
+    salida = cfg.preparar()
+    logger.info(f"Corrida {cfg.corrida}: resultados en {salida}" + (" (reanudada)" if cfg.reanudar else ""))
+
     # 2) Depuración NO debe detener el pipeline
     if modo == 1:
         # Modo local: los conflictos van a Escritorio/archivos conflicto (lo resuelve Depurador)
         dep = Depurador(
-            carpeta_fuente=config.RUTA_JSONS,
+            carpeta_fuente=cfg.ruta_jsons,
             carpeta_conflicto_destino=None,
             modo_ingesta=1,
             logger=logger,
@@ -70,8 +92,8 @@ if __name__ == "__main__":
     else:
         # Modo SFTP: mueve a <Resultados Davinci>/archivos conflicto
         dep = Depurador(
-            carpeta_fuente=config.RUTA_JSONS,
-            carpeta_conflicto_destino=config.CARPETA_RESULTADOS_DAVINCI / "archivos conflicto",
+            carpeta_fuente=cfg.ruta_jsons,
+            carpeta_conflicto_destino=cfg.carpeta_resultados / "archivos conflicto",
             modo_ingesta=2,
             logger=logger,
         )
@@ -79,54 +101,81 @@ if __name__ == "__main__":
     # Nota: ejecutar() SIEMPRE retorna True para no cortar el pipeline.
     dep.ejecutar()
 
-    # 3) Clonación
-    clon = ClonadorExcel(
-        carpeta_json_local=config.RUTA_JSONS,
-        carpeta_salida=str(config.CARPETA_EXCEL_CLON),
-        modo_ingesta=modo
-    )
-    if not clon.generar_excel():
-        logger.error("Fallo en clonación.")
-        raise SystemExit(1)
-    logger.info("Clonación completada correctamente.")
-
-    # 4) Reestructurado
-    reestr = ReestructuradorExcel(
-        carpeta_excel_origen=str(config.CARPETA_EXCEL_CLON),
-        carpeta_excel_destino=str(config.CARPETA_EXCEL_REESTRUCTURADO),
-    )
-    if not reestr.reestructurar():
-        logger.error("Fallo reestructurando.")
-        raise SystemExit(1)
-
-    logger.info("Continuando con el proceso de validación...")
-
-    # 5) Comparación AVISTA
-    comp = ComparadorAvista(
-        carpeta_excel_reestructurado=str(config.CARPETA_EXCEL_REESTRUCTURADO),
-        carpeta_bases_avista=str(config.CARPETA_BASES_AVISTA),
-        carpeta_salida=str(config.CARPETA_SALIDA_COMPARACION),
-    )
-    comp.comparar()
+    # 3-7) Pipeline como DAG: comparación y normalización sólo dependen del reestructurado
+    #      y corren en paralelo; el unificado arranca en cuanto ambas terminan.
+    def _consolidar() -> bool:
+        consol = ConsolidadorFinal(
+            carpeta_clon=str(salida),
+            carpeta_reestructurado=str(salida),
+            carpeta_normalizado=str(salida),
+            carpeta_comparacion=str(salida),
+            carpeta_salida_unificado=str(salida),
+        )
+        unificado = consol.consolidar()
+        if unificado:
+            logger.info(f"Archivo unificado final creado: {unificado}")
+        else:
+            logger.warning("No se pudo crear el archivo unificado final.")
+        return bool(unificado)
 
-    # 6) Normalización
-    normalizador = NormalizadorExcel(
-        carpeta_excel_reestructurado=str(config.CARPETA_EXCEL_REESTRUCTURADO),
-        carpeta_salida=str(config.CARPETA_EXCEL_NORMALIZADO),
-        umbral_similitud=float(config.TOLERANCIA_TEXTO),
-    )
-    normalizador.normalizar()
+    if cfg.modo_por_bloques:
+        # 3-6) Modo por bloques: clonación, reestructurado, comparación y normalización juntos
+        bloques = PipelineBloques(
+            carpeta_json_local=cfg.ruta_jsons,
+            carpeta_bases_avista=cfg.carpeta_bases_avista,
+            carpeta_salida=salida,
+            modo_ingesta=modo,
+            cfg=cfg,
+        )
+        etapas = [
+            Etapa("Bloques", bloques.ejecutar, entradas=[JSONS],
+                  salidas=[CLON, REESTRUCTURADO, EVIDENCIA, NORMALIZADO]),
+        ]
+        criticas = {"Bloques": "Fallo en el procesamiento por bloques."}
+    else:
+        # 3) Clonación
+        clon = ClonadorExcel(
+            carpeta_json_local=cfg.ruta_jsons,
+            carpeta_salida=str(salida),
+            modo_ingesta=modo,
+            cfg=cfg,
+        )
+        # 4) Reestructurado
+        reestr = ReestructuradorExcel(
+            carpeta_excel_origen=str(salida),
+            carpeta_excel_destino=str(salida),
+            cfg=cfg,
+        )
+        # 5) Comparación AVISTA
+        comp = ComparadorAvista(
+            carpeta_excel_reestructurado=str(salida),
+            carpeta_bases_avista=str(cfg.carpeta_bases_avista),
+            carpeta_salida=str(salida),
+            cfg=cfg,
+        )
+        # 6) Normalización
+        normalizador = NormalizadorExcel(
+            carpeta_excel_reestructurado=str(salida),
+            carpeta_salida=str(salida),
+            umbral_similitud=float(cfg.tolerancia_texto),
+        )
+        # Comparación y normalización no detienen el unificado (como antes)
+        etapas = [
+            Etapa("Clonación", clon.generar_excel, entradas=[JSONS], salidas=[CLON]),
+            Etapa("Reestructurado", reestr.reestructurar, entradas=[CLON], salidas=[REESTRUCTURADO]),
+            Etapa("Comparación Avista", comp.comparar, entradas=[REESTRUCTURADO], salidas=[EVIDENCIA],
+                  critica=False),
+            Etapa("Normalización", normalizador.normalizar, entradas=[REESTRUCTURADO], salidas=[NORMALIZADO],
+                  critica=False),
+        ]
+        criticas = {"Clonación": "Fallo en clonación.", "Reestructurado": "Fallo reestructurando."}
 
     # 7) Unificado final
-    consol = ConsolidadorFinal(
-        carpeta_clon=str(config.CARPETA_EXCEL_CLON),
-        carpeta_reestructurado=str(config.CARPETA_EXCEL_REESTRUCTURADO),
-        carpeta_normalizado=str(config.CARPETA_EXCEL_NORMALIZADO),
-        carpeta_comparacion=str(config.CARPETA_SALIDA_COMPARACION),
-        carpeta_salida_unificado=str(config.CARPETA_EXCEL_UNIFICADO),
-    )
-    salida = consol.consolidar()
-    if salida:
-        logger.info(f"Archivo unificado final creado: {salida}")
-    else:
-        logger.warning("No se pudo crear el archivo unificado final.")
+    etapas.append(Etapa("Unificado", _consolidar, entradas=[CLON, REESTRUCTURADO, EVIDENCIA, NORMALIZADO],
+                        salidas=[UNIFICADO], critica=False))
+
+    estados = Orquestador(etapas, cfg=cfg, reanudar_en=salida if cfg.reanudar else None).ejecutar()
+    for nombre, mensaje in criticas.items():
+        if estados[nombre] != OK:
+            logger.error(mensaje)
+            raise SystemExit(1)
@@ -5,6 +5,10 @@ from pathlib import Path
 import logging
 from datetime import datetime
 import config
+from utils import esquema
+from utils.config_ejecucion import ConfigEjecucion
+from utils.checkpoint import Checkpoint
+from utils.cache_evidencia import huella
 
 # SFTP (opcional)
 try:
@@ -14,23 +18,31 @@ except Exception:
 
 
 class ClonadorExcel:
-    def __init__(self, carpeta_json_local: str, carpeta_salida: str, modo_ingesta: int = None):
+    def __init__(self, carpeta_json_local: str, carpeta_salida: str, modo_ingesta: int = None,
+                 cfg: ConfigEjecucion | None = None, archivos: list[str] | None = None):
+        self.cfg = cfg or ConfigEjecucion()
         self.carpeta_json = Path(carpeta_json_local)
+        # Sólo estos nombres de la carpeta local (p. ej. los reservados por un trabajador)
+        self.archivos = list(archivos) if archivos is not None else None
         self.carpeta_salida = Path(carpeta_salida)
-        self.modo_ingesta = modo_ingesta or config.MODO_INGESTA_DEFAULT
+        self.modo_ingesta = modo_ingesta or self.cfg.modo_ingesta
         self.logger = logging.getLogger("ClonadorExcel")
 
     # ---- Entrada LOCAL ----
-    def _iter_local(self):
-        for p in self.carpeta_json.glob("*.json"):
-            yield p.name, p.read_bytes()
+    def _iter_local(self, omitir=()):
+        if self.archivos is None:
+            rutas = self.carpeta_json.glob("*.json")
+        else:
+            rutas = (self.carpeta_json / n for n in self.archivos)
+        for p in rutas:
+            yield p.name, (None if p.name in omitir else p.read_bytes())
 
     # ---- Entrada SFTP (streaming, sin descargar) ----
-    def _iter_sftp(self):
+    def _iter_sftp(self, omitir=()):
         if SFTPReader is None:
             raise RuntimeError("Paramiko/SFTP no disponible. Instala 'paramiko'.")
         with SFTPReader(config.SFTP_HOST, config.SFTP_PORT, config.SFTP_USER, config.SFTP_PASS) as s:
-            for fname, data in s.iter_json_files(config.SFTP_DIR_JSONS):
+            for fname, data in s.iter_json_files(self.cfg.sftp_dir_jsons, omitir=omitir):
                 yield fname, data
 
     # ---- Parser de un JSON (lista o {documentos:[...]}) ----
@@ -121,42 +133,88 @@ class ClonadorExcel:
 
         return fila
 
-    # ---- Generar Excel de clonación ----
-    def generar_excel(self):
-        # Fuente de JSON
+    # ---- Fuente de JSON ----
+    def _iterador(self, omitir=()):
+        """(nombre, bytes) de cada JSON; los de `omitir` no se leen (bytes=None)."""
         if self.modo_ingesta == 2:
-            iterador = self._iter_sftp()
             self.logger.info("Leyendo JSON desde SFTP (streaming)...")
-        else:
-            iterador = self._iter_local()
-            self.logger.info("Leyendo JSON desde carpeta local...")
-
-        filas = []
-        for nombre, raw in iterador:
-            self.logger.info(f"Procesando {nombre}...")
-            fila = self._procesar_json_anidado(nombre, raw)
+            return self._iter_sftp(omitir)
+        self.logger.info("Leyendo JSON desde carpeta local...")
+        return self._iter_local(omitir)
+
+    def _filas(self, checkpoint: Checkpoint | None = None):
+        """
+        Una fila por JSON válido, en el orden de la fuente. Con `checkpoint`, los JSON
+        ya procesados en un intento anterior salen del checkpoint sin volver a leerse.
+        """
+        hechas = checkpoint.hechas if checkpoint is not None else {}
+        for nombre, raw in self._iterador(omitir=hechas):
+            if raw is None:
+                fila = hechas[nombre]
+            else:
+                self.logger.info(f"Procesando {nombre}...")
+                fila = self._procesar_json_anidado(nombre, raw)
+                if checkpoint is not None:
+                    checkpoint.agregar(nombre, fila)
             if fila:
-                filas.append(fila)
+                yield fila
 
-        if not filas:
-            self.logger.error("No se pudo extraer información de los JSON.")
-            return False
+    def _checkpoint(self) -> Checkpoint | None:
+        if not self.cfg.checkpoints:
+            return None
+        origen = self.cfg.sftp_dir_jsons if self.modo_ingesta == 2 else str(self.carpeta_json.resolve())
+        firma = huella(self.modo_ingesta, origen, *([sorted(self.archivos)] if self.archivos is not None else []))
+        return Checkpoint(self.carpeta_salida, "clon", firma, self.cfg.checkpoint_cada)
 
+    def construir_df(self, filas: list[dict]) -> pd.DataFrame:
+        """DataFrame del clon: NN / Numero credito / Cedula primero y tipos según el esquema."""
         df = pd.DataFrame(filas)
-
-        # Ordenar dejando NN / Numero credito / Cedula primero si están presentes
         pref = ["NN", "Numero credito", "Cedula", "id_cargue_origen", "nombre_archivo_origen", "nombre_json_origen"]
         pref_presentes = [c for c in pref if c in df.columns]
         otras = [c for c in df.columns if c not in pref_presentes]
         df = df[pref_presentes + sorted(otras)]
+        return esquema.tipar_escritura(df, "clon")
+
+    def iter_bloques(self, tamano: int):
+        """DataFrames del clon de a `tamano` créditos (modo por bloques: no retiene el lote)."""
+        bloque = []
+        for fila in self._filas():
+            bloque.append(fila)
+            if len(bloque) >= tamano:
+                yield self.construir_df(bloque)
+                bloque = []
+        if bloque:
+            yield self.construir_df(bloque)
+
+    # ---- Generar Excel de clonación ----
+    def generar_excel(self):
+        checkpoint = self._checkpoint()
+        if checkpoint is not None:
+            checkpoint.abrir(self.cfg.reanudar)
+        try:
+            filas = list(self._filas(checkpoint))
+        except Exception:
+            # Lo leído hasta aquí queda en el checkpoint para reanudar
+            if checkpoint is not None:
+                checkpoint.cerrar(completado=False)
+            raise
+        if not filas:
+            if checkpoint is not None:
+                checkpoint.cerrar(completado=True)
+            self.logger.error("No se pudo extraer información de los JSON.")
+            return False
+
+        df = self.construir_df(filas)
 
         # Guardar
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         nombre_archivo = f"clon_json_{timestamp}.xlsx"
-        ruta_salida = Path(config.CARPETA_EXCEL_CLON) / nombre_archivo
+        ruta_salida = self.carpeta_salida / nombre_archivo
 
-        Path(config.CARPETA_EXCEL_CLON).mkdir(parents=True, exist_ok=True)
+        self.carpeta_salida.mkdir(parents=True, exist_ok=True)
         df.to_excel(ruta_salida, index=False, engine='openpyxl')
+        if checkpoint is not None:
+            checkpoint.cerrar(completado=True)
 
         self.logger.info(f"Excel generado: {ruta_salida} ({len(df)} filas, {len(df.columns)} columnas)")
         return True
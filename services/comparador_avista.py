@@ -1,19 +1,27 @@
 # services/comparador_avista.py
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import logging
 import re
-from difflib import SequenceMatcher
-import unicodedata
 import config
+from utils.normalizacion import (
+    norm_header as _norm_header,
+    norm_text as _norm_text,
+    norm_num_like as _norm_num_like,
+    norm_num_serie,
+)
+from utils import fechas
+from utils.excel_io import leer_excel_columnas
+from utils.cache_evidencia import CacheEvidencia, huella
+from utils.similitud import similar
+from utils import esquema
+from utils.nombres import PARTES_NOMBRE, partes_avista, partes_avista_serie, evidencia_nombre
+from utils.financiero import cuota_francesa, dentro_de_tolerancia
+from utils.config_ejecucion import ConfigEjecucion
+from utils.checkpoint import Checkpoint
 
 # -------------------- Normalizadores --------------------
-def _strip_accents(s: str) -> str:
-    return "".join(c for c in unicodedata.normalize("NFD", str(s)) if unicodedata.category(c) != "Mn")
-
-def _norm_header(h):
-    return _strip_accents(str(h)).strip().upper()
-
 def _is_blank(v) -> bool:
     try:
         if v is None: return True
@@ -23,28 +31,6 @@ def _is_blank(v) -> bool:
     except Exception:
         return False
 
-def _norm_text(v):
-    if pd.isna(v): return ""
-    return " ".join(_strip_accents(str(v)).strip().upper().split())
-
-def _norm_num_like(v):
-    if pd.isna(v): return ""
-    s = str(v).strip()
-    try:
-        if "e" in s.lower():
-            return str(int(float(s)))
-    except Exception:
-        pass
-    s2 = s.replace(".", "").replace(",", "").replace(" ", "")
-    try:
-        f = float(s2)
-        return str(int(f)) if f.is_integer() else str(int(round(f)))
-    except Exception:
-        return s2
-
-_MESES = {"ENE":"01","FEB":"02","MAR":"03","ABR":"04","MAY":"05","JUN":"06",
-          "JUL":"07","AGO":"08","SEP":"09","OCT":"10","NOV":"11","DIC":"12"}
-
 def _parse_percent(x):
     """Devuelve la tasa en fracción (0.12 = 12%) o None si no se puede parsear."""
     if x is None:
@@ -105,41 +91,21 @@ def _almost_equal(a, b, tol=0.001):
 
 def _norm_fecha(v):
     """Devuelve fecha como DD/MM/YYYY cuando es reconocible."""
-    if pd.isna(v): return ""
-    s = str(v).strip()
-    if not s: return ""
-    up = _strip_accents(s).upper().replace("-", "/")
-    m = re.match(r"^(\d{1,2})/([A-Z]{3})/(\d{2,4})(?:\s+.*)?$", up)
-    if m and m.group(2) in _MESES:
-        up = f"{m.group(1).zfill(2)}/{_MESES[m.group(2)]}/{m.group(3)}"
-    dt = pd.to_datetime(up, dayfirst=True, errors="coerce")
-    if pd.isna(dt):
-        m2 = re.match(r"^(\d{4})/(\d{1,2})/(\d{1,2})(?:\s+.*)?$", up)
-        if m2:
-            dt = pd.to_datetime(f"{m2.group(3).zfill(2)}/{m2.group(2).zfill(2)}/{m2.group(1)}",
-                                dayfirst=True, errors="coerce")
-    if pd.isna(dt): return up
-    return dt.strftime("%d/%m/%Y")
+    return fechas.norm_fecha(v)
 
 def _parse_date(x):
-    s = _norm_fecha(x)
-    dt = pd.to_datetime(s, dayfirst=True, errors="coerce")
-    return None if pd.isna(dt) else dt
+    return fechas.parsear_fecha(x)
 
 def _dates_equal(a, b) -> bool | None:
-    da = pd.to_datetime(str(a), dayfirst=True, errors="coerce")
-    db = pd.to_datetime(str(b), dayfirst=True, errors="coerce")
-    if pd.isna(da):
-        da = pd.to_datetime(str(a), yearfirst=True, errors="coerce")
-    if pd.isna(db):
-        db = pd.to_datetime(str(b), yearfirst=True, errors="coerce")
-    if pd.isna(da) or pd.isna(db): return None
+    da = fechas.parsear_fecha(a)
+    db = fechas.parsear_fecha(b)
+    if da is None or db is None: return None
     try:
         return da.date() == db.date()
     except Exception:
         return None
 
-def _cmp(avista_val, re_val, tipo):
+def _cmp(avista_val, re_val, tipo, umbral_texto: float):
     if tipo == "numero":
         return _norm_num_like(avista_val) == _norm_num_like(re_val)
     if tipo == "fecha":
@@ -148,7 +114,7 @@ def _cmp(avista_val, re_val, tipo):
             return eq
         return _norm_fecha(avista_val) == _norm_fecha(re_val)
     a = _norm_text(avista_val); b = _norm_text(re_val)
-    return SequenceMatcher(None, a, b).ratio() >= float(config.TOLERANCIA_TEXTO)
+    return similar(a, b, float(umbral_texto))
 
 # -------------------- Reglas especiales --------------------
 def _max_3_meses_antes_mes_anio(fecha_desembolso_avista, fecha_vigencia_re):
@@ -186,35 +152,133 @@ def _avista_val(row: pd.Series, campo_avista: str) -> str:
         val = row.get(_AVISTA_ALIASES[ca], "")
     return str(val or "")
 
-def _ok_fullname_components(fav_row: pd.Series, re_fullname: str) -> list[str]:
-    re_full = _norm_text(re_fullname)
-    av_p1 = _norm_text(fav_row.get("PRIMER NOMBRE", ""))
-    av_p2 = _norm_text(fav_row.get("SEGUNDO NOMBRE", ""))
-    av_a1 = _norm_text(fav_row.get("PRIMER APELLIDO", ""))
-    av_a2 = _norm_text(fav_row.get("SEGUNDO APELLIDO", ""))
-    comps = [("PRIMER NOMBRE", av_p1), ("SEGUNDO NOMBRE", av_p2),
-             ("PRIMER APELLIDO", av_a1), ("SEGUNDO APELLIDO", av_a2)]
-    evaluados = [(lbl, piece) for (lbl, piece) in comps if piece]
-    if not evaluados:
-        return ["ND-AV NOMBRE COMPLETO"]
-    fallos = [lbl for (lbl, piece) in evaluados if piece not in re_full]
-    return ["OK"] if not fallos else [f"FALLO {lbl}" for lbl in fallos]
+# -------------------- Llaves de cruce --------------------
+# Columna de evidencia que indica qué llave produjo el cruce (OPERACION / CEDULA)
+COL_LLAVE_CRUCE = "LLAVE CRUCE"
+
+# Columnas del reestructurado de donde se toma la cédula (en orden de prioridad)
+COLS_CEDULA_RE = (
+    "Cedula",
+    "cedula_numero_documento",
+    "libranza_numero_documento",
+    "desprendible_nomina_numero_documento",
+)
+
+# Columna de evidencia con la cuota recalculada vs. la de los documentos
+COL_CONSISTENCIA = "CONSISTENCIA FINANCIERA"
+
+# Cuotas declaradas en los documentos: etiqueta -> columna del reestructurado
+_CUOTAS_DOCUMENTO = {
+    "LIBRANZA": "libranza_valor_cuota",
+    "AMORTIZACION": "amortizacion_valor_cuota",
+}
+
+def _a_float(serie: pd.Series, fn) -> pd.Series:
+    """`fn` (valor -> número o None) una vez por valor distinto; sin número -> NaN."""
+    mapa = {v: fn(v) for v in pd.unique(serie.dropna())}
+    return pd.to_numeric(serie.map(mapa), errors="coerce").astype(float)
+
+def _tasa_avista(v):
+    return None if _is_blank(v) else _parse_percent(v)
+
+def _fmt_pesos(x: float) -> str:
+    return f"{x:,.0f}"
+
+# -------------------- Proyección de columnas --------------------
+def _columnas_requeridas(mapeo: dict) -> tuple[set[str], set[str]]:
+    """
+    Deriva de DOCUMENTOS_MAPEO qué columnas se tocan realmente:
+      - del reestructurado: todos los 're'/'re2' + llaves de cruce
+      - de Avista (encabezado normalizado): campos comparados, partes del nombre,
+        CEDULA y OPERACION (+ alias conocidos)
+    """
+    cols_re = {"Numero credito", *COLS_CEDULA_RE}
+    cols_av = {"OPERACION", "CEDULA", *PARTES_NOMBRE}
+    for campos in mapeo.values():
+        for campo_avista, spec in campos.items():
+            specs = spec if isinstance(spec, list) else [spec]
+            for sp in specs:
+                cols_re.update(c for c in (sp.get("re"), sp.get("re2")) if c)
+            if all(sp.get("comparar_recontra_re") for sp in specs):
+                continue
+            ca = _norm_header(campo_avista)
+            if ca.startswith("NOMBRE COMPLETO"):
+                continue  # se arma con las cuatro partes
+            if ca.startswith("CEDULA"):
+                continue
+            cols_av.add(ca)
+            if ca in _AVISTA_ALIASES:
+                cols_av.add(_AVISTA_ALIASES[ca])
+    return cols_re, cols_av
+
+# -------------------- Versión del plan de reglas --------------------
+# Súbelo cuando cambie la lógica de evaluación (invalida la caché de evidencia)
+_VERSION_REGLAS = 4
+
+def _version_plan(cfg: ConfigEjecucion) -> str:
+    """Hash de todo lo que condiciona la evidencia además de los datos de la fila."""
+    return huella(
+        _VERSION_REGLAS,
+        config.DOCUMENTOS,
+        config.DOCUMENTOS_MAPEO,
+        cfg.tolerancia_texto,
+        cfg.tasa_tolerancia,
+        cfg.mostrar_detalle_tasa,
+    )
+
+def _clave_evidencia(plan: str, fav: pd.Series, fila_res: pd.Series, cols_av: list, cols_re: list) -> str:
+    """
+    Clave de caché de una fila: pares (columna, valor) de ambos lados, de modo que si
+    cambian las columnas presentes (o su orden) no se reutiliza evidencia de otra fila.
+    """
+    return huella(plan, fav[cols_av].to_dict(), fila_res[cols_re].to_dict())
+
+
+def _columnas_fecha(mapeo: dict) -> tuple[set[str], set[str]]:
+    """Columnas tipo fecha del reestructurado y de Avista (encabezado normalizado) según el mapeo."""
+    cols_re, cols_av = set(), set()
+    for campos in mapeo.values():
+        for campo_avista, spec in campos.items():
+            for sp in (spec if isinstance(spec, list) else [spec]):
+                if sp.get("tipo") != "fecha":
+                    continue
+                cols_re.update(c for c in (sp.get("re"), sp.get("re2")) if c)
+                if not sp.get("comparar_recontra_re"):
+                    cols_av.add(_norm_header(campo_avista))
+    return cols_re, cols_av
 
 # -------------------- Comparador --------------------
 class ComparadorAvista:
-    def __init__(self, carpeta_excel_reestructurado: str, carpeta_bases_avista: str | Path, carpeta_salida: str | Path):
+    def __init__(self, carpeta_excel_reestructurado: str, carpeta_bases_avista: str | Path, carpeta_salida: str | Path,
+                 avista_completa: bool | None = None, solo_lote: bool | None = None,
+                 usar_cache: bool | None = None, cfg: ConfigEjecucion | None = None):
+        self.cfg = cfg or ConfigEjecucion()
         self.carpeta_excel_reestructurado = Path(carpeta_excel_reestructurado)
         self.carpeta_bases_avista = Path(carpeta_bases_avista)
         self.carpeta_salida = Path(carpeta_salida)
+        # True = la evidencia lleva la fila Avista completa (lee todas las columnas)
+        self.avista_completa = self.cfg.avista_salida_completa if avista_completa is None else avista_completa
+        # True = sólo se evalúan/escriben las operaciones presentes en el lote
+        self.solo_lote = self.cfg.comparacion_solo_lote if solo_lote is None else solo_lote
+        # True = reutiliza la evidencia de filas que no cambiaron desde la corrida anterior
+        self.usar_cache = self.cfg.cache_evidencia if usar_cache is None else usar_cache
+        # Con una corrida explícita la caché es la compartida de la carpeta de resultados
+        carpeta_cache = cfg.carpeta_cache if cfg is not None else self.carpeta_salida / ".cache"
+        self.ruta_cache = carpeta_cache / "evidencia_avista.json"
+        self.cols_re, self.cols_av = _columnas_requeridas(config.DOCUMENTOS_MAPEO)
+        self.fechas_re, self.fechas_av = _columnas_fecha(config.DOCUMENTOS_MAPEO)
         self.logger = logging.getLogger("ComparadorAvista")
 
+    def _incluir_avista(self, col: str) -> bool:
+        return col in self.cols_av or "OPER" in col
+
     def _listar_avista_validos(self):
         if not self.carpeta_bases_avista.exists(): return []
         archivos = [p for p in self.carpeta_bases_avista.glob("*.xlsx") if p.is_file() and not p.name.startswith("~$")]
         archivos.sort(key=lambda f: f.stat().st_mtime, reverse=True)
         return archivos
 
-    def _leer_avista(self) -> tuple[pd.DataFrame | None, Path | None]:
+    def _leer_avista(self, filtro_filas=None) -> tuple[pd.DataFrame | None, Path | None]:
         candidatos = self._listar_avista_validos()
         if not candidatos:
             self.logger.error(f"No hay .xlsx válidos en {self.carpeta_bases_avista}")
@@ -222,8 +286,13 @@ class ComparadorAvista:
         ultimo_error = None
         for p in candidatos:
             try:
-                df = pd.read_excel(p)
-                df.columns = [_norm_header(c) for c in df.columns]
+                df = leer_excel_columnas(
+                    p,
+                    incluir=None if self.avista_completa else self._incluir_avista,
+                    normalizar_encabezado=_norm_header,
+                    filtro_filas=filtro_filas,
+                )
+                esquema.tipar_lectura(df, "avista")
                 self.logger.info(f"Usando Base Avista: {p.name}")
                 return df, p
             except Exception as e:
@@ -252,14 +321,252 @@ class ComparadorAvista:
         self.logger.error("No se detectó columna OPERACIÓN.")
         return None
 
+    def _col_cedula(self, df_avista: pd.DataFrame) -> str | None:
+        for original in df_avista.columns:
+            if _norm_header(original) == "CEDULA":
+                return original
+        self.logger.warning("No se detectó columna CEDULA; no habrá cruce por cédula.")
+        return None
+
+    def _indexar_reestructurado(self, df_res: pd.DataFrame) -> tuple[dict, dict]:
+        """
+        Índices O(1) sobre el reestructurado:
+          - OPERACIÓN normalizada -> posición (primera fila, igual que antes con iloc[0])
+          - CÉDULA normalizada -> posición, sólo para filas SIN número de crédito
+            (la tripleta del nombre de archivo no lo trajo). Es el respaldo del cruce.
+        """
+        idx_oper: dict[str, int] = {}
+        idx_ced: dict[str, int] = {}
+        cols_ced = [c for c in COLS_CEDULA_RE if c in df_res.columns]
+        for pos, (op_norm, fila) in enumerate(zip(df_res["_NUM_CRED_NORM_"], df_res[cols_ced].itertuples(index=False))):
+            if op_norm:
+                idx_oper.setdefault(op_norm, pos)
+                continue
+            ced = next((v for v in fila if not _is_blank(v)), None)
+            if ced is not None:
+                idx_ced.setdefault(_norm_num_like(ced), pos)
+        if idx_ced:
+            self.logger.info(f"Reestructurado: {len(idx_ced)} fila(s) sin número de crédito indexadas por cédula.")
+        return idx_oper, idx_ced
+
+    def _cruzar(self, df_avista: pd.DataFrame, op_norm: pd.Series, col_ced: str | None,
+                idx_oper: dict, idx_ced: dict) -> tuple[pd.Series, pd.Series]:
+        """
+        Resuelve, para cada fila Avista, la posición de su fila en el reestructurado
+        (NaN si no está) y la llave que produjo el cruce ("CEDULA AMBIGUA": la cédula
+        coincide pero el cliente tiene varias operaciones, no se cruza).
+        """
+        posiciones = op_norm.map(idx_oper)
+        llaves = pd.Series("", index=df_avista.index, dtype=object)
+        llaves[posiciones.notna()] = "OPERACION"
+        if col_ced:
+            ced_norm = norm_num_serie(df_avista[col_ced])
+            por_cedula = ced_norm.map(idx_ced)
+            # Si el cliente tiene varias operaciones en Avista, la cédula no dice de cuál
+            # es el JSON: sólo se cruza cuando la cédula tiene una única operación
+            candidata = posiciones.isna() & por_cedula.notna()
+            usar = candidata & (op_norm.groupby(ced_norm).transform("nunique") == 1)
+            ambigua = candidata & ~usar
+            posiciones = posiciones.where(~usar, por_cedula)
+            llaves[usar] = "CEDULA"
+            llaves[ambigua] = "CEDULA AMBIGUA"
+            if ambigua.any():
+                self.logger.warning(f"{int(ambigua.sum())} fila(s) Avista no se cruzan por cédula: "
+                                    "el cliente tiene varias operaciones.")
+
+        faltantes = len(set(idx_oper) - set(op_norm))
+        if faltantes:
+            self.logger.warning(f"{faltantes} número(s) de crédito del lote no existen en la base Avista.")
+        return posiciones, llaves
+
     def _leer_reestructurado(self, ruta: Path) -> pd.DataFrame | None:
         try:
-            return pd.read_excel(ruta, dtype=str)
+            df = leer_excel_columnas(ruta, incluir=self.cols_re, como_texto=True)
+            return esquema.tipar_lectura(df, "reestructurado")
         except Exception as e:
             self.logger.exception(f"Error leyendo reestructurado {ruta}: {e}")
             return None
 
-    def comparar(self) -> bool:
+    def _evaluar_fila(self, fav: pd.Series, fila_res: pd.Series, partes_nombre=None) -> dict[str, str]:
+        """
+        Evidencia por documento para una fila Avista y su fila del reestructurado.
+        `partes_nombre`: tokens del nombre Avista ya calculados para el lote (ver utils/nombres).
+        """
+        if partes_nombre is None:
+            partes_nombre = partes_avista(fav)
+        resultado: dict[str, str] = {}
+        for doc in config.DOCUMENTOS:
+            campos = config.DOCUMENTOS_MAPEO.get(doc, {})
+            evidencias = []
+
+            for campo_avista, spec in campos.items():
+                specs = spec if isinstance(spec, list) else [spec]
+
+                # 1) RE vs RE (sin AVISTA)
+                for sp in [x for x in specs if x.get("comparar_recontra_re")]:
+                    re1 = sp.get("re"); re2 = sp.get("re2")
+                    tipo = sp.get("tipo", "texto")
+                    a = fila_res.get(re1, "")
+                    b = fila_res.get(re2, "")
+                    if _is_blank(a) and _is_blank(b):
+                        evidencias.append(f"ND-RE {re1},{re2}")
+                    elif _is_blank(a):
+                        evidencias.append(f"ND-RE {re1}")
+                    elif _is_blank(b):
+                        evidencias.append(f"ND-RE {re2}")
+                    else:
+                        evidencias.append("OK" if _cmp(a, b, tipo, self.cfg.tolerancia_texto) else f"FALLO {re1} vs {re2}")
+
+                # 2) AVISTA vs RE
+                normal_specs = [x for x in specs if not x.get("comparar_recontra_re")]
+                if not normal_specs:
+                    continue
+
+                av_val = _avista_val(fav, campo_avista)
+                if _is_blank(av_val):
+                    for _ in normal_specs:
+                        evidencias.append(f"ND-AV {campo_avista}")
+                    continue
+
+                for sp in normal_specs:
+                    re_col = sp.get("re")
+                    tipo = sp.get("tipo", "texto")
+                    special = sp.get("validacion_especial")
+
+                    if not re_col or re_col not in fila_res.index:
+                        evidencias.append(f"ND-RE {campo_avista}")
+                        continue
+
+                    re_val = fila_res.get(re_col, "")
+                    if _is_blank(re_val):
+                        evidencias.append(f"ND-RE {campo_avista}")
+                        continue
+
+                    # Nombres → un solo OK
+                    if _norm_header(doc) in {"DATACREDITO", "FIANZA", "FORMATO CONOCIMIENTO", "LIBRANZA", "AMORTIZACION"} and \
+                       _norm_header(campo_avista) in {"NOMBRE COMPLETO", "NOMBRE COMPLETO 2"}:
+                        evidencias.extend(evidencia_nombre(partes_nombre, re_val))
+                        continue
+
+                    # ---- ESPECIAL: TASA NOMINAL (comparación en tasa MENSUAL) ----
+                    if tipo == "tasa_nominal" or special in {"tasa_interes_nominal", "amort_tasa_nominal"}:
+                        # AVISTA (base Excel) -> fracción mensual (1.94% -> 0.0194)
+                        av_pct_m = _parse_percent(av_val)
+                        # Reestructurado -> convertir a mensual con tu lógica/Excel
+                        re_pct_m = _to_mensual_from_amort(re_val)
+
+                        if av_pct_m is None and re_pct_m is None:
+                            msg = "ND-AV TASA NOMINAL y ND-RE TASA NOMINAL"
+                        elif av_pct_m is None:
+                            msg = "ND-AV TASA NOMINAL"
+                        elif re_pct_m is None:
+                            msg = "ND-RE TASA NOMINAL"
+                        else:
+                            tol = self.cfg.tasa_tolerancia
+                            ok = _almost_equal(av_pct_m, re_pct_m, tol)
+                            msg = "OK" if ok else "FALLO TASA NOMINAL"
+
+                        if self.cfg.mostrar_detalle_tasa:
+                            av_txt = f"{av_pct_m:.6f}" if av_pct_m is not None else "NA"
+                            re_txt = f"{re_pct_m:.6f}" if re_pct_m is not None else "NA"
+                            msg += f" (AV='{av_val}'→{av_txt}; RE='{re_val}'→{re_txt})"
+
+                        evidencias.append(msg)
+                        continue
+                    # ----------------------------------------------------------------
+
+                    evidencias.append("OK" if _cmp(av_val, re_val, tipo, self.cfg.tolerancia_texto) else f"FALLO {campo_avista}")
+
+            resultado[doc] = ", ".join(evidencias) if evidencias else ""
+        return resultado
+
+    def _consistencia_financiera(self, hoja: pd.DataFrame, df_res: pd.DataFrame, posiciones: pd.Series) -> pd.Series:
+        """
+        Recalcula para todo el lote, en una pasada, la cuota francesa con MONTO INICIAL,
+        PLAZO INICIAL y TASA NOMINAL (mensual) de Avista (respaldo: el reestructurado)
+        y la contrasta con la cuota de LIBRANZA y de AMORTIZACION.
+        """
+        vacia = pd.Series(np.nan, index=hoja.index, dtype=object)
+        pos = posiciones.loc[hoja.index]
+        cruzadas = pos.notna()
+        re_cols = ["amortizacion_valor_credito", "amortizacion_plazo_meses", "amortizacion_tasa_interes",
+                   *_CUOTAS_DOCUMENTO.values()]
+        re_cols = [c for c in re_cols if c in df_res.columns]
+        filas_re = df_res[re_cols].iloc[pos[cruzadas].astype(int).to_numpy()]
+        filas_re = filas_re.set_axis(hoja.index[cruzadas], axis=0).reindex(hoja.index)
+
+        def _col(df, c):
+            return df[c] if c in df.columns else vacia
+
+        monto_av = _col(hoja, "MONTO INICIAL")
+        if "MONTO INCIAL" in hoja.columns:
+            monto_av = monto_av.where(~monto_av.map(_is_blank), hoja["MONTO INCIAL"])
+        monto = _a_float(monto_av, esquema.a_numero).fillna(_a_float(_col(filas_re, "amortizacion_valor_credito"), esquema.a_numero))
+        plazo = _a_float(_col(hoja, "PLAZO INICIAL"), esquema.a_numero).fillna(_a_float(_col(filas_re, "amortizacion_plazo_meses"), esquema.a_numero))
+        tasa = _a_float(_col(hoja, "TASA NOMINAL"), _tasa_avista).fillna(_a_float(_col(filas_re, "amortizacion_tasa_interes"), _to_mensual_from_amort))
+
+        calculada = cuota_francesa(monto, plazo, tasa)
+        tolerancia = float(self.cfg.cuota_tolerancia_relativa)
+
+        faltantes = pd.Series("", index=hoja.index, dtype=object)
+        for nombre, serie in (("MONTO", monto), ("PLAZO", plazo), ("TASA", tasa)):
+            faltantes = faltantes.where(serie.notna(), faltantes + f" {nombre}")
+        partes = [np.where(np.isnan(calculada), "ND" + faltantes.str.rstrip().where(faltantes != "", " CUOTA"), "")]
+
+        for etiqueta, col_cuota in _CUOTAS_DOCUMENTO.items():
+            declarada = _a_float(_col(filas_re, col_cuota), esquema.a_numero).to_numpy()
+            ok = dentro_de_tolerancia(calculada, declarada, tolerancia)
+            parte = np.full(len(hoja), "", dtype=object)
+            parte[np.isnan(declarada)] = f"ND-RE CUOTA {etiqueta}"
+            parte[ok] = "OK"
+            fallo = ~np.isnan(calculada) & ~np.isnan(declarada) & ~ok
+            parte[fallo] = [
+                f"FALLO CUOTA {etiqueta} (CALC={_fmt_pesos(c)}; DOC={_fmt_pesos(d)})"
+                for c, d in zip(calculada[fallo], declarada[fallo])
+            ]
+            partes.append(parte)
+
+        evidencia = pd.Series(
+            [", ".join(p for p in fila if p) for fila in zip(*partes)], index=hoja.index, dtype=object
+        )
+        return evidencia.where(cruzadas, "NO ENCONTRADO EN REESTRUCTURADO")
+
+    def _precargar_fechas(self, hoja: pd.DataFrame, df_res: pd.DataFrame):
+        """Parsea cada columna de fecha una sola vez (formato dominante + atípicos)."""
+        for col in hoja.columns:
+            if col in self.fechas_av or "FECHA" in str(col):
+                fechas.precargar(hoja[col])
+        for col in self.fechas_re:
+            if col in df_res.columns:
+                fechas.precargar(df_res[col])
+
+    def _parchear_evidencia(self, ruta_evid: Path, hoja: pd.DataFrame, col_oper: str,
+                            reemplazar: set[str]) -> pd.DataFrame:
+        """
+        Toma la evidencia ya escrita y sustituye sólo las operaciones de `reemplazar`
+        por las filas recién evaluadas de `hoja` (las que no vengan en `hoja` se eliminan).
+        """
+        previa = pd.read_excel(ruta_evid)
+        previa.columns = [_norm_header(c) for c in previa.columns]
+        if col_oper not in previa.columns:
+            self.logger.warning(f"{ruta_evid.name} no tiene {col_oper}; se reescribe completa.")
+            return hoja
+        conservar = ~norm_num_serie(previa[col_oper]).isin(reemplazar)
+        self.logger.info(
+            f"Parche de evidencia: {int(conservar.sum())} fila(s) conservadas, "
+            f"{int((~conservar).sum())} retiradas, {len(hoja)} re-evaluadas."
+        )
+        return pd.concat([previa.loc[conservar], hoja], ignore_index=True)
+
+    def comparar(self, operaciones: set[str] | None = None, eliminar: set[str] | None = None) -> bool:
+        """
+        Compara el último reestructurado contra la base Avista más reciente.
+
+        Con `operaciones` (números de operación normalizados) sólo se re-evalúan esas
+        operaciones y el resultado se parcha sobre la evidencia existente del mismo
+        reestructurado; `eliminar` retira operaciones que ya no están en la base.
+        Si no hay evidencia previa se hace la comparación completa.
+        """
         ruta_reestr = self._ultimo_reestructurado()
         if not ruta_reestr:
             return False
@@ -278,122 +585,181 @@ class ComparadorAvista:
             self.logger.error("No se pudo cargar el reestructurado.")
             return False
 
-        if "Numero credito" not in df_res.columns:
-            self.logger.error("Reestructurado no contiene 'Numero credito'.")
+        base = Path(ruta_reestr).stem.replace("_reestructurado", "")
+        ruta_evid = self.carpeta_salida / f"{base}_evidencia_avista_unica.xlsx"
+        dirigida = operaciones is not None or eliminar is not None
+        parchear = dirigida and ruta_evid.exists()
+        if dirigida and not parchear:
+            self.logger.warning("No hay evidencia previa para este reestructurado: comparación completa.")
+
+        dirigidas = set(operaciones or ()) if parchear else None
+        checkpoint = self._checkpoint(ruta_reestr, ruta_base, dirigidas)
+        if checkpoint is not None:
+            checkpoint.abrir(self.cfg.reanudar)
+        try:
+            hoja = self.evaluar_lote(df_res, df_avista, col_oper, operaciones=dirigidas, checkpoint=checkpoint)
+        except Exception:
+            # Las filas ya evaluadas quedan en el checkpoint para reanudar
+            if checkpoint is not None:
+                checkpoint.cerrar(completado=False)
+            raise
+        if hoja is None:
+            if checkpoint is not None:
+                checkpoint.cerrar(completado=True)
             return False
 
-        df_res["_NUM_CRED_NORM_"] = df_res["Numero credito"].apply(_norm_num_like)
+        if parchear:
+            hoja = self._parchear_evidencia(ruta_evid, hoja, col_oper, set(operaciones or ()) | set(eliminar or ()))
+
+        self.carpeta_salida.mkdir(parents=True, exist_ok=True)
+        hoja.to_excel(ruta_evid, index=False, engine="openpyxl")
+        if checkpoint is not None:
+            checkpoint.cerrar(completado=True)
+
+        if ruta_base:
+            self.logger.info(f"Base Avista usada: {ruta_base}")
+        self.logger.info(f"Evidencia Avista -> {ruta_evid}")
+        return True
+
+    def _checkpoint(self, ruta_reestr, ruta_base, operaciones: set[str] | None) -> Checkpoint | None:
+        """Checkpoint de la comparación; la firma cambia si cambia un archivo, las reglas o el alcance."""
+        if not self.cfg.checkpoints:
+            return None
+
+        def _archivo(ruta):
+            if not ruta:
+                return None
+            st = Path(ruta).stat()
+            return [Path(ruta).name, st.st_size, st.st_mtime_ns]
+
+        firma = huella(_version_plan(self.cfg), _archivo(ruta_reestr), _archivo(ruta_base),
+                       sorted(operaciones) if operaciones is not None else None,
+                       self.solo_lote, self.avista_completa)
+        return Checkpoint(self.carpeta_salida, "comparacion_avista", firma, self.cfg.checkpoint_cada)
+
+    def _filtro_llaves(self, operaciones: set[str], cedulas: set[str]):
+        """Para `leer_excel_columnas`: conserva las filas Avista con esa OPERACIÓN o CÉDULA."""
+        def fabrica(columnas: list[str]):
+            vacio = pd.DataFrame(columns=columnas)
+            col_oper = self._col_operacion(vacio)
+            col_ced = self._col_cedula(vacio) if cedulas else None
+            i_oper = columnas.index(col_oper) if col_oper else None
+            i_ced = columnas.index(col_ced) if col_ced else None
+
+            def conservar(fila: tuple) -> bool:
+                return ((i_oper is not None and _norm_num_like(fila[i_oper]) in operaciones)
+                        or (i_ced is not None and _norm_num_like(fila[i_ced]) in cedulas))
+            return conservar
+        return fabrica
+
+    def cargar_avista(self, operaciones: set[str] | None = None,
+                      cedulas: set[str] | None = None) -> tuple[pd.DataFrame, str, pd.Series] | None:
+        """
+        (base Avista, columna OPERACIÓN, OPERACIÓN normalizada) para reutilizar en varios `evaluar_lote`.
+        Con `operaciones` / `cedulas` (normalizadas) sólo se cargan esas filas de la base.
+        """
+        filtro = None
+        if operaciones is not None or cedulas is not None:
+            filtro = self._filtro_llaves(set(operaciones or ()), set(cedulas or ()))
+        df_avista, _ = self._leer_avista(filtro)
+        if filtro is not None and df_avista is not None:
+            self.logger.info(f"Base Avista filtrada: {len(df_avista)} fila(s) de las operaciones/cédulas pedidas.")
+        # Filtrada, una base vacía es válida (ninguna operación pedida está en Avista)
+        if df_avista is None or (df_avista.empty and filtro is None):
+            self.logger.error("No se pudo cargar la base Avista.")
+            return None
+        col_oper = self._col_operacion(df_avista)
+        if not col_oper:
+            return None
+        return df_avista, col_oper, norm_num_serie(df_avista[col_oper])
+
+    def abrir_cache(self) -> CacheEvidencia | None:
+        """Caché de evidencia para compartir entre bloques (None si está desactivada)."""
+        return CacheEvidencia(self.ruta_cache, _version_plan(self.cfg)) if self.usar_cache else None
+
+    def evaluar_lote(self, df_res: pd.DataFrame, df_avista: pd.DataFrame, col_oper: str,
+                     operaciones: set[str] | None = None, op_norm: pd.Series | None = None,
+                     cache: CacheEvidencia | None = None,
+                     checkpoint: Checkpoint | None = None) -> pd.DataFrame | None:
+        """
+        Evidencia de un reestructurado (ya en memoria, como texto) contra la base Avista,
+        sin leer ni escribir archivos. Es lo que usa `comparar` y el modo por bloques.
+
+        - `operaciones`: sólo esas operaciones (re-validación dirigida).
+        - `op_norm`: OPERACIÓN normalizada de `df_avista` (se calcula si no viene).
+        - `cache`: caché de evidencia compartida entre llamadas; si no viene y la caché
+          está activa, se abre y se persiste aquí.
+        - `checkpoint`: ya abierto; las filas que trae de un intento anterior no se
+          re-evalúan y cada fila evaluada se registra en él.
+        """
+        if "Numero credito" not in df_res.columns:
+            self.logger.error("Reestructurado no contiene 'Numero credito'.")
+            return None
 
-        hoja = df_avista.copy(deep=True)
+        df_res["_NUM_CRED_NORM_"] = norm_num_serie(df_res["Numero credito"])
+        idx_oper, idx_ced = self._indexar_reestructurado(df_res)
+        col_ced = self._col_cedula(df_avista) if idx_ced else None
+
+        if op_norm is None:
+            op_norm = norm_num_serie(df_avista[col_oper])
+        posiciones, llaves = self._cruzar(df_avista, op_norm, col_ced, idx_oper, idx_ced)
+
+        if operaciones is not None:
+            hoja = df_avista.loc[op_norm.isin(operaciones)].copy()
+            if self.solo_lote:
+                hoja = hoja.loc[posiciones.loc[hoja.index].notna()]
+            self.logger.info(f"Re-validación dirigida: {len(hoja)} operación(es) a re-evaluar.")
+        elif self.solo_lote:
+            # Semi-join: sólo las operaciones del lote (no se copia la base completa)
+            hoja = df_avista.loc[posiciones.notna()].copy()
+            self.logger.info(f"Comparación acotada al lote: {len(hoja)} de {len(df_avista)} operaciones de la base.")
+        else:
+            hoja = df_avista
         for doc in config.DOCUMENTOS:
             if doc not in hoja.columns:
                 hoja[doc] = ""
+        hoja[COL_LLAVE_CRUCE] = llaves.loc[hoja.index]
 
-        for idx, fav in hoja.iterrows():
-            op_raw = fav.get(col_oper, "")
-            op_norm = _norm_num_like(op_raw)
-            candidatos = df_res[df_res["_NUM_CRED_NORM_"] == op_norm]
+        self._precargar_fechas(hoja, df_res)
+
+        plan = _version_plan(self.cfg)
+        propia = cache is None and self.usar_cache
+        if propia:
+            cache = CacheEvidencia(self.ruta_cache, plan)
+        cols_hash_av = [c for c in hoja.columns if c in self.cols_av or c == col_oper]
+        cols_hash_re = [c for c in df_res.columns if c in self.cols_re]
+        partes_nombre = partes_avista_serie(hoja)
+        hechas = checkpoint.hechas if checkpoint is not None else {}
 
-            if candidatos.empty:
+        for idx, fav in hoja.iterrows():
+            pos = posiciones.at[idx]
+            if pd.isna(pos):
                 for doc in config.DOCUMENTOS:
                     hoja.at[idx, doc] = "NO ENCONTRADO EN REESTRUCTURADO"
                 continue
 
-            fila_res = candidatos.iloc[0]
-
-            for doc in config.DOCUMENTOS:
-                campos = config.DOCUMENTOS_MAPEO.get(doc, {})
-                evidencias = []
-
-                for campo_avista, spec in campos.items():
-                    specs = spec if isinstance(spec, list) else [spec]
-
-                    # 1) RE vs RE (sin AVISTA)
-                    for sp in [x for x in specs if x.get("comparar_recontra_re")]:
-                        re1 = sp.get("re"); re2 = sp.get("re2")
-                        tipo = sp.get("tipo", "texto")
-                        a = fila_res.get(re1, "")
-                        b = fila_res.get(re2, "")
-                        if _is_blank(a) and _is_blank(b):
-                            evidencias.append(f"ND-RE {re1},{re2}")
-                        elif _is_blank(a):
-                            evidencias.append(f"ND-RE {re1}")
-                        elif _is_blank(b):
-                            evidencias.append(f"ND-RE {re2}")
-                        else:
-                            evidencias.append("OK" if _cmp(a, b, tipo) else f"FALLO {re1} vs {re2}")
-
-                    # 2) AVISTA vs RE
-                    normal_specs = [x for x in specs if not x.get("comparar_recontra_re")]
-                    if not normal_specs:
-                        if evidencias:
-                            hoja.at[idx, doc] = ", ".join(evidencias)
-                        continue
-
-                    av_val = _avista_val(fav, campo_avista)
-                    if _is_blank(av_val):
-                        for _ in normal_specs:
-                            evidencias.append(f"ND-AV {campo_avista}")
-                        hoja.at[idx, doc] = ", ".join(evidencias)
-                        continue
-
-                    for sp in normal_specs:
-                        re_col = sp.get("re")
-                        tipo = sp.get("tipo", "texto")
-                        special = sp.get("validacion_especial")
-
-                        if not re_col or re_col not in fila_res.index:
-                            evidencias.append(f"ND-RE {campo_avista}")
-                            continue
-
-                        re_val = fila_res.get(re_col, "")
-                        if _is_blank(re_val):
-                            evidencias.append(f"ND-RE {campo_avista}")
-                            continue
-
-                        # Nombres → un solo OK
-                        if _norm_header(doc) in {"DATACREDITO", "FIANZA", "FORMATO CONOCIMIENTO", "LIBRANZA", "AMORTIZACION"} and \
-                           _norm_header(campo_avista) in {"NOMBRE COMPLETO", "NOMBRE COMPLETO 2"}:
-                            evidencias.extend(_ok_fullname_components(fav, re_val))
-                            continue
-
-                        # ---- ESPECIAL: TASA NOMINAL (comparación en tasa MENSUAL) ----
-                        if tipo == "tasa_nominal" or special in {"tasa_interes_nominal", "amort_tasa_nominal"}:
-                            # AVISTA (base Excel) -> fracción mensual (1.94% -> 0.0194)
-                            av_pct_m = _parse_percent(av_val)
-                            # Reestructurado -> convertir a mensual con tu lógica/Excel
-                            re_pct_m = _to_mensual_from_amort(re_val)
-
-                            if av_pct_m is None and re_pct_m is None:
-                                msg = "ND-AV TASA NOMINAL y ND-RE TASA NOMINAL"
-                            elif av_pct_m is None:
-                                msg = "ND-AV TASA NOMINAL"
-                            elif re_pct_m is None:
-                                msg = "ND-RE TASA NOMINAL"
-                            else:
-                                tol = getattr(config, "TASA_TOLERANCIA", 0.001)
-                                ok = _almost_equal(av_pct_m, re_pct_m, tol)
-                                msg = "OK" if ok else "FALLO TASA NOMINAL"
-
-                            if getattr(config, "MOSTRAR_DETALLE_TASA", False):
-                                av_txt = f"{av_pct_m:.6f}" if av_pct_m is not None else "NA"
-                                re_txt = f"{re_pct_m:.6f}" if re_pct_m is not None else "NA"
-                                msg += f" (AV='{av_val}'→{av_txt}; RE='{re_val}'→{re_txt})"
-
-                            evidencias.append(msg)
-                            continue
-                        # ----------------------------------------------------------------
-
-                        evidencias.append("OK" if _cmp(av_val, re_val, tipo) else f"FALLO {campo_avista}")
-
-                hoja.at[idx, doc] = ", ".join(evidencias) if evidencias else ""
-
-        self.carpeta_salida.mkdir(parents=True, exist_ok=True)
-        base = Path(ruta_reestr).stem.replace("_reestructurado", "")
-        ruta_evid = self.carpeta_salida / f"{base}_evidencia_avista_unica.xlsx"
-        hoja.to_excel(ruta_evid, index=False, engine="openpyxl")
+            if str(idx) in hechas:
+                for doc, valor in hechas[str(idx)].items():
+                    hoja.at[idx, doc] = valor
+                continue
 
-        if ruta_base:
-            self.logger.info(f"Base Avista usada: {ruta_base}")
-        self.logger.info(f"Evidencia Avista -> {ruta_evid}")
-        return True
+            fila_res = df_res.iloc[int(pos)]
+            evidencia = None
+            if cache is not None:
+                clave = _clave_evidencia(plan, fav, fila_res, cols_hash_av, cols_hash_re)
+                evidencia = cache.obtener(clave)
+            if evidencia is None:
+                evidencia = self._evaluar_fila(fav, fila_res, partes_nombre.at[idx])
+                if cache is not None:
+                    cache.guardar(clave, evidencia)
+            if checkpoint is not None:
+                checkpoint.agregar(str(idx), evidencia)
+            for doc, valor in evidencia.items():
+                hoja.at[idx, doc] = valor
+
+        if propia:
+            cache.persistir()
+
+        if self.cfg.validar_consistencia_financiera:
+            hoja[COL_CONSISTENCIA] = self._consistencia_financiera(hoja, df_res, posiciones)
+        return hoja
@@ -0,0 +1,145 @@
+# services/diff_avista.py
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import logging
+import pandas as pd
+from utils import esquema
+from utils.config_ejecucion import ConfigEjecucion
+from utils.excel_io import leer_excel_columnas
+from utils.normalizacion import norm_header, norm_num_serie
+from services.comparador_avista import ComparadorAvista
+from services.orquestador import PATRONES, REESTRUCTURADO
+
+AGREGADA = "AGREGADA"
+ELIMINADA = "ELIMINADA"
+MODIFICADA = "MODIFICADA"
+
+
+class DiffAvista:
+    """
+    Compara las dos exportaciones Avista más recientes de `carpeta_bases_avista`
+    (llave = OPERACIÓN) y reporta operaciones agregadas, eliminadas y modificadas
+    con las columnas que cambiaron. Con `revalidar()` sólo las operaciones afectadas
+    se vuelven a comparar contra el último reestructurado y se parchan en la evidencia.
+    """
+    def __init__(self, carpeta_bases_avista: str | Path, carpeta_salida: str | Path):
+        self.carpeta_bases_avista = Path(carpeta_bases_avista)
+        self.carpeta_salida = Path(carpeta_salida)
+        self.logger = logging.getLogger("DiffAvista")
+
+    def _bases(self) -> tuple[Path | None, Path | None]:
+        """(anterior, nueva) por fecha de modificación."""
+        if not self.carpeta_bases_avista.exists():
+            return None, None
+        archivos = [p for p in self.carpeta_bases_avista.glob("*.xlsx") if p.is_file() and not p.name.startswith("~$")]
+        archivos.sort(key=lambda f: f.stat().st_mtime, reverse=True)
+        nueva = archivos[0] if archivos else None
+        anterior = archivos[1] if len(archivos) > 1 else None
+        return anterior, nueva
+
+    def _leer(self, ruta: Path) -> tuple[pd.DataFrame, str | None]:
+        df = esquema.tipar_lectura(leer_excel_columnas(ruta, como_texto=True, normalizar_encabezado=norm_header), "avista")
+        col_oper = next((c for c in df.columns if c == "OPERACION"), None) or \
+                   next((c for c in df.columns if "OPER" in c), None)
+        return df, col_oper
+
+    def diferenciar(self, df_prev: pd.DataFrame, df_new: pd.DataFrame, col_oper: str) -> pd.DataFrame:
+        """
+        Devuelve un DataFrame con columnas OPERACION / CAMBIO / COLUMNAS CAMBIADAS.
+        Ambas bases deben venir como texto (mismo criterio de lectura) y con encabezados normalizados.
+        """
+        def _indexar(df):
+            df = df.assign(_OP_=norm_num_serie(df[col_oper]))
+            df = df[df["_OP_"] != ""].drop_duplicates("_OP_", keep="first")
+            return df.set_index("_OP_").drop(columns=[col_oper])
+
+        a = _indexar(df_prev)
+        b = _indexar(df_new)
+        solo_prev = [c for c in a.columns if c not in b.columns]
+        solo_new = [c for c in b.columns if c not in a.columns]
+        if solo_prev or solo_new:
+            self.logger.warning(f"Columnas distintas entre bases. Retiradas: {solo_prev} / Nuevas: {solo_new}")
+
+        agregadas = b.index.difference(a.index)
+        eliminadas = a.index.difference(b.index)
+        comunes = a.index.intersection(b.index)
+
+        cols = [c for c in b.columns if c in a.columns]
+        va = a.loc[comunes, cols].fillna("")
+        vb = b.loc[comunes, cols].fillna("")
+        distintos = va.ne(vb)
+        modificadas = distintos.any(axis=1)
+        # Lista de columnas cambiadas por fila (producto booleano x etiquetas)
+        etiquetas = distintos.loc[modificadas].dot(pd.Index([f"{c}, " for c in cols])).str.rstrip(", ")
+
+        partes = [
+            pd.DataFrame({"OPERACION": agregadas, "CAMBIO": AGREGADA, "COLUMNAS CAMBIADAS": ""}),
+            pd.DataFrame({"OPERACION": eliminadas, "CAMBIO": ELIMINADA, "COLUMNAS CAMBIADAS": ""}),
+            pd.DataFrame({"OPERACION": etiquetas.index, "CAMBIO": MODIFICADA, "COLUMNAS CAMBIADAS": etiquetas.values}),
+        ]
+        diff = pd.concat(partes, ignore_index=True)
+        self.logger.info(
+            f"Diff Avista: {len(agregadas)} agregadas, {len(eliminadas)} eliminadas, "
+            f"{int(modificadas.sum())} modificadas, {len(comunes) - int(modificadas.sum())} sin cambios."
+        )
+        return diff
+
+    def ejecutar(self) -> pd.DataFrame | None:
+        """Calcula y guarda el reporte de diferencias entre las dos últimas bases."""
+        anterior, nueva = self._bases()
+        if not anterior or not nueva:
+            self.logger.warning("Se necesitan al menos dos bases Avista para calcular diferencias.")
+            return None
+        self.logger.info(f"Diff Avista: {anterior.name} -> {nueva.name}")
+
+        df_prev, col_prev = self._leer(anterior)
+        df_new, col_new = self._leer(nueva)
+        if not col_prev or not col_new:
+            self.logger.error("No se detectó columna OPERACIÓN en alguna de las bases.")
+            return None
+        if col_prev != col_new:
+            df_prev = df_prev.rename(columns={col_prev: col_new})
+
+        diff = self.diferenciar(df_prev, df_new, col_new)
+
+        self.carpeta_salida.mkdir(parents=True, exist_ok=True)
+        ruta = self.carpeta_salida / f"diff_avista_{anterior.stem}_vs_{nueva.stem}.xlsx"
+        diff.to_excel(ruta, index=False, engine="openpyxl")
+        self.logger.info(f"Reporte diff Avista -> {ruta}")
+        return diff
+
+    def revalidar(self, comparador: ComparadorAvista) -> bool:
+        """
+        Re-compara sólo las operaciones agregadas/modificadas contra el último
+        reestructurado y retira las eliminadas de la evidencia existente.
+        """
+        diff = self.ejecutar()
+        if diff is None:
+            return comparador.comparar()
+        afectadas = set(diff.loc[diff["CAMBIO"] != ELIMINADA, "OPERACION"])
+        eliminadas = set(diff.loc[diff["CAMBIO"] == ELIMINADA, "OPERACION"])
+        if not afectadas and not eliminadas:
+            self.logger.info("La base Avista nueva no trae cambios en operaciones.")
+        return comparador.comparar(operaciones=afectadas, eliminar=eliminadas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff de las dos últimas bases Avista y re-validación de la última corrida.")
+    parser.add_argument("--corrida", help="Corrida a parchar; por defecto la última con reestructurado.")
+    parser.add_argument("--resultados", help="Carpeta de resultados; por defecto la de config.")
+    parser.add_argument("--avista", help="Carpeta de la base Avista; por defecto la de config.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    rutas = {k: v for k, v in {"carpeta_resultados": args.resultados, "carpeta_bases_avista": args.avista}.items() if v}
+    cfg = ConfigEjecucion(**rutas)
+    if cfg.aislar:
+        corrida = args.corrida or cfg.ultima_corrida(PATRONES[REESTRUCTURADO])
+        if not corrida:
+            logging.error(f"No hay una corrida con reestructurado en {cfg.carpeta_resultados / 'corridas'}.")
+            raise SystemExit(1)
+        cfg = cfg.con(corrida=corrida)
+    carpeta = cfg.carpeta_salida
+    comp = ComparadorAvista(str(carpeta), cfg.carpeta_bases_avista, carpeta, cfg=cfg)
+    raise SystemExit(0 if DiffAvista(cfg.carpeta_bases_avista, carpeta).revalidar(comp) else 1)
@@ -0,0 +1,151 @@
+# services/ejecutor_lotes.py
+"""
+Ejecución desatendida de varios lotes en un mismo proceso (sin las preguntas de main.py).
+
+Cada origen es una carpeta local de JSON o, con el prefijo "sftp:", un directorio
+remoto del SFTP de Davinci. La base Avista, el plan de reglas del comparador y la
+caché de evidencia se cargan UNA vez y se reutilizan en todos los lotes; cada lote
+pasa por el pipeline por bloques hacia su propia corrida y se consolida.
+
+Por lote queda <corrida>/resumen_lote.json y se imprime una línea JSON en la salida
+estándar (el log va a stderr), p. ej. para un orquestador:
+
+    {"lote": 1, "origen": "...", "estado": "ok", "corrida": "...", "creditos": 120, ...}
+
+    python -m services.ejecutor_lotes D:/lotes/octubre_1 D:/lotes/octubre_2 sftp:davinci/procesados-qa
+    python -m services.ejecutor_lotes lote_a lote_b --resultados salida --resumen resumen.json
+
+No se depuran las carpetas (los archivos que no son .json igual se ignoran) y, como en
+el modo por bloques, la comparación queda acotada a las operaciones de cada lote.
+El código de salida es 0 sólo si todos los lotes terminaron bien.
+"""
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime
+import argparse
+import json
+import logging
+import sys
+import time
+from utils.autoajuste import autoajustar
+from utils.config_ejecucion import ConfigEjecucion
+from services.comparador_avista import ComparadorAvista
+from services.pipeline_bloques import PipelineBloques
+from services.consolidador_final import ConsolidadorFinal
+
+PREFIJO_SFTP = "sftp:"
+RESUMEN = "resumen_lote.json"
+
+
+class EjecutorLotes:
+    """Procesa varios orígenes de JSON con la base Avista y la caché residentes."""
+    def __init__(self, cfg: ConfigEjecucion | None = None, origenes=(), detener_si_falla: bool = False):
+        self.cfg = cfg or ConfigEjecucion()
+        self.origenes = list(origenes)
+        self.detener_si_falla = detener_si_falla
+        self.logger = logging.getLogger("EjecutorLotes")
+        self.comp = None
+        self.avista = None
+        self.cache = None
+        self.base_avista = None
+
+    def cargar(self) -> bool:
+        """Base Avista más reciente, plan de reglas y caché de evidencia (una vez por proceso)."""
+        carpeta = self.cfg.carpeta_resultados
+        self.comp = ComparadorAvista(str(carpeta), self.cfg.carpeta_bases_avista, carpeta,
+                                     solo_lote=True, cfg=self.cfg)
+        bases = self.comp._listar_avista_validos()
+        self.base_avista = str(bases[0]) if bases else None
+        inicio = time.perf_counter()
+        self.avista = self.comp.cargar_avista()
+        if self.avista is None:
+            return False
+        self.cache = self.comp.abrir_cache()
+        self.logger.info(f"Base Avista residente: {len(self.avista[0])} operaciones "
+                         f"({time.perf_counter() - inicio:.1f} s).")
+        return True
+
+    def config_lote(self, origen: str) -> ConfigEjecucion:
+        """Corrida nueva para `origen` (carpeta local o 'sftp:<directorio remoto>')."""
+        if origen.startswith(PREFIJO_SFTP):
+            cfg = self.cfg.con(corrida=None, modo_ingesta=2, sftp_dir_jsons=origen[len(PREFIJO_SFTP):])
+        else:
+            cfg = self.cfg.con(corrida=None, modo_ingesta=1, ruta_jsons=origen)
+        return autoajustar(cfg, parametros=["tamano_bloque"])
+
+    def ejecutar_lote(self, numero: int, origen: str) -> dict:
+        """Procesa un origen y devuelve (y deja en su corrida) el resumen del lote."""
+        inicio = time.perf_counter()
+        resumen = {"lote": numero, "origen": origen, "estado": "error", "corrida": None, "carpeta": None,
+                   "inicio": datetime.now().isoformat(timespec="seconds"), "base_avista": self.base_avista}
+        try:
+            cfg = self.config_lote(origen)
+            salida = cfg.preparar()
+            resumen.update(corrida=cfg.corrida, carpeta=str(salida), tamano_bloque=cfg.tamano_bloque)
+            self.logger.info(f"Lote {numero}/{len(self.origenes)}: {origen} -> {salida}")
+
+            pipeline = PipelineBloques(cfg.ruta_jsons, cfg.carpeta_bases_avista, salida, modo_ingesta=cfg.modo_ingesta,
+                                       cfg=cfg, comparador=self.comp, avista=self.avista, cache=self.cache)
+            ok = pipeline.ejecutar()
+            resumen["filas"] = dict(pipeline.filas)
+            resumen["creditos"] = pipeline.filas.get("clon", 0)
+            if ok:
+                unificado = ConsolidadorFinal(str(salida), str(salida), str(salida), str(salida),
+                                              str(salida)).consolidar()
+                resumen["unificado"] = str(unificado) if unificado else None
+                ok = unificado is not None
+            resumen["estado"] = "ok" if ok else "sin_datos" if pipeline.sin_datos else "error"
+        except Exception as e:
+            self.logger.exception(f"Error en el lote {numero} ({origen}).")
+            resumen["error"] = f"{type(e).__name__}: {e}"
+        resumen["segundos"] = round(time.perf_counter() - inicio, 2)
+
+        if resumen["carpeta"]:
+            Path(resumen["carpeta"], RESUMEN).write_text(json.dumps(resumen, ensure_ascii=False, indent=2),
+                                                         encoding="utf-8")
+        return resumen
+
+    def ejecutar(self, al_terminar_lote=None) -> list[dict]:
+        """Resúmenes de todos los lotes; `al_terminar_lote(resumen)` se llama tras cada uno."""
+        if not self.cargar():
+            return []
+        resumenes = []
+        for numero, origen in enumerate(self.origenes, start=1):
+            resumen = self.ejecutar_lote(numero, origen)
+            resumenes.append(resumen)
+            if al_terminar_lote is not None:
+                al_terminar_lote(resumen)
+            if resumen["estado"] != "ok" and self.detener_si_falla:
+                self.logger.error(f"Lote {numero} terminó en '{resumen['estado']}': se detiene la ejecución.")
+                break
+        if self.cache is not None:
+            self.cache.persistir()
+        return resumenes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Procesa varios lotes de JSON en un solo proceso, sin preguntas.")
+    parser.add_argument("origenes", nargs="+",
+                        help="Carpetas locales de JSON o 'sftp:<directorio remoto>'.")
+    parser.add_argument("--resultados", help="Carpeta de resultados; por defecto la de config.")
+    parser.add_argument("--avista", help="Carpeta de la base Avista; por defecto la de config.")
+    parser.add_argument("--tamano-bloque", type=int, default=None, help="Por defecto, config / autoajuste.")
+    parser.add_argument("--resumen", help="Además, escribe aquí la lista de resúmenes (JSON).")
+    parser.add_argument("--detener-si-falla", action="store_true", help="No sigue con los lotes restantes.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    valores = {k: v for k, v in {"carpeta_resultados": args.resultados, "carpeta_bases_avista": args.avista,
+                                 "tamano_bloque": args.tamano_bloque}.items() if v}
+    if args.tamano_bloque:
+        valores["autoajuste_fijos"] = ["tamano_bloque"]
+    ejecutor = EjecutorLotes(ConfigEjecucion(**valores), args.origenes, args.detener_si_falla)
+
+    def _imprimir(resumen: dict):
+        print(json.dumps(resumen, ensure_ascii=False), flush=True)
+
+    resumenes = ejecutor.ejecutar(al_terminar_lote=_imprimir)
+    if args.resumen:
+        Path(args.resumen).write_text(json.dumps(resumenes, ensure_ascii=False, indent=2), encoding="utf-8")
+    ok = bool(resumenes) and len(resumenes) == len(args.origenes) and all(r["estado"] == "ok" for r in resumenes)
+    sys.exit(0 if ok else 1)
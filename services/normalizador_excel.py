@@ -2,17 +2,27 @@
 import pandas as pd
 from pathlib import Path
 import logging
-from difflib import SequenceMatcher
+import config
+from utils import esquema, fechas
+from utils.similitud import ratio, similar
+
+OK = "OK"
+CON_ERRORES = "CON ERRORES"
+SIN_DATOS = "SIN DATOS"
+NO_APLICA = "N/A"
 
 class NormalizadorExcel:
     """
-    Produce un único archivo *_resultado_normalizado.xlsx con columna 'Estado Normalizado'.
-    Reglas básicas (puedes ajustarlas según avances).
+    Produce un único archivo *_resultado_normalizado.xlsx con una columna "Estado <bloque>"
+    por cada bloque de config.BLOQUES_NORMALIZACION y el resumen 'Estado Normalizado'
+    (OK sólo si ningún bloque quedó CON ERRORES o SIN DATOS).
     """
-    def __init__(self, carpeta_excel_reestructurado: str, carpeta_salida: str, umbral_similitud: float = 0.70):
+    def __init__(self, carpeta_excel_reestructurado: str, carpeta_salida: str, umbral_similitud: float = 0.70,
+                 bloques: list[dict] | None = None):
         self.carpeta_excel_reestructurado = Path(carpeta_excel_reestructurado)
         self.carpeta_salida = Path(carpeta_salida)
         self.umbral = umbral_similitud
+        self.bloques = bloques if bloques is not None else config.BLOQUES_NORMALIZACION
         self.logger = logging.getLogger("NormalizadorExcel")
 
     def _ultimo_reestructurado(self) -> Path | None:
@@ -22,54 +32,108 @@ class NormalizadorExcel:
             return None
         return max(files, key=lambda f: f.stat().st_mtime)
 
-    def _sim(self, a: str, b: str) -> float:
-        return SequenceMatcher(None, str(a).strip().upper(), str(b).strip().upper()).ratio()
-
-    def _bloque_ok(self, row, cols) -> bool:
-        vals = [row.get(c, "") for c in cols if c in row.index and pd.notna(row.get(c, ""))]
-        vals = [str(v) for v in vals if str(v).strip() != ""]
-        if not vals:  # sin datos -> lo marcamos como error de bloque
-            return False
-        if len(vals) == 1:
-            return True
-        # similitud promedio
-        pares = []
-        for i in range(len(vals)):
-            for j in range(i+1, len(vals)):
-                pares.append(self._sim(vals[i], vals[j]))
-        return (sum(pares)/len(pares)) >= self.umbral if pares else True
+    # -------------------- Comparaciones por tipo --------------------
+    @staticmethod
+    def _a_numero(serie: pd.Series) -> pd.Series:
+        limpio = serie.str.replace(r"[\s$]", "", regex=True).str.replace(",", "", regex=False)
+        return pd.to_numeric(limpio, errors="coerce")
+
+    @staticmethod
+    def _a_fecha(serie: pd.Series) -> pd.Series:
+        return fechas.parsear_serie(serie.astype(object).where(serie.notna(), None))
+
+    def _promedio_ok(self, vals: tuple, umbral: float) -> bool:
+        """Similitud promedio de todos los pares (en el orden de las columnas) contra el umbral."""
+        if len(vals) == 2:  # un solo par: basta decidir contra el umbral
+            return similar(vals[0], vals[1], umbral)
+        pares = [ratio(vals[i], vals[j]) for i in range(len(vals)) for j in range(i + 1, len(vals))]
+        return (sum(pares) / len(pares)) >= umbral
+
+    def _texto_ok(self, vals: pd.DataFrame, filas: pd.Series, umbral: float) -> pd.Series:
+        """Similitud promedio por pares, una vez por tupla distinta de valores."""
+        tuplas = [tuple(v for v in fila if not pd.isna(v))
+                  for fila in vals[filas].itertuples(index=False, name=None)]
+        memo: dict[tuple, bool] = {}
+        for t in tuplas:
+            if t not in memo:
+                memo[t] = self._promedio_ok(t, umbral)
+        return pd.Series([memo[t] for t in tuplas], index=vals.index[filas], dtype=bool)
+
+    def _tipado_ok(self, tipados: pd.DataFrame, presentes: pd.DataFrame, tolerancia: float) -> pd.Series:
+        """
+        OK si todos los valores presentes se pudieron convertir al tipo del bloque
+        y max - min <= tolerancia.
+        """
+        decidible = (tipados.notna() | ~presentes).all(axis=1)
+        rango = tipados.max(axis=1) - tipados.min(axis=1)
+        if pd.api.types.is_timedelta64_dtype(rango):
+            rango = rango.dt.days
+        return decidible & (rango.fillna(0) <= tolerancia)
+
+    # -------------------- Bloques --------------------
+    def _evaluar_bloque(self, df: pd.DataFrame, bloque: dict) -> pd.Series:
+        """
+        Estado del bloque para todas las filas a la vez:
+          - ninguna columna del bloque existe -> N/A
+          - sin datos en ninguna columna -> SIN DATOS
+          - todos los valores presentes iguales (incluye un solo valor) -> OK
+          - el resto según el tipo: numero / fecha (igualdad tipada con tolerancia;
+            si algún valor no convierte se exige texto idéntico) o texto (similitud).
+        """
+        cols = [c for c in bloque["columnas"] if c in df.columns]
+        if not cols:
+            return pd.Series(NO_APLICA, index=df.index, dtype=object)
+        tipo = bloque.get("tipo", "texto")
+
+        vals = pd.DataFrame({c: df[c].astype("string").str.strip().str.upper() for c in cols}, index=df.index)
+        vals = vals.mask((vals == "").fillna(False))
+        presentes = vals.notna()
+        con_datos = presentes.any(axis=1)
+        primero = vals.bfill(axis=1).iloc[:, 0]
+        iguales = (vals.eq(primero, axis=0).fillna(False) | ~presentes).all(axis=1)
+
+        ok = con_datos & iguales
+        pendientes = con_datos & ~iguales
+        if pendientes.any():
+            sub = vals[pendientes]
+            if tipo in ("numero", "fecha"):
+                conv = self._a_numero if tipo == "numero" else self._a_fecha
+                tipados = pd.DataFrame({c: conv(sub[c]) for c in cols}, index=sub.index)
+                ok[pendientes] = self._tipado_ok(tipados, presentes[pendientes], float(bloque.get("tolerancia", 0)))
+            else:
+                umbral = float(bloque.get("tolerancia", self.umbral))
+                ok[pendientes] = self._texto_ok(vals, pendientes, umbral)
+
+        estados = pd.Series(CON_ERRORES, index=df.index, dtype=object)
+        estados[ok] = OK
+        estados[~con_datos] = SIN_DATOS
+        return estados
 
     def normalizar(self) -> bool:
         archivo = self._ultimo_reestructurado()
         if not archivo: return False
         self.logger.info(f"Normalizando: {archivo.name}")
 
-        df = pd.read_excel(archivo, dtype=str)
-
-        # Bloques de ejemplo (ajústalos si cambiaste nombres de columnas)
-        bloques = [
-            ["desprendible_nomina_pagaduria", "amortizacion_pagaduria", "libranza_pagaduria"],
-            ["formato_conocimiento_plazo_meses", "amortizacion_plazo_meses", "libranza_plazo"],
-            ["libranza_valor_cuota", "amortizacion_valor_cuota"],
-            ["libranza_valor_prestamo", "amortizacion_valor_credito", "formato_conocimiento_valor_total_credito"],
-            ["solicitud_credito_solicitud", "amortizacion_numero_solicitud"],
-        ]
-
-        estados = []
-        for _, row in df.iterrows():
-            ok_all = True
-            for cols in bloques:
-                present = [c for c in cols if c in df.columns]
-                if present and (not self._bloque_ok(row, present)):
-                    ok_all = False
-                    break
-            estados.append("OK" if ok_all else "CON ERRORES")
-
-        df_out = df.copy()
-        df_out["Estado Normalizado"] = estados
+        df = esquema.tipar_lectura(pd.read_excel(archivo, dtype=str), "reestructurado")
+        df_out = self.normalizar_df(df)
 
         self.carpeta_salida.mkdir(parents=True, exist_ok=True)
         out = self.carpeta_salida / archivo.name.replace("_reestructurado.xlsx", "_resultado_normalizado.xlsx")
         df_out.to_excel(out, index=False, engine="openpyxl")
         self.logger.info(f"Resultado Normalizado -> {out}")
         return True
+
+    def normalizar_df(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Agrega las columnas de estado a un reestructurado en memoria (leído como texto)."""
+        estados_bloques = {}
+        ok_all = pd.Series(True, index=df.index)
+        for bloque in self.bloques:
+            estados = self._evaluar_bloque(df, bloque)
+            estados_bloques[f"Estado {bloque['nombre']}"] = estados
+            ok_all &= estados.isin([OK, NO_APLICA])
+            errores = int((estados == CON_ERRORES).sum())
+            if errores:
+                self.logger.info(f"Bloque {bloque['nombre']}: {errores} fila(s) con errores.")
+        estados_bloques["Estado Normalizado"] = ok_all.map({True: OK, False: CON_ERRORES})
+        # Sin copiar el reestructurado: se arma la salida agregando las columnas de estado
+        return df.assign(**estados_bloques)
@@ -0,0 +1,176 @@
+# services/orquestador.py
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Callable, Iterable
+import threading
+import logging
+from utils.config_ejecucion import ConfigEjecucion
+
+# Artefactos que se pasan las etapas (cada etapa toma el último archivo de su entrada)
+JSONS = "jsons"
+CLON = "clon"
+REESTRUCTURADO = "reestructurado"
+EVIDENCIA = "evidencia"
+NORMALIZADO = "normalizado"
+UNIFICADO = "unificado"
+
+# Archivo que deja cada artefacto en la carpeta de la corrida (para reanudar)
+PATRONES = {
+    CLON: "clon_json_????-??-??_??-??-??.xlsx",
+    REESTRUCTURADO: "*_reestructurado.xlsx",
+    EVIDENCIA: "*_evidencia_avista_unica.xlsx",
+    NORMALIZADO: "*_resultado_normalizado.xlsx",
+    UNIFICADO: "Davinci_Resultado_*.xlsx",
+}
+
+# Estados de una etapa
+PENDIENTE = "PENDIENTE"
+EJECUTANDO = "EJECUTANDO"
+OK = "OK"
+ERROR = "ERROR"
+OMITIDA = "OMITIDA"
+CANCELADA = "CANCELADA"
+
+
+class Etapa:
+    """
+    Paso del pipeline: `funcion()` devuelve algo truthy si terminó bien.
+
+    `entradas` / `salidas` son nombres de artefacto; una etapa depende de las que
+    producen sus entradas (las entradas que nadie produce se asumen ya disponibles).
+    Si una etapa `critica` falla, las que dependen de ella se omiten; si no es
+    crítica, sus dependientes corren igual (p. ej. el consolidador tolera que falte
+    la evidencia Avista).
+    """
+    def __init__(self, nombre: str, funcion: Callable[[], object],
+                 entradas: Iterable[str] = (), salidas: Iterable[str] = (), critica: bool = True):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.entradas = tuple(entradas)
+        self.salidas = tuple(salidas)
+        self.critica = critica
+
+
+class Orquestador:
+    """
+    Ejecuta un DAG de etapas: cada etapa arranca en cuanto terminan las que producen
+    sus entradas, y las independientes (comparación Avista y normalización, que sólo
+    leen el reestructurado) corren en paralelo en un pool de hilos.
+
+    `al_cambiar(nombre, estado)` se llama en cada transición (para la GUI) y
+    `cancelar` (threading.Event) impide que arranquen etapas nuevas.
+
+    `reanudar_en`: carpeta de una corrida interrumpida; las etapas cuyas salidas ya
+    están ahí se dan por completadas (las demás reanudan desde sus checkpoints).
+    """
+    def __init__(
+        self,
+        etapas: list[Etapa],
+        max_hilos: int | None = None,
+        al_cambiar: Callable[[str, str], None] | None = None,
+        cancelar: threading.Event | None = None,
+        cfg: ConfigEjecucion | None = None,
+        reanudar_en: str | Path | None = None,
+    ):
+        self.etapas = {e.nombre: e for e in etapas}
+        if len(self.etapas) != len(etapas):
+            raise ValueError("Hay etapas con nombre repetido.")
+        paralelo = (cfg or ConfigEjecucion()).etapas_en_paralelo
+        self.max_hilos = max(1, int(max_hilos or (len(etapas) if paralelo else 1)))
+        self.al_cambiar = al_cambiar
+        self.cancelar = cancelar
+        self.reanudar_en = Path(reanudar_en) if reanudar_en is not None else None
+        self.logger = logging.getLogger("Orquestador")
+
+        productores = {}
+        for e in etapas:
+            for salida in e.salidas:
+                if salida in productores:
+                    raise ValueError(f"'{salida}' lo producen '{productores[salida]}' y '{e.nombre}'.")
+                productores[salida] = e.nombre
+        self.dependencias = {
+            e.nombre: sorted({productores[x] for x in e.entradas if x in productores} - {e.nombre})
+            for e in etapas
+        }
+        self.orden = self._orden_topologico([e.nombre for e in etapas])
+
+    def _orden_topologico(self, nombres: list[str]) -> list[str]:
+        """Orden de declaración respetando dependencias (ValueError si hay ciclos)."""
+        orden, hechos = [], set()
+        pendientes = list(nombres)
+        while pendientes:
+            listos = [n for n in pendientes if all(d in hechos for d in self.dependencias[n])]
+            if not listos:
+                raise ValueError(f"Dependencias circulares entre: {', '.join(pendientes)}")
+            for n in listos:
+                orden.append(n)
+                hechos.add(n)
+                pendientes.remove(n)
+        return orden
+
+    # -------------------- Ejecución --------------------
+    def _marcar(self, estados: dict, nombre: str, estado: str) -> None:
+        estados[nombre] = estado
+        if self.al_cambiar is not None:
+            try:
+                self.al_cambiar(nombre, estado)
+            except Exception:
+                self.logger.exception(f"Error notificando el estado de '{nombre}'.")
+
+    def _ya_hecha(self, etapa: Etapa) -> bool:
+        """Al reanudar: todas las salidas de la etapa ya están en la carpeta de la corrida."""
+        if self.reanudar_en is None or not etapa.salidas:
+            return False
+        if not all(s in PATRONES for s in etapa.salidas):
+            return False
+        return all(any(self.reanudar_en.glob(PATRONES[s])) for s in etapa.salidas)
+
+    def _correr(self, etapa: Etapa) -> bool:
+        try:
+            return bool(etapa.funcion())
+        except Exception:
+            self.logger.exception(f"Error en la etapa '{etapa.nombre}'.")
+            return False
+
+    def _satisfecha(self, estados: dict, dep: str) -> bool | None:
+        """True si la dependencia permite continuar, False si bloquea, None si aún no terminó."""
+        estado = estados[dep]
+        if estado in (PENDIENTE, EJECUTANDO):
+            return None
+        return estado == OK or (estado == ERROR and not self.etapas[dep].critica)
+
+    def ejecutar(self) -> dict[str, str]:
+        """Estado final de cada etapa (OK / ERROR / OMITIDA / CANCELADA), en orden topológico."""
+        estados = {n: PENDIENTE for n in self.orden}
+        en_curso = {}
+        with ThreadPoolExecutor(max_workers=self.max_hilos, thread_name_prefix="etapa") as pool:
+            while True:
+                for nombre in self.orden:
+                    if estados[nombre] != PENDIENTE:
+                        continue
+                    deps = [self._satisfecha(estados, d) for d in self.dependencias[nombre]]
+                    cancelado = self.cancelar is not None and self.cancelar.is_set()
+                    if False in deps:
+                        if not cancelado:
+                            self.logger.warning(f"Etapa '{nombre}' omitida: falló una etapa previa.")
+                        self._marcar(estados, nombre, CANCELADA if cancelado else OMITIDA)
+                    elif None not in deps:
+                        if cancelado:
+                            self._marcar(estados, nombre, CANCELADA)
+                            continue
+                        if self._ya_hecha(self.etapas[nombre]):
+                            self.logger.info(f"Etapa '{nombre}' ya completada en la corrida: se omite.")
+                            self._marcar(estados, nombre, OK)
+                            continue
+                        self.logger.info(f"▶ {nombre}…")
+                        self._marcar(estados, nombre, EJECUTANDO)
+                        en_curso[pool.submit(self._correr, self.etapas[nombre])] = nombre
+
+                if not en_curso:
+                    break
+                terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for fut in terminados:
+                    nombre = en_curso.pop(fut)
+                    self._marcar(estados, nombre, OK if fut.result() else ERROR)
+        return estados
@@ -0,0 +1,142 @@
+# services/pipeline_bloques.py
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime
+import logging
+from utils import esquema
+from utils.cache_evidencia import CacheEvidencia
+from utils.config_ejecucion import ConfigEjecucion
+from utils.excel_io import EscritorExcelIncremental, como_texto
+from utils.normalizacion import norm_num_serie
+from services.clonador_excel import ClonadorExcel
+from services.reestructurador_excel import ReestructuradorExcel
+from services.comparador_avista import ComparadorAvista
+from services.normalizador_excel import NormalizadorExcel
+
+
+class PipelineBloques:
+    """
+    Modo por bloques: los créditos pasan por clonación -> reestructurado -> comparación
+    Avista -> normalización de a `tamano_bloque`, y cada bloque se agrega a los mismos
+    artefactos que produce el flujo normal:
+
+        clon_json_<ts>.xlsx, clon_json_<ts>_reestructurado.xlsx,
+        clon_json_<ts>_evidencia_avista_unica.xlsx, clon_json_<ts>_resultado_normalizado.xlsx
+
+    La memoria pico depende del tamaño del bloque, no del lote: lo único residente es la
+    base Avista, con todas sus columnas si AVISTA_SALIDA_COMPLETA (la evidencia es la
+    misma que en el flujo normal) o sólo las de las reglas si no. La comparación siempre
+    queda acotada al lote, y si los JSON de una misma operación caen en bloques distintos
+    su evidencia es la del primer bloque.
+
+    `comparador`, `avista` (lo que devuelve `cargar_avista`) y `cache` permiten reutilizar
+    entre lotes el plan de reglas, la base Avista ya cargada y la caché de evidencia.
+    """
+    def __init__(
+        self,
+        carpeta_json_local: str,
+        carpeta_bases_avista: str | Path,
+        carpeta_salida: str | Path,
+        modo_ingesta: int | None = None,
+        tamano_bloque: int | None = None,
+        cfg: ConfigEjecucion | None = None,
+        archivos: list[str] | None = None,
+        comparador: ComparadorAvista | None = None,
+        avista: tuple | None = None,
+        cache: CacheEvidencia | None = None,
+    ):
+        self._cfg = cfg   # tal cual llegó: sin corrida explícita cada servicio usa sus valores por defecto
+        self.cfg = cfg or ConfigEjecucion()
+        self.carpeta_json_local = carpeta_json_local
+        self.carpeta_bases_avista = Path(carpeta_bases_avista)
+        self.carpeta_salida = Path(carpeta_salida)
+        self.modo_ingesta = modo_ingesta
+        self.archivos = archivos
+        self.comparador, self.avista, self.cache = comparador, avista, cache
+        self.sin_datos = False   # True si ningún JSON dio una fila (distinto de un fallo)
+        self.filas: dict[str, int] = {}   # filas escritas por artefacto
+        self.tamano_bloque = max(1, int(tamano_bloque or self.cfg.tamano_bloque))
+        self.logger = logging.getLogger("PipelineBloques")
+
+    def ejecutar(self) -> bool:
+        cfg = self._cfg
+        clon = ClonadorExcel(self.carpeta_json_local, str(self.carpeta_salida), self.modo_ingesta, cfg=cfg,
+                             archivos=self.archivos)
+        reestr = ReestructuradorExcel(str(self.carpeta_salida), str(self.carpeta_salida), cfg=cfg)
+        comp = self.comparador or ComparadorAvista(str(self.carpeta_salida), self.carpeta_bases_avista,
+                                                   self.carpeta_salida, solo_lote=True, cfg=cfg)
+        norm = NormalizadorExcel(str(self.carpeta_salida), str(self.carpeta_salida),
+                                 umbral_similitud=float(self.cfg.tolerancia_texto))
+
+        avista = self.avista or comp.cargar_avista()
+        if avista is None:
+            return False
+        df_avista, col_oper, op_norm = avista
+        cache = self.cache if self.cache is not None else comp.abrir_cache()
+        resolutor = reestr.nuevo_resolutor()
+
+        base = f"clon_json_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+        escritores = {
+            "clon": EscritorExcelIncremental(self.carpeta_salida / f"{base}.xlsx"),
+            "reestructurado": EscritorExcelIncremental(self.carpeta_salida / f"{base}_reestructurado.xlsx"),
+            "evidencia": EscritorExcelIncremental(self.carpeta_salida / f"{base}_evidencia_avista_unica.xlsx"),
+            "normalizado": EscritorExcelIncremental(self.carpeta_salida / f"{base}_resultado_normalizado.xlsx"),
+        }
+
+        self.logger.info(f"Modo por bloques: {self.tamano_bloque} crédito(s) por bloque.")
+        try:
+            n_bloques = self._procesar_bloques(clon, reestr, comp, norm, escritores,
+                                               df_avista, col_oper, op_norm, cache, resolutor)
+        except Exception:
+            n_bloques = None
+            self.logger.exception("Error procesando bloques.")
+        if not n_bloques:
+            for escritor in escritores.values():
+                escritor.descartar()
+            if n_bloques == 0:
+                self.sin_datos = True
+                self.logger.error("No se pudo extraer información de los JSON.")
+            return False
+
+        if cache is not None:
+            cache.persistir()
+        if resolutor is not None:
+            reestr.reportar_pagadurias(resolutor)
+        for etapa, escritor in escritores.items():
+            ruta = escritor.cerrar()
+            self.filas[etapa] = escritor.filas
+            self.logger.info(f"{etapa.capitalize()} ({escritor.filas} filas) -> {ruta}")
+        return True
+
+    def _procesar_bloques(self, clon, reestr, comp, norm, escritores, df_avista, col_oper, op_norm,
+                          cache, resolutor) -> int | None:
+        """Número de bloques procesados (None si una etapa falló)."""
+        n_bloques = 0
+        # Operaciones Avista ya escritas en la evidencia: si los JSON de una misma operación
+        # caen en bloques distintos, vale la del primero (como la primera fila en el flujo normal)
+        escritas: set[str] = set()
+        for df_clon in clon.iter_bloques(self.tamano_bloque):
+            n_bloques += 1
+            self.logger.info(f"Bloque {n_bloques}: {len(df_clon)} crédito(s).")
+            escritores["clon"].agregar(df_clon)
+
+            # Cada etapa recibe el bloque como lo leería del Excel de la anterior (texto)
+            df_re = reestr.reestructurar_df(esquema.tipar_lectura(como_texto(df_clon), "clon"), resolutor)
+            del df_clon
+            if df_re is None:
+                return None
+            escritores["reestructurado"].agregar(df_re)
+            df_re = esquema.tipar_lectura(como_texto(df_re), "reestructurado")
+
+            cols_comp = [c for c in df_re.columns if c in comp.cols_re]
+            pendientes = ~norm_num_serie(df_re["Numero credito"]).isin(escritas)
+            hoja = comp.evaluar_lote(df_re.loc[pendientes, cols_comp].copy(), df_avista, col_oper,
+                                     op_norm=op_norm, cache=cache)
+            if hoja is None:
+                return None
+            ops = op_norm.loc[hoja.index]
+            hoja = hoja.loc[~ops.isin(escritas)]   # p. ej. cruzadas por cédula en un bloque anterior
+            escritas.update(o for o in ops if o)
+            escritores["evidencia"].agregar(hoja)
+            escritores["normalizado"].agregar(norm.normalizar_df(df_re))
+        return n_bloques
@@ -2,38 +2,12 @@
 import pandas as pd
 from pathlib import Path
 import logging
-import re
-import unicodedata
-
-def convertir_a_entero_sin_notacion(valor):
-    try:
-        if isinstance(valor, float) and valor.is_integer():
-            return str(int(valor))
-        if isinstance(valor, (int, str)) and str(valor).isdigit():
-            return str(valor)
-    except:
-        pass
-    return str(valor) if valor is not None else ""
-
-# ----------------- helpers de normalización de texto -----------------
-def _strip_accents(s: str) -> str:
-    return "".join(
-        c for c in unicodedata.normalize("NFD", str(s))
-        if unicodedata.category(c) != "Mn"
-    )
-
-def _norm_key(s: str) -> str:
-    """Clave normalizada para mapas: sin tildes, MAYÚSCULAS, espacios simples."""
-    if s is None:
-        return ""
-    up = _strip_accents(str(s)).strip().upper()
-    up = re.sub(r"\s+", " ", up)
-    return up
-
-def _norm_text(s):
-    if s is None:
-        return ""
-    return " ".join(_strip_accents(str(s)).upper().strip().split())
+from datetime import datetime
+from utils.normalizacion import norm_key as _norm_key, norm_key_serie
+from utils.fechas import texto_fecha_serie
+from utils import esquema
+from utils.pagadurias import ResolutorPagadurias
+from utils.config_ejecucion import ConfigEjecucion
 
 # ----------------- mapeos de pagadurías -----------------
 # Unificamos todos los alias conocidos (LIBRANZA, DESPRENDIBLE, AMORTIZACIÓN)
@@ -74,17 +48,22 @@ _RAW_MAP_PAGADURIAS = {
 # Preconstruimos el mapa con claves normalizadas
 MAP_PAGADURIAS = { _norm_key(k): v for k, v in _RAW_MAP_PAGADURIAS.items() }
 
-def _aplicar_mapeo_pagaduria(serie: pd.Series) -> pd.Series:
-    """Reemplaza valores de pagaduría usando el mapa (tolerante a acentos/espacios)."""
-    def _reemplazo(x):
-        key = _norm_key(x)
-        return MAP_PAGADURIAS.get(key, x)
-    return serie.apply(_reemplazo)
+def _aplicar_mapeo_pagaduria(serie: pd.Series, resolutor: ResolutorPagadurias | None = None) -> pd.Series:
+    """
+    Reemplaza valores de pagaduría usando el mapa (tolerante a acentos/espacios).
+    Con `resolutor`, los valores sin alias exacto se resuelven por aproximación.
+    """
+    if resolutor is not None:
+        return resolutor.mapear(serie)
+    mapeados = norm_key_serie(serie).map(MAP_PAGADURIAS)
+    return mapeados.where(mapeados.notna(), serie)
 
 # ---------------------------------------------------------------------
 
 class ReestructuradorExcel:
-    def __init__(self, carpeta_excel_origen: str, carpeta_excel_destino: str):
+    def __init__(self, carpeta_excel_origen: str, carpeta_excel_destino: str,
+                 cfg: ConfigEjecucion | None = None):
+        self.cfg = cfg or ConfigEjecucion()
         self.carpeta_excel_origen = Path(carpeta_excel_origen)
         self.carpeta_excel_destino = Path(carpeta_excel_destino)
         self.logger = logging.getLogger("ReestructuradorExcel")
@@ -97,27 +76,25 @@ class ReestructuradorExcel:
         return max(archivos, key=lambda f: f.stat().st_mtime)
 
     def _upper_text_columns(self, df: pd.DataFrame, exclude=None) -> pd.DataFrame:
+        """MAYÚSCULAS en las columnas de texto (object o str); vacíos -> ''. Modifica `df` sin copiarlo."""
         exclude = set(exclude or [])
-        out = df.copy()
-        for col in out.columns:
-            if col in exclude:
+        for col in df.columns:
+            if col in exclude or not pd.api.types.is_string_dtype(df[col].dtype):
                 continue
-            if out[col].dtype == "object":
-                out[col] = out[col].fillna("").apply(lambda x: x.upper() if isinstance(x, str) else x)
-        return out
+            serie = df[col].fillna("")
+            tipo = pd.api.types.infer_dtype(serie, skipna=True)
+            if tipo in ("string", "empty"):
+                df[col] = serie.str.upper()
+            elif tipo in ("mixed", "mixed-integer"):
+                # Sólo los textos; números/fechas sueltos quedan como vienen
+                up = serie.str.upper()
+                df[col] = up.where(up.notna(), serie)
+        return df
 
     def _normalizar_fechas_texto(self, df: pd.DataFrame) -> pd.DataFrame:
-        meses = {'ENE':'01','FEB':'02','MAR':'03','ABR':'04','MAY':'05','JUN':'06',
-                 'JUL':'07','AGO':'08','SEP':'09','OCT':'10','NOV':'11','DIC':'12'}
-        def _norm(x):
-            if not isinstance(x, str): return x
-            up = x.upper().replace("-", "/")
-            for k,v in meses.items():
-                up = up.replace(f"/{k}/", f"/{v}/")
-            return up
         for col in ["cedula_fecha_nacimiento","desprendible_nomina_vigencia"]:
             if col in df.columns:
-                df[col] = df[col].apply(_norm)
+                df[col] = texto_fecha_serie(df[col])
         return df
 
     def _crear_nombres_completos(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -125,7 +102,6 @@ class ReestructuradorExcel:
         Crea columnas 'X Nombre Completo' y 'X Firma Electrónica Nombre Completo' a partir
         de *_nombre_completo y *_nombre_firma_electronica. Elimina las columnas fuente.
         """
-        df = df.copy()
         mapeo = {
             "Cedula Nombre Completo": ["cedula_nombre_completo"],
             "Libranza Nombre Completo": ["libranza_nombre_completo"],
@@ -162,18 +138,58 @@ class ReestructuradorExcel:
 
         return df
 
+    def reportar_pagadurias(self, resolutor: ResolutorPagadurias):
+        """Guarda las pagadurías sin alias exacto (resueltas por aproximación o no) para curaduría."""
+        reporte = resolutor.reporte()
+        if reporte.empty:
+            return
+        pendientes = int((reporte["ESTADO"] != "RESUELTO (DIFUSO)").sum())
+        self.logger.warning(
+            f"Pagadurías sin alias exacto: {len(reporte)} ({len(reporte) - pendientes} resueltas por aproximación, "
+            f"{pendientes} sin resolver)."
+        )
+        self.carpeta_excel_destino.mkdir(parents=True, exist_ok=True)
+        ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        ruta = self.carpeta_excel_destino / f"pagadurias_por_curar_{ts}.xlsx"
+        reporte.to_excel(ruta, index=False, engine="openpyxl")
+        self.logger.info(f"Reporte de pagadurías por curar -> {ruta}")
+
+    def nuevo_resolutor(self) -> ResolutorPagadurias | None:
+        if not self.cfg.pagaduria_resolucion_difusa:
+            return None
+        return ResolutorPagadurias(MAP_PAGADURIAS, self.cfg.pagaduria_umbral_confianza)
+
     def reestructurar(self):
         archivo = self._obtener_ultimo_excel()
         if not archivo:
             return False
 
         self.logger.info(f"Reestructurando archivo: {archivo.name}")
-        df = pd.read_excel(archivo, dtype=str)
+        df = esquema.tipar_lectura(pd.read_excel(archivo, dtype=str), "clon")
 
-        if 'nombre_archivo_origen' not in df.columns:
-            self.logger.error("La columna 'nombre_archivo_origen' no existe en el Excel.")
+        resolutor = self.nuevo_resolutor()
+        df = self.reestructurar_df(df, resolutor)
+        if df is None:
             return False
+        if resolutor is not None:
+            self.reportar_pagadurias(resolutor)
 
+        # 8) Guardar
+        self.carpeta_excel_destino.mkdir(parents=True, exist_ok=True)
+        nuevo_nombre = archivo.name.replace(".xlsx", "_reestructurado.xlsx")
+        ruta_nueva = self.carpeta_excel_destino / nuevo_nombre
+        df.to_excel(ruta_nueva, index=False, engine='openpyxl')
+        self.logger.info(f"Archivo reestructurado guardado en: {ruta_nueva}")
+        return True
+
+    def reestructurar_df(self, df: pd.DataFrame, resolutor: ResolutorPagadurias | None = None) -> pd.DataFrame | None:
+        """
+        Pasos 1-7 sobre un clon ya en memoria (como texto, igual que se lee del Excel).
+        `resolutor` acumula las pagadurías sin alias exacto (se comparte entre bloques).
+        """
+        if 'nombre_archivo_origen' not in df.columns:
+            self.logger.error("La columna 'nombre_archivo_origen' no existe en el Excel.")
+            return None
         # 1) Asegurar NN / Numero credito / Cedula
         necesarias = {"NN", "Numero credito", "Cedula"}
         if not necesarias.issubset(df.columns):
@@ -185,6 +201,10 @@ class ReestructuradorExcel:
                     df.insert(0, "NN", base[0])
                     df.insert(1, "Numero credito", base[2])
                     df.insert(2, "Cedula", base[3])
+            # Ninguna fila trajo la tripleta (p. ej. un bloque o un crédito suelto): vacías
+            for pos, c in enumerate(["NN", "Numero credito", "Cedula"]):
+                if c not in df.columns:
+                    df.insert(pos, c, None)
         else:
             for c in ["NN", "Numero credito", "Cedula"]:
                 df[c] = df[c].astype(str)
@@ -198,25 +218,15 @@ class ReestructuradorExcel:
         # 3.5) Estandarizar pagadurías (LIBRANZA, DESPRENDIBLE, AMORTIZACIÓN)
         for col_pagaduria in ("libranza_pagaduria", "desprendible_nomina_pagaduria", "amortizacion_pagaduria"):
             if col_pagaduria in df.columns:
-                df[col_pagaduria] = _aplicar_mapeo_pagaduria(df[col_pagaduria])
+                df[col_pagaduria] = _aplicar_mapeo_pagaduria(df[col_pagaduria], resolutor)
 
         # 4) Crear columnas 'Nombre Completo' (y firmantes) y eliminar las de origen
         df = self._crear_nombres_completos(df)
 
-        # 5) Preservar llaves como texto legible
-        for col in ["NN","Numero credito","Cedula"]:
-            if col in df.columns:
-                df[col] = df[col].apply(convertir_a_entero_sin_notacion)
-
-        # 6) Tipar números donde aplique (sin tocar fechas ni llaves)
-        columnas_excluir = {"cedula_fecha_nacimiento","desprendible_nomina_vigencia","NN","Numero credito","Cedula"}
-        for col in df.columns:
-            if col in columnas_excluir:
-                continue
-            try:
-                df[col] = pd.to_numeric(df[col])
-            except:
-                pass
+        # 5-6) Tipos de salida según el esquema: llaves como texto legible, números
+        #      declarados como número, fechas/textos intactos. Las columnas no declaradas
+        #      se convierten a número sólo si TODOS sus valores no vacíos lo son.
+        df = esquema.tipar_escritura(df, "reestructurado", inferir=True)
 
         # 7) Reordenar
         columnas = list(df.columns)
@@ -226,12 +236,4 @@ class ReestructuradorExcel:
         for c in columnas:
             if c not in nuevas:
                 nuevas.append(c)
-        df = df[nuevas]
-
-        # 8) Guardar
-        self.carpeta_excel_destino.mkdir(parents=True, exist_ok=True)
-        nuevo_nombre = archivo.name.replace(".xlsx", "_reestructurado.xlsx")
-        ruta_nueva = self.carpeta_excel_destino / nuevo_nombre
-        df.to_excel(ruta_nueva, index=False, engine='openpyxl')
-        self.logger.info(f"Archivo reestructurado guardado en: {ruta_nueva}")
-        return True
+        return df[nuevas]
@@ -0,0 +1,158 @@
+# services/revalidacion_dirigida.py
+"""
+Re-validación dirigida: vuelve a pasar por el pipeline sólo una lista de operaciones
+(p. ej. tras corregir sus JSON o su fila en Avista) y parcha los resultados de la
+última corrida, sin recalcular el resto.
+
+  - De la fuente de JSON (local o SFTP) sólo se parsean los archivos cuyo contenido
+    menciona alguna de las operaciones, y se conservan los que, por la tripleta del
+    nombre de archivo, son de una de ellas (Numero credito).
+  - De la base Avista sólo se cargan las filas de esas operaciones.
+  - En el clon, el reestructurado, la evidencia y el normalizado de la corrida se
+    reemplazan las filas de esas operaciones (el resto se copia tal cual) y se vuelve
+    a consolidar el Davinci_Resultado.
+
+Las operaciones sin JSON no se tocan (quedan como estaban) y se informan.
+
+    python -m services.revalidacion_dirigida --operaciones 772025300001,772025300002
+    python -m services.revalidacion_dirigida --archivo operaciones.txt --corrida 2025-10-01_08-00-00_ab12cd
+"""
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import logging
+import re
+import time
+from utils import esquema
+from utils.config_ejecucion import ConfigEjecucion
+from utils.excel_io import como_texto, reemplazar_filas
+from utils.normalizacion import norm_num_like
+from services.clonador_excel import ClonadorExcel
+from services.reestructurador_excel import ReestructuradorExcel
+from services.comparador_avista import ComparadorAvista
+from services.normalizador_excel import NormalizadorExcel
+from services.consolidador_final import ConsolidadorFinal
+from services.orquestador import PATRONES, REESTRUCTURADO
+
+
+def leer_operaciones(texto: str) -> set[str]:
+    """Operaciones normalizadas de un texto separado por comas, espacios o saltos de línea."""
+    return {o for o in (norm_num_like(t) for t in re.split(r"[\s,;]+", texto or "")) if o}
+
+
+class RevalidacionDirigida:
+    def __init__(self, cfg: ConfigEjecucion | None = None, operaciones=(), corrida: str | None = None):
+        self.cfg = cfg or ConfigEjecucion()
+        self.operaciones = {o for o in (norm_num_like(x) for x in operaciones) if o}
+        self.corrida = corrida
+        self.logger = logging.getLogger("RevalidacionDirigida")
+
+    # -------------------- Corrida a parchar --------------------
+    def carpeta_corrida(self) -> Path | None:
+        """La corrida indicada o, si no, la última con reestructurado."""
+        if not self.cfg.aislar:
+            return self.cfg.carpeta_resultados
+        corrida = self.corrida or self.cfg.ultima_corrida(PATRONES[REESTRUCTURADO])
+        return self.cfg.carpeta_resultados / "corridas" / corrida if corrida else None
+
+    # -------------------- Ingesta acotada --------------------
+    def _filas_json(self, clon: ClonadorExcel) -> list[dict]:
+        """Filas del clon de los JSON de las operaciones (sólo se parsean los que las mencionan)."""
+        patron = re.compile(b"|".join(re.escape(o.encode("ascii")) for o in sorted(self.operaciones)))
+        filas = []
+        for nombre, raw in clon._iterador():
+            if raw is None or not patron.search(raw):
+                continue
+            fila = clon._procesar_json_anidado(nombre, raw)
+            if fila and norm_num_like(fila.get("Numero credito")) in self.operaciones:
+                self.logger.info(f"JSON de la operación {fila['Numero credito']}: {nombre}")
+                filas.append(fila)
+        return filas
+
+    # -------------------- Ejecución --------------------
+    def ejecutar(self) -> dict | None:
+        """Re-valida y parcha la corrida; devuelve un resumen (None si no se pudo)."""
+        inicio = time.perf_counter()
+        if not self.operaciones:
+            self.logger.error("No se indicó ninguna operación.")
+            return None
+        carpeta = self.carpeta_corrida()
+        rutas_re = sorted(carpeta.glob(PATRONES[REESTRUCTURADO]), key=lambda p: p.stat().st_mtime) if carpeta else []
+        if not rutas_re:
+            self.logger.error(f"No hay una corrida con resultados en {self.cfg.carpeta_resultados} para parchar.")
+            return None
+        base = rutas_re[-1].name[:-len("_reestructurado.xlsx")]
+        self.logger.info(f"Re-validando {len(self.operaciones)} operación(es) sobre {carpeta / base}")
+
+        clon = ClonadorExcel(self.cfg.ruta_jsons, str(carpeta), self.cfg.modo_ingesta, cfg=self.cfg)
+        reestr = ReestructuradorExcel(str(carpeta), str(carpeta), cfg=self.cfg)
+        comp = ComparadorAvista(str(carpeta), self.cfg.carpeta_bases_avista, carpeta, cfg=self.cfg)
+        norm = NormalizadorExcel(str(carpeta), str(carpeta), umbral_similitud=float(self.cfg.tolerancia_texto))
+
+        filas = self._filas_json(clon)
+        encontradas = {norm_num_like(f["Numero credito"]) for f in filas}
+        resumen = {"corrida": str(carpeta), "operaciones": sorted(self.operaciones), "jsons": len(filas),
+                   "sin_json": sorted(self.operaciones - encontradas), "sin_avista": []}
+        if resumen["sin_json"]:
+            self.logger.warning(f"Sin JSON (no se tocan): {', '.join(resumen['sin_json'])}")
+        if not filas:
+            self.logger.error("Ninguna de las operaciones tiene JSON en la fuente: no hay nada que parchar.")
+            return None
+
+        df_clon = clon.construir_df(filas)
+        df_re = reestr.reestructurar_df(esquema.tipar_lectura(como_texto(df_clon), "clon"), reestr.nuevo_resolutor())
+        if df_re is None:
+            return None
+        df_re_texto = esquema.tipar_lectura(como_texto(df_re), "reestructurado")
+
+        avista = comp.cargar_avista(operaciones=encontradas)
+        if avista is None:
+            return None
+        df_avista, col_oper, op_norm = avista
+        resumen["sin_avista"] = sorted(encontradas - set(op_norm))
+        if resumen["sin_avista"]:
+            self.logger.warning(f"Sin fila en la base Avista: {', '.join(resumen['sin_avista'])}")
+        cols_comp = [c for c in df_re_texto.columns if c in comp.cols_re]
+        hoja = comp.evaluar_lote(df_re_texto[cols_comp].copy(), df_avista, col_oper,
+                                 operaciones=encontradas, op_norm=op_norm)
+        if hoja is None:
+            return None
+
+        parches = (("", df_clon, "Numero credito"), ("_reestructurado", df_re, "Numero credito"),
+                   ("_evidencia_avista_unica", hoja, col_oper),
+                   ("_resultado_normalizado", norm.normalizar_df(df_re_texto), "Numero credito"))
+        for sufijo, df, columna in parches:
+            ruta = carpeta / f"{base}{sufijo}.xlsx"
+            if not ruta.exists():
+                self.logger.warning(f"No existe {ruta.name}: no se parcha.")
+                continue
+            conservadas, retiradas = reemplazar_filas(ruta, df, columna, encontradas, norm_num_like)
+            self.logger.info(f"{ruta.name}: {conservadas} fila(s) conservadas, {retiradas} retiradas, "
+                             f"{len(df)} re-validadas.")
+
+        salida = str(carpeta)
+        unificado = ConsolidadorFinal(salida, salida, salida, salida, salida).consolidar()
+        resumen["unificado"] = str(unificado) if unificado else None
+        self.logger.info(f"Re-validación dirigida lista en {time.perf_counter() - inicio:.1f} s -> {unificado}")
+        return resumen if unificado is not None else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-valida una lista de operaciones y parcha la última corrida.")
+    parser.add_argument("--operaciones", default="", help="Operaciones separadas por comas o espacios.")
+    parser.add_argument("--archivo", help="Archivo de texto con una operación por línea.")
+    parser.add_argument("--corrida", help="Corrida a parchar; por defecto la última.")
+    parser.add_argument("--jsons", help="Carpeta de JSON; por defecto RUTA_JSONS.")
+    parser.add_argument("--resultados", help="Carpeta de resultados; por defecto la de config.")
+    parser.add_argument("--avista", help="Carpeta de la base Avista; por defecto la de config.")
+    parser.add_argument("--sftp", action="store_true", help="Leer los JSON desde SFTP en vez de la carpeta local.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    operaciones = leer_operaciones(args.operaciones)
+    if args.archivo:
+        operaciones |= leer_operaciones(Path(args.archivo).read_text(encoding="utf-8"))
+    rutas = {k: v for k, v in {"ruta_jsons": args.jsons, "carpeta_resultados": args.resultados,
+                               "carpeta_bases_avista": args.avista}.items() if v}
+    cfg = ConfigEjecucion(modo_ingesta=2 if args.sftp else 1, **rutas)
+    raise SystemExit(0 if RevalidacionDirigida(cfg, operaciones, args.corrida).ejecutar() is not None else 1)
@@ -0,0 +1,203 @@
+# services/servicio_validacion.py
+"""
+Servicio residente para re-validar UN crédito sin correr todo el pipeline.
+
+Al arrancar carga una vez la base Avista (indexada por OPERACIÓN y CÉDULA), el plan
+de reglas y el mapa/resolutor de pagadurías. Cada solicitud pasa un JSON de Davinci
+por las mismas transformaciones del pipeline (clonación -> reestructurado ->
+comparación Avista -> normalización) en memoria, sin escribir archivos.
+
+API HTTP local (por defecto 127.0.0.1:8765):
+
+    POST /validar?nombre=<archivo.json>   cuerpo = JSON de Davinci  -> evidencia
+    POST /recargar                        vuelve a leer la base Avista más reciente
+    GET  /salud                           estado del servicio
+
+    python -m services.servicio_validacion --puerto 8765
+"""
+from __future__ import annotations
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from collections import defaultdict
+from datetime import datetime
+import argparse
+import json
+import logging
+import threading
+import time
+import pandas as pd
+import config
+from utils import esquema
+from utils.excel_io import como_texto
+from utils.normalizacion import norm_num_like, norm_num_serie
+from utils.config_ejecucion import ConfigEjecucion
+from services.clonador_excel import ClonadorExcel
+from services.reestructurador_excel import ReestructuradorExcel
+from services.comparador_avista import ComparadorAvista, COLS_CEDULA_RE, COL_LLAVE_CRUCE, COL_CONSISTENCIA
+from services.normalizador_excel import NormalizadorExcel
+
+
+def _valor_json(v):
+    return None if v is None or (not isinstance(v, str) and pd.isna(v)) else str(v)
+
+
+class ServicioValidacion:
+    """Validación en memoria de un crédito a la vez contra la base Avista residente."""
+    def __init__(self, cfg: ConfigEjecucion | None = None):
+        self.cfg = cfg or ConfigEjecucion()
+        salida = str(self.cfg.carpeta_salida)
+        self.clon = ClonadorExcel(self.cfg.ruta_jsons, salida, cfg=self.cfg)
+        self.reestr = ReestructuradorExcel(salida, salida, cfg=self.cfg)
+        # Sin caché de evidencia: cada solicitud es una sola fila
+        self.comp = ComparadorAvista(salida, self.cfg.carpeta_bases_avista, salida,
+                                     solo_lote=True, usar_cache=False, cfg=self.cfg)
+        self.norm = NormalizadorExcel(salida, salida, umbral_similitud=float(self.cfg.tolerancia_texto))
+        self.logger = logging.getLogger("ServicioValidacion")
+        self._lock = threading.Lock()
+        self.resolutor = self.reestr.nuevo_resolutor()
+        self.df_avista = None
+        self.cargado = None
+
+    # -------------------- Base Avista residente --------------------
+    def cargar(self) -> bool:
+        """Lee la base Avista más reciente e indexa OPERACIÓN / CÉDULA -> filas."""
+        avista = self.comp.cargar_avista()
+        if avista is None:
+            return False
+        df_avista, col_oper, op_norm = avista
+        idx_oper, idx_ced = defaultdict(list), defaultdict(list)
+        for etiqueta, op in op_norm.items():
+            if op:
+                idx_oper[op].append(etiqueta)
+        col_ced = self.comp._col_cedula(df_avista)
+        if col_ced:
+            for etiqueta, ced in norm_num_serie(df_avista[col_ced]).items():
+                if ced:
+                    idx_ced[ced].append(etiqueta)
+        with self._lock:
+            self.df_avista, self.col_oper, self.op_norm = df_avista, col_oper, op_norm
+            self.idx_oper, self.idx_ced = dict(idx_oper), dict(idx_ced)
+            self.cargado = datetime.now()
+        self.logger.info(f"Base Avista residente: {len(df_avista)} operaciones.")
+        return True
+
+    def _candidatas(self, df_re: pd.DataFrame) -> list:
+        """Filas Avista que pueden cruzar con el crédito (por operación o, si no hay, por cédula)."""
+        op = norm_num_like(df_re["Numero credito"].iloc[0]) if "Numero credito" in df_re.columns else ""
+        if op:
+            return self.idx_oper.get(op, [])
+        for col in COLS_CEDULA_RE:
+            if col in df_re.columns:
+                ced = norm_num_like(df_re[col].iloc[0])
+                if ced:
+                    return self.idx_ced.get(ced, [])
+        return []
+
+    # -------------------- Un crédito --------------------
+    def validar(self, nombre: str, raw: bytes) -> dict:
+        """Evidencia por documento de un JSON de Davinci (lanza ValueError si no es válido)."""
+        if self.df_avista is None and not self.cargar():
+            raise RuntimeError("No se pudo cargar la base Avista.")
+        inicio = time.perf_counter()
+        fila = self.clon._procesar_json_anidado(nombre, raw)
+        if not fila:
+            raise ValueError(f"'{nombre}' no es un JSON de Davinci válido.")
+
+        with self._lock:
+            df_clon = self.clon.construir_df([fila])
+            df_re = self.reestr.reestructurar_df(esquema.tipar_lectura(como_texto(df_clon), "clon"), self.resolutor)
+            if df_re is None:
+                raise ValueError(f"No se pudo reestructurar '{nombre}'.")
+            df_re = esquema.tipar_lectura(como_texto(df_re), "reestructurado")
+
+            candidatas = self._candidatas(df_re)
+            cols_comp = [c for c in df_re.columns if c in self.comp.cols_re]
+            hoja = self.comp.evaluar_lote(df_re[cols_comp].copy(), self.df_avista.loc[candidatas], self.col_oper,
+                                          op_norm=self.op_norm.loc[candidatas])
+            normalizado = self.norm.normalizar_df(df_re)
+
+        cols_evid = [c for c in [self.col_oper, COL_LLAVE_CRUCE, *config.DOCUMENTOS, COL_CONSISTENCIA]
+                     if hoja is not None and c in hoja.columns]
+        evidencia = [] if hoja is None else [
+            {c: _valor_json(v) for c, v in zip(cols_evid, valores)}
+            for valores in hoja[cols_evid].itertuples(index=False)
+        ]
+        estados = normalizado.filter(like="Estado").iloc[0]
+        return {
+            "json": nombre,
+            "numero_credito": _valor_json(df_re["Numero credito"].iloc[0]) if "Numero credito" in df_re.columns else None,
+            "encontrado_en_avista": bool(evidencia),
+            "evidencia": evidencia,
+            "normalizado": {c: _valor_json(v) for c, v in estados.items()},
+            "ms": round((time.perf_counter() - inicio) * 1000, 1),
+        }
+
+
+# -------------------- HTTP --------------------
+class _Manejador(BaseHTTPRequestHandler):
+    servicio: ServicioValidacion = None
+
+    def _responder(self, codigo: int, cuerpo: dict):
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/salud":
+            return self._responder(404, {"error": "Ruta no encontrada."})
+        s = self.servicio
+        self._responder(200, {
+            "estado": "ok" if s.df_avista is not None else "sin base Avista",
+            "operaciones_avista": 0 if s.df_avista is None else len(s.df_avista),
+            "cargado": s.cargado.isoformat(timespec="seconds") if s.cargado else None,
+        })
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == "/recargar":
+            ok = self.servicio.cargar()
+            return self._responder(200 if ok else 500, {"recargado": ok})
+        if url.path != "/validar":
+            return self._responder(404, {"error": "Ruta no encontrada."})
+        nombre = parse_qs(url.query).get("nombre", ["solicitud.json"])[0]
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            self._responder(200, self.servicio.validar(nombre, raw))
+        except ValueError as e:
+            self._responder(400, {"error": str(e)})
+        except Exception as e:
+            self.servicio.logger.exception(f"Error validando '{nombre}'.")
+            self._responder(500, {"error": str(e)})
+
+    def log_message(self, formato, *args):
+        self.servicio.logger.info("%s - %s" % (self.address_string(), formato % args))
+
+
+def crear_servidor(servicio: ServicioValidacion, host: str = "127.0.0.1", puerto: int = 8765) -> ThreadingHTTPServer:
+    manejador = type("Manejador", (_Manejador,), {"servicio": servicio})
+    return ThreadingHTTPServer((host, puerto), manejador)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio residente de validación de un crédito.")
+    parser.add_argument("--host", default=getattr(config, "SERVICIO_HOST", "127.0.0.1"))
+    parser.add_argument("--puerto", type=int, default=getattr(config, "SERVICIO_PUERTO", 8765))
+    parser.add_argument("--avista", help="Carpeta de la base Avista (por defecto la de config).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    cfg = ConfigEjecucion(**({"carpeta_bases_avista": args.avista} if args.avista else {}))
+    servicio = ServicioValidacion(cfg)
+    if not servicio.cargar():
+        raise SystemExit(1)
+    servidor = crear_servidor(servicio, args.host, args.puerto)
+    servicio.logger.info(f"Escuchando en http://{args.host}:{args.puerto} (Ctrl+C para salir)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
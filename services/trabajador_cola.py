@@ -0,0 +1,230 @@
+# services/trabajador_cola.py
+"""
+Modo trabajador: varios procesos (en uno o varios equipos que comparten la carpeta de
+JSON y la de resultados) se reparten RUTA_JSONS y cada uno procesa lo que reserva.
+
+    <resultados>/trabajos/<trabajo>/
+        cola/reservas, cola/hechos     reservas y marcas (ver utils/cola_archivos)
+        shards/<shard>/                salidas de cada toma (modo por bloques)
+        final/                         salidas unidas + Davinci_Resultado_<fecha>.xlsx
+
+Cada toma de COLA_ARCHIVOS_POR_TOMA archivos pasa por el pipeline por bloques
+(clonación -> reestructurado -> comparación Avista acotada al lote -> normalización)
+hacia su propio shard. Cuando ya no quedan pendientes ni reservas vivas, el último
+trabajador une los shards (sólo los que tienen marcas de hecho) y consolida.
+
+    python -m services.trabajador_cola --trabajo lote_octubre          (en cada equipo)
+    python -m services.trabajador_cola --trabajo lote_octubre --solo-fusionar
+
+La ingesta es siempre desde la carpeta local/compartida (no SFTP) y sin depuración:
+depurar la carpeta una vez antes de lanzar los trabajadores.
+"""
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime
+import argparse
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+from utils.autoajuste import autoajustar
+from utils.cola_archivos import ColaArchivos, nuevo_trabajador
+from utils.config_ejecucion import ConfigEjecucion
+from utils.excel_io import unir_excel
+from utils.normalizacion import norm_header, norm_num_like
+from services.pipeline_bloques import PipelineBloques
+from services.consolidador_final import ConsolidadorFinal
+from services.orquestador import PATRONES, CLON, REESTRUCTURADO, EVIDENCIA, NORMALIZADO
+
+# Artefacto -> sufijo en el nombre de salida (clon_json_<ts><sufijo>.xlsx)
+_SUFIJOS = {CLON: "", REESTRUCTURADO: "_reestructurado", EVIDENCIA: "_evidencia_avista_unica",
+            NORMALIZADO: "_resultado_normalizado"}
+_CERROJO_FUSION = "_fusion"
+
+
+def _col_operacion(columnas: list[str]) -> str | None:
+    """Columna OPERACIÓN de la evidencia (mismo criterio que el comparador)."""
+    return next((c for c in columnas if norm_header(c) == "OPERACION"), None) or \
+           next((c for c in columnas if "OPER" in norm_header(c)), None)
+
+
+class _Renovador:
+    """Mantiene vivas (renueva cada ttl/3) las reservas mientras dura el bloque `with`."""
+    def __init__(self, cola: ColaArchivos, nombres: list[str]):
+        self.cola, self.nombres = cola, nombres
+        self.parar = threading.Event()
+        self.hilo = threading.Thread(target=self._latir, daemon=True)
+
+    def _latir(self):
+        while not self.parar.wait(self.cola.ttl / 3):
+            self.cola.renovar(self.nombres)
+
+    def __enter__(self):
+        self.hilo.start()
+
+    def __exit__(self, *exc):
+        self.parar.set()
+        self.hilo.join()
+
+
+class TrabajadorCola:
+    """Un proceso de la cola: reserva tomas, las procesa a su shard y, si es el último, fusiona."""
+    def __init__(
+        self,
+        trabajo: str = "cola",
+        cfg: ConfigEjecucion | None = None,
+        archivos_por_toma: int | None = None,
+        trabajador: str | None = None,
+        cancelar: threading.Event | None = None,
+    ):
+        self.cfg = cfg or ConfigEjecucion()
+        self.carpeta_trabajo = self.cfg.carpeta_resultados / "trabajos" / trabajo
+        self.carpeta_shards = self.carpeta_trabajo / "shards"
+        self.carpeta_final = self.carpeta_trabajo / "final"
+        self.trabajador = trabajador or nuevo_trabajador()
+        self.archivos_por_toma = max(1, int(archivos_por_toma or self.cfg.cola_archivos_por_toma))
+        self.cancelar = cancelar
+        self.cola = ColaArchivos(self.cfg.ruta_jsons, self.carpeta_trabajo / "cola", self.trabajador,
+                                 self.cfg.cola_ttl_reserva)
+        self.logger = logging.getLogger("TrabajadorCola")
+
+    # -------------------- Tomas --------------------
+    def ejecutar(self, fusionar: bool = True) -> bool:
+        """Procesa tomas hasta vaciar la cola; False si una toma falló."""
+        self.logger.info(f"Trabajador {self.trabajador} en {self.carpeta_trabajo}")
+        tomas = 0
+        while not (self.cancelar is not None and self.cancelar.is_set()):
+            nombres = self.cola.reclamar(self.archivos_por_toma)
+            if not nombres:
+                break
+            tomas += 1
+            if not self._procesar(nombres, tomas):
+                return False
+        self.logger.info(f"Trabajador {self.trabajador}: {tomas} toma(s) procesada(s).")
+        return self.fusionar_si_termino() if fusionar else True
+
+    def _procesar(self, nombres: list[str], toma: int) -> bool:
+        shard = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{self.trabajador}_{toma:04d}"
+        temporal = self.carpeta_shards / f".{shard}"
+        self.logger.info(f"Toma {toma}: {len(nombres)} archivo(s) -> shard {shard}")
+
+        pipeline = PipelineBloques(self.cfg.ruta_jsons, self.cfg.carpeta_bases_avista, temporal,
+                                   modo_ingesta=1, cfg=self.cfg, archivos=nombres)
+        with _Renovador(self.cola, nombres):
+            ok = pipeline.ejecutar()
+
+        perdidas = self.cola.renovar(nombres)
+        if perdidas:
+            # Otro trabajador retomó parte de la toma (la creyó caída): se descarta entera
+            self.logger.warning(f"Se perdieron {len(perdidas)} reserva(s) de la toma {toma}: se descarta.")
+            shutil.rmtree(temporal, ignore_errors=True)
+            self.cola.soltar(nombres)
+            return True
+        if not ok and pipeline.sin_datos:
+            # Ningún JSON válido: quedan hechos sin shard (no hay nada que unir)
+            shutil.rmtree(temporal, ignore_errors=True)
+            self.cola.completar(nombres, "")
+            return True
+        if not ok:
+            shutil.rmtree(temporal, ignore_errors=True)
+            self.cola.soltar(nombres)
+            self.logger.error(f"Falló la toma {toma}: sus archivos quedan libres para otro intento.")
+            return False
+        # El shard sólo cuenta una vez que tiene su nombre final y las marcas apuntan a él
+        os.replace(temporal, self.carpeta_shards / shard)
+        self.cola.completar(nombres, shard)
+        return True
+
+    # -------------------- Fusión --------------------
+    def fusionar_si_termino(self) -> bool:
+        pendientes = len(self.cola.pendientes())
+        if pendientes:
+            self.logger.info(f"Quedan {pendientes} archivo(s) sin terminar: la fusión la hará otro trabajador.")
+            return True
+        if self.cola.reservas_activas():
+            self.logger.info("Otros trabajadores siguen procesando (o fusionando): la fusión la hará el último.")
+            return True
+        if not self.cola.reservar(_CERROJO_FUSION):
+            self.logger.info("Otro trabajador está fusionando.")
+            return True
+        return self._fusionar_reservado() is not None
+
+    def fusionar(self) -> Path | None:
+        """Une los shards terminados en `final/` y consolida. None si no se pudo."""
+        if not self.cola.reservar(_CERROJO_FUSION):
+            self.logger.error("Otro trabajador está fusionando.")
+            return None
+        return self._fusionar_reservado()
+
+    def _fusionar_reservado(self) -> Path | None:
+        try:
+            with _Renovador(self.cola, [_CERROJO_FUSION]):
+                return self._fusionar()
+        finally:
+            self.cola.soltar([_CERROJO_FUSION])
+
+    def _fusionar(self) -> Path | None:
+        shards = sorted({s for s in self.cola.hechos_por_shard().values() if s})
+        carpetas = [self.carpeta_shards / s for s in shards if (self.carpeta_shards / s).is_dir()]
+        if not carpetas:
+            self.logger.error("No hay shards terminados para unir.")
+            return None
+        self.logger.info(f"Uniendo {len(carpetas)} shard(s) en {self.carpeta_final}")
+
+        base = f"clon_json_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+        for artefacto, sufijo in _SUFIJOS.items():
+            rutas = [r for c in carpetas for r in sorted(c.glob(PATRONES[artefacto]))]
+            if not rutas:
+                self.logger.warning(f"Ningún shard tiene '{artefacto}'.")
+                continue
+            destino = self.carpeta_final / f"{base}{sufijo}.xlsx"
+            if artefacto == EVIDENCIA:
+                # Una operación cuyos JSON cayeron en tomas distintas (o cruzada por cédula
+                # en otra) queda una sola vez: la del primer shard, como entre bloques
+                filas = unir_excel(rutas, destino, columna_unica=_col_operacion, normalizar=norm_num_like)
+            else:
+                filas = unir_excel(rutas, destino)
+            self.logger.info(f"{artefacto.capitalize()} ({filas} filas) -> {destino}")
+
+        final = str(self.carpeta_final)
+        return ConsolidadorFinal(final, final, final, final, final).consolidar()
+
+
+def _proceso(trabajo: str, cfg: ConfigEjecucion) -> None:
+    """Un trabajador en su propio proceso (--procesos N)."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(processName)s - %(levelname)s - %(message)s")
+    raise SystemExit(0 if TrabajadorCola(trabajo, cfg).ejecutar() else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trabajador de la cola de JSON compartida.")
+    parser.add_argument("--trabajo", default="cola", help="Nombre del trabajo (el mismo en todos los trabajadores).")
+    parser.add_argument("--jsons", help="Carpeta (compartida) de JSON; por defecto RUTA_JSONS.")
+    parser.add_argument("--resultados", help="Carpeta (compartida) de resultados; por defecto la de config.")
+    parser.add_argument("--avista", help="Carpeta de la base Avista; por defecto la de config.")
+    parser.add_argument("--archivos-por-toma", type=int, default=None, help="Por defecto, autoajuste.")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Trabajadores a lanzar en este equipo; por defecto, autoajuste.")
+    parser.add_argument("--solo-fusionar", action="store_true", help="No procesa: sólo une los shards terminados.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    rutas = {k: v for k, v in {"ruta_jsons": args.jsons, "carpeta_resultados": args.resultados,
+                               "carpeta_bases_avista": args.avista}.items() if v}
+    fijos = {k: v for k, v in {"cola_archivos_por_toma": args.archivos_por_toma,
+                               "cola_procesos": args.procesos}.items() if v}
+    cfg = ConfigEjecucion(modo_ingesta=1, **rutas, **fijos)
+    if args.solo_fusionar:
+        raise SystemExit(0 if TrabajadorCola(args.trabajo, cfg).fusionar() is not None else 1)
+
+    cfg = autoajustar(cfg, fijos=fijos, parametros=["tamano_bloque", "cola_procesos", "cola_archivos_por_toma"])
+    if cfg.cola_procesos <= 1:
+        raise SystemExit(0 if TrabajadorCola(args.trabajo, cfg).ejecutar() else 1)
+    procesos = [multiprocessing.Process(target=_proceso, args=(args.trabajo, cfg), name=f"trabajador-{i + 1}")
+                for i in range(cfg.cola_procesos)]
+    for p in procesos:
+        p.start()
+    for p in procesos:
+        p.join()
+    raise SystemExit(0 if all(p.exitcode == 0 for p in procesos) else 1)
@@ -0,0 +1,150 @@
+# services/vista_previa.py
+"""
+Vista previa: el pipeline completo sobre una muestra de N créditos, para ver en
+segundos el efecto de un cambio en DOCUMENTOS_MAPEO o en una tolerancia.
+
+La muestra es determinística (misma carpeta + semilla = mismos JSON) y estratificada
+por pagaduría o por combinación de tipos de documento presentes, por turnos entre
+estratos. Sólo se leen los JSON muestreados (y los candidatos para estratificar) y,
+de la base Avista, sólo las filas de sus operaciones / cédulas.
+
+Deja en la carpeta de la corrida los mismos artefactos que una corrida normal
+(clon, reestructurado, evidencia, normalizado y Davinci_Resultado_<fecha>.xlsx).
+
+    python -m services.vista_previa -n 50 --estrato tipos_documento
+"""
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime
+import argparse
+import json
+import logging
+import time
+from utils import esquema
+from utils.config_ejecucion import ConfigEjecucion
+from utils.excel_io import como_texto
+from utils.muestreo import muestra_estratificada
+from utils.normalizacion import norm_key, norm_num_serie
+from services.clonador_excel import ClonadorExcel
+from services.reestructurador_excel import ReestructuradorExcel, MAP_PAGADURIAS
+from services.comparador_avista import ComparadorAvista, COLS_CEDULA_RE
+from services.normalizador_excel import NormalizadorExcel
+from services.consolidador_final import ConsolidadorFinal
+
+ESTRATOS = ("pagaduria", "tipos_documento")
+
+
+def _documentos(raw: bytes) -> list[dict]:
+    try:
+        obj = json.loads(raw.decode("utf-8"))
+    except Exception:
+        return []
+    documentos = obj if isinstance(obj, list) else obj.get("documentos") if isinstance(obj, dict) else None
+    return [d for d in documentos or [] if isinstance(d, dict)]
+
+
+def estrato_pagaduria(raw: bytes) -> str:
+    """Pagaduría (ya unificada con el mapa de alias) del primer documento que la trae."""
+    for doc in _documentos(raw):
+        valor = (doc.get("data_extraida") or {}).get("pagaduria")
+        if isinstance(valor, str) and valor.strip():
+            clave = norm_key(valor)
+            return MAP_PAGADURIAS.get(clave, clave)
+    return "SIN PAGADURIA"
+
+
+def estrato_tipos(raw: bytes) -> str:
+    """Combinación de tipos de documento presentes (p. ej. 'amortizacion+cedula+libranza')."""
+    tipos = sorted({str(d.get("tipo_documento", "sin_tipo")) for d in _documentos(raw)})
+    return "+".join(tipos) or "SIN DOCUMENTOS"
+
+
+class VistaPrevia:
+    def __init__(self, cfg: ConfigEjecucion | None = None, creditos: int | None = None,
+                 estrato: str | None = None, semilla: int | None = None):
+        self.cfg = cfg or ConfigEjecucion()
+        self.creditos = max(1, int(creditos or self.cfg.vista_previa_creditos))
+        self.estrato = estrato or self.cfg.vista_previa_estrato
+        if self.estrato not in ESTRATOS:
+            raise ValueError(f"Estrato desconocido '{self.estrato}' (opciones: {', '.join(ESTRATOS)}).")
+        self.semilla = self.cfg.vista_previa_semilla if semilla is None else semilla
+        self.logger = logging.getLogger("VistaPrevia")
+
+    def seleccionar(self) -> list[str]:
+        """Nombres de los JSON de la muestra."""
+        carpeta = Path(self.cfg.ruta_jsons)
+        clasificar = estrato_pagaduria if self.estrato == "pagaduria" else estrato_tipos
+        nombres = [p.name for p in carpeta.glob("*.json")]
+        muestra, conteo = muestra_estratificada(
+            nombres, self.creditos, lambda n: clasificar((carpeta / n).read_bytes()), semilla=self.semilla,
+        )
+        self.logger.info(f"Muestra de {len(muestra)} de {len(nombres)} JSON por {self.estrato} "
+                         f"({len(conteo)} estrato(s)):")
+        for clave, cantidad in sorted(conteo.items(), key=lambda x: (-x[1], str(x[0]))):
+            self.logger.info(f"  {cantidad:>4}  {clave}")
+        return muestra
+
+    def ejecutar(self) -> bool:
+        inicio = time.perf_counter()
+        salida = self.cfg.preparar()
+        muestra = self.seleccionar()
+        if not muestra:
+            self.logger.error(f"No hay JSON en {self.cfg.ruta_jsons}.")
+            return False
+
+        clon = ClonadorExcel(self.cfg.ruta_jsons, str(salida), 1, cfg=self.cfg, archivos=muestra)
+        reestr = ReestructuradorExcel(str(salida), str(salida), cfg=self.cfg)
+        comp = ComparadorAvista(str(salida), self.cfg.carpeta_bases_avista, salida, solo_lote=True, cfg=self.cfg)
+        norm = NormalizadorExcel(str(salida), str(salida), umbral_similitud=float(self.cfg.tolerancia_texto))
+
+        df_clon = next(clon.iter_bloques(len(muestra)), None)
+        if df_clon is None:
+            self.logger.error("No se pudo extraer información de los JSON de la muestra.")
+            return False
+        resolutor = reestr.nuevo_resolutor()
+        df_re = reestr.reestructurar_df(esquema.tipar_lectura(como_texto(df_clon), "clon"), resolutor)
+        if df_re is None:
+            return False
+        df_re_texto = esquema.tipar_lectura(como_texto(df_re), "reestructurado")
+
+        # Sólo las filas Avista de la muestra (por operación y, sin ella, por cédula)
+        operaciones = set(norm_num_serie(df_re_texto["Numero credito"])) - {""}
+        cedulas = set()
+        for col in COLS_CEDULA_RE:
+            if col in df_re_texto.columns:
+                cedulas |= set(norm_num_serie(df_re_texto[col])) - {""}
+        avista = comp.cargar_avista(operaciones=operaciones, cedulas=cedulas)
+        if avista is None:
+            return False
+        df_avista, col_oper, op_norm = avista
+        cols_comp = [c for c in df_re_texto.columns if c in comp.cols_re]
+        hoja = comp.evaluar_lote(df_re_texto[cols_comp].copy(), df_avista, col_oper, op_norm=op_norm)
+        if hoja is None:
+            return False
+
+        base = f"clon_json_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+        for sufijo, df in (("", df_clon), ("_reestructurado", df_re), ("_evidencia_avista_unica", hoja),
+                           ("_resultado_normalizado", norm.normalizar_df(df_re_texto))):
+            df.to_excel(salida / f"{base}{sufijo}.xlsx", index=False, engine="openpyxl")
+        if resolutor is not None:
+            reestr.reportar_pagadurias(resolutor)
+        unificado = ConsolidadorFinal(str(salida), str(salida), str(salida), str(salida), str(salida)).consolidar()
+        self.logger.info(f"Vista previa lista en {time.perf_counter() - inicio:.1f} s -> {unificado}")
+        return unificado is not None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline sobre una muestra estratificada de créditos.")
+    parser.add_argument("-n", "--creditos", type=int, default=None)
+    parser.add_argument("--estrato", choices=ESTRATOS, default=None)
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--jsons", help="Carpeta de JSON; por defecto RUTA_JSONS.")
+    parser.add_argument("--resultados", help="Carpeta de resultados; por defecto la de config.")
+    parser.add_argument("--avista", help="Carpeta de la base Avista; por defecto la de config.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    rutas = {k: v for k, v in {"ruta_jsons": args.jsons, "carpeta_resultados": args.resultados,
+                               "carpeta_bases_avista": args.avista}.items() if v}
+    vista = VistaPrevia(ConfigEjecucion(modo_ingesta=1, **rutas), args.creditos, args.estrato, args.semilla)
+    raise SystemExit(0 if vista.ejecutar() else 1)
@@ -0,0 +1,64 @@
+import json
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+_PAGADURIAS = ["FOPEP", "COLPENSIONES", "CASUR"]
+
+
+def _credito(k: int) -> tuple[str, list[dict], dict]:
+    """(operación, JSON de Davinci, fila Avista) de un crédito consistente."""
+    op, ced = f"7720253{k:05d}", f"1914{k:04d}"
+    nombre = ("ANA", "MARIA", "SANTANA", "PEREZ") if k % 2 else ("JUAN", "CARLOS", "GOMEZ", "RUIZ")
+    completo = " ".join(nombre)
+    monto, plazo, tasa = 10_000_000 + k * 100_000, 60, 0.0194
+    cuota = round(monto * tasa / (1 - (1 + tasa) ** -plazo))
+    pagaduria = _PAGADURIAS[k % len(_PAGADURIAS)]
+    datos = {
+        "cedula": {"nombre_completo": completo, "numero_documento": ced, "fecha_nacimiento": "12/MAR/1960"},
+        "libranza": {"nombre_completo": completo, "numero_documento": ced, "numero_credito": op,
+                     "pagaduria": pagaduria, "plazo": plazo, "valor_cuota": cuota, "valor_prestamo": monto},
+        "amortizacion": {"nombre_completo": completo, "numero_documento": ced, "pagaduria": pagaduria,
+                         "plazo_meses": plazo, "tasa_interes": "25.97% EA", "valor_credito": monto,
+                         "valor_cuota": cuota},
+    }
+    docs = [{"id_cargue": 55, "tipo_documento": tipo, "nombre_archivo": f"{490000 + k}_1_{op}_{ced}_{tipo.upper()}.pdf",
+             "data_extraida": d} for tipo, d in datos.items()]
+    fila = {"OPERACIÓN": int(op), "CEDULA": int(ced), "PRIMER NOMBRE": nombre[0], "SEGUNDO NOMBRE": nombre[1],
+            "PRIMER APELLIDO": nombre[2], "SEGUNDO APELLIDO": nombre[3], "EMISOR": pagaduria,
+            "PLAZO INICIAL": plazo, "VALOR CUOTA": cuota, "MONTO INCIAL": monto, "TASA NOMINAL": "1.94%",
+            "FECHA NACIMIENTO": "1960-03-12"}
+    return op, docs, fila
+
+
+@pytest.fixture
+def lote_davinci(tmp_path):
+    """
+    Carpetas de un lote pequeño: `jsons/` con `n` créditos (cred_<k>.json), `avista/base.xlsx`
+    con esos créditos más otras operaciones, y `resultados/`. `escribir_jsons(carpeta, ks)`
+    agrega más lotes.
+    """
+    n = 4
+    filas, operaciones = [], []
+
+    def escribir_jsons(carpeta, ks):
+        carpeta.mkdir(parents=True, exist_ok=True)
+        for k in ks:
+            _, docs, _ = _credito(k)
+            (carpeta / f"cred_{k}.json").write_text(json.dumps(docs, ensure_ascii=False), encoding="utf-8")
+        return carpeta
+
+    for k in range(n + 4):
+        op, _, fila = _credito(k)
+        operaciones.append(op)
+        filas.append(fila)
+    filas += [{"OPERACIÓN": 880000000 + j, "CEDULA": 5000 + j, "PRIMER NOMBRE": "X"} for j in range(5)]
+    avista = tmp_path / "avista"
+    avista.mkdir()
+    pd.DataFrame(filas).to_excel(avista / "base.xlsx", index=False)
+    return SimpleNamespace(
+        jsons=escribir_jsons(tmp_path / "jsons", range(n)), avista=avista, resultados=tmp_path / "resultados",
+        operaciones=operaciones, escribir_jsons=escribir_jsons,
+        json_de=lambda k: json.dumps(_credito(k)[1], ensure_ascii=False).encode("utf-8"),
+    )
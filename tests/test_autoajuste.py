@@ -0,0 +1,61 @@
+import pytest
+
+from utils import autoajuste
+from utils.autoajuste import PerfilEntrada, autoajustar, proponer
+from utils.config_ejecucion import ConfigEjecucion
+
+GIB = 1024 ** 3
+
+
+def _perfil(n_jsons=2000, json_medio=50 * 1024, json_p95=100 * 1024, avista=(100_000, 40), nucleos=4,
+            memoria=8 * GIB, local=True) -> PerfilEntrada:
+    perfil = object.__new__(PerfilEntrada)
+    perfil.local, perfil.n_jsons = local, n_jsons
+    perfil.json_medio, perfil.json_p95, perfil.bytes_jsons = json_medio, json_p95, n_jsons * json_medio
+    perfil.avista_filas, perfil.avista_columnas = avista
+    perfil.nucleos, perfil.memoria = nucleos, memoria
+    return perfil
+
+
+def _cfg(**valores):
+    return ConfigEjecucion(autoajuste=True, autoajuste_fijos=(), modo_por_bloques=False, **valores)
+
+
+def test_perfil_fijo():
+    valores, razones = proponer(_perfil(), _cfg(comparacion_solo_lote=True))
+    # Presupuesto 4 GiB; ~600 KB por crédito (p95 x 6); base Avista ~320 MB
+    assert valores == {
+        "modo_por_bloques": False,          # ~1,5 GB: el lote cabe
+        "etapas_en_paralelo": True,
+        "cola_procesos": 4,                 # min(4 núcleos, 11 por memoria, 40 por lote)
+        "tamano_bloque": 600,               # 50% de ~754 MB libres por proceso / 600 KB = 613 -> 600
+        "cola_archivos_por_toma": 125,      # 2000 / (4 x 4)
+    }
+    assert {nombre for nombre, _ in razones} >= set(valores)
+
+
+@pytest.mark.parametrize("solo_lote, esperado", [(True, True), (False, False)])
+def test_lote_que_no_cabe_usa_bloques_solo_si_la_comparacion_es_por_lote(solo_lote, esperado):
+    valores, _ = proponer(_perfil(n_jsons=20_000), _cfg(comparacion_solo_lote=solo_lote))
+    assert valores["modo_por_bloques"] is esperado
+
+
+def test_poca_memoria_limita_procesos_y_bloque():
+    valores, _ = proponer(_perfil(nucleos=16, memoria=1 * GIB), _cfg())
+    # 512 MB de presupuesto: un solo proceso; 50% de ~217 MB libres / 600 KB = 176 -> 150
+    assert valores["cola_procesos"] == 1
+    assert valores["tamano_bloque"] == 150
+    assert valores["cola_archivos_por_toma"] == 500
+
+
+def test_fijos_no_se_tocan(monkeypatch):
+    monkeypatch.setattr(autoajuste, "PerfilEntrada", lambda cfg: _perfil())
+    cfg = _cfg(tamano_bloque=1234, cola_procesos=1, etapas_en_paralelo=False)
+    ajustada = autoajustar(cfg, fijos=["tamano_bloque"])
+    assert ajustada.tamano_bloque == 1234
+    assert ajustada.cola_procesos == 4 and ajustada.etapas_en_paralelo is True
+    # Sólo los `parametros` pedidos
+    assert autoajustar(cfg, parametros=["cola_procesos"]).etapas_en_paralelo is False
+    # Con AUTOAJUSTE apagado, la misma configuración
+    apagada = cfg.con(autoajuste=False)
+    assert autoajustar(apagada) is apagada
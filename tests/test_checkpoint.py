@@ -0,0 +1,82 @@
+import json
+
+import pandas as pd
+import pytest
+
+from services.clonador_excel import ClonadorExcel
+from utils.checkpoint import Checkpoint, hay_checkpoints
+from utils.config_ejecucion import ConfigEjecucion
+
+
+def _escribir(tmp_path, firma, *lineas):
+    ruta = tmp_path / ".checkpoints" / "clon.jsonl"
+    ruta.parent.mkdir()
+    ruta.write_text(json.dumps({"firma": firma}) + "\n" + "".join(lineas), encoding="utf-8")
+    return ruta
+
+
+def test_linea_truncada_se_descarta(tmp_path):
+    _escribir(tmp_path, "f1",
+              '{"clave": "a.json", "datos": {"x": 1}}\n',
+              '{"clave": "b.json", "datos": {"x": 2}}\n',
+              '{"clave": "c.json", "da')
+    assert Checkpoint(tmp_path, "clon", "f1").cargar() == {"a.json": {"x": 1}, "b.json": {"x": 2}}
+
+
+def test_firma_distinta_se_ignora(tmp_path):
+    _escribir(tmp_path, "f1", '{"clave": "a.json", "datos": {"x": 1}}\n')
+    assert Checkpoint(tmp_path, "clon", "otra").cargar() == {}
+
+
+def test_reanudar_conserva_y_completado_borra(tmp_path):
+    cp = Checkpoint(tmp_path, "clon", "f1", cada=1)
+    cp.abrir(reanudar=False)
+    cp.agregar("a.json", {"x": 1})
+    cp.cerrar(completado=False)
+    assert hay_checkpoints(tmp_path)
+
+    cp = Checkpoint(tmp_path, "clon", "f1", cada=1)
+    assert cp.abrir(reanudar=True) == {"a.json": {"x": 1}}
+    cp.agregar("b.json", {"x": 2})
+    cp.volcar()
+    assert Checkpoint(tmp_path, "clon", "f1").cargar() == {"a.json": {"x": 1}, "b.json": {"x": 2}}
+    cp.cerrar(completado=True)
+    assert not cp.ruta.exists()
+    assert not hay_checkpoints(tmp_path)
+
+
+# -------------------- Reanudar la clonación --------------------
+def _json(carpeta, i):
+    doc = {"nombre_archivo": f"49279{i}_1_77202530000{i}_1914378{i}_SOLICITUD.pdf",
+           "tipo_documento": "libranza", "data_extraida": {"plazo": str(12 * (i + 1))}}
+    (carpeta / f"cred_{i}.json").write_text(json.dumps([doc]), encoding="utf-8")
+
+
+def test_reanudar_clon_no_relee_los_json_del_checkpoint(tmp_path, monkeypatch):
+    jsons, salida = tmp_path / "jsons", tmp_path / "salida"
+    jsons.mkdir()
+    for i in range(4):
+        _json(jsons, i)
+    procesar = ClonadorExcel._procesar_json_anidado
+    leidos = []
+
+    def _cae_en_el_tercero(self, nombre, raw):
+        if len(leidos) == 2 and not self.cfg.reanudar:
+            raise RuntimeError("caída")
+        leidos.append(nombre)
+        return procesar(self, nombre, raw)
+
+    monkeypatch.setattr(ClonadorExcel, "_procesar_json_anidado", _cae_en_el_tercero)
+    cfg = ConfigEjecucion(checkpoints=True, checkpoint_cada=1, aislar=False, carpeta_resultados=salida)
+    with pytest.raises(RuntimeError):
+        ClonadorExcel(str(jsons), str(salida), 1, cfg=cfg).generar_excel()
+    antes = list(leidos)
+    assert len(antes) == 2 and hay_checkpoints(salida)
+
+    leidos.clear()
+    assert ClonadorExcel(str(jsons), str(salida), 1, cfg=cfg.con(reanudar=True)).generar_excel()
+    assert sorted(leidos + antes) == [f"cred_{i}.json" for i in range(4)]
+    assert not set(leidos) & set(antes)
+    assert not hay_checkpoints(salida)
+    clon = next(salida.glob("clon_json_*.xlsx"))
+    assert sorted(pd.read_excel(clon, dtype=str)["Numero credito"]) == [f"77202530000{i}" for i in range(4)]
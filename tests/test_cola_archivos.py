@@ -0,0 +1,73 @@
+import os
+import time
+
+from utils.cola_archivos import ColaArchivos
+
+
+def _cola(tmp_path, trabajador, ttl=600):
+    jsons = tmp_path / "jsons"
+    jsons.mkdir(exist_ok=True)
+    return ColaArchivos(jsons, tmp_path / "cola", trabajador, ttl)
+
+
+def _jsons(tmp_path, *nombres):
+    (tmp_path / "jsons").mkdir(exist_ok=True)
+    for nombre in nombres:
+        (tmp_path / "jsons" / nombre).write_text("{}", encoding="utf-8")
+
+
+def _vencer(cola, nombre):
+    antes = time.time() - cola.ttl - 60
+    os.utime(cola._reserva(nombre), (antes, antes))
+
+
+def test_reserva_exclusiva(tmp_path):
+    _jsons(tmp_path, "a.json", "b.json", "c.json")
+    uno, dos = _cola(tmp_path, "uno"), _cola(tmp_path, "dos")
+    assert uno.reclamar(2) == ["a.json", "b.json"]
+    assert dos.reclamar(5) == ["c.json"]
+    assert not dos.reservar("a.json")
+    assert uno.reservas_activas() == 3
+
+
+def test_reserva_vencida_se_retoma(tmp_path):
+    _jsons(tmp_path, "a.json")
+    uno, dos = _cola(tmp_path, "uno"), _cola(tmp_path, "dos")
+    assert uno.reclamar(1) == ["a.json"]
+    _vencer(uno, "a.json")
+    assert uno.reservas_activas() == 0
+    assert dos.reclamar(1) == ["a.json"]
+    # El dueño original se entera al renovar: la perdió
+    assert uno.renovar(["a.json"]) == ["a.json"]
+    assert dos.renovar(["a.json"]) == []
+
+
+def test_renovar_informa_reservas_borradas(tmp_path):
+    _jsons(tmp_path, "a.json", "b.json")
+    uno = _cola(tmp_path, "uno")
+    uno.reclamar(2)
+    uno._reserva("b.json").unlink()
+    assert uno.renovar(["a.json", "b.json"]) == ["b.json"]
+
+
+def test_completar_marca_hecho_y_suelta(tmp_path):
+    _jsons(tmp_path, "a.json", "b.json")
+    uno, dos = _cola(tmp_path, "uno"), _cola(tmp_path, "dos")
+    uno.reclamar(2)
+    uno.completar(["a.json"], "shard_1")
+    assert uno.hechos_por_shard() == {"a.json": "shard_1"}
+    assert uno.pendientes() == ["b.json"]
+    assert not uno._reserva("a.json").exists()
+    # Lo hecho ya no se reclama; lo reservado por otro tampoco
+    assert dos.reclamar(5) == []
+
+
+def test_soltar_libera_solo_las_propias(tmp_path):
+    _jsons(tmp_path, "a.json", "b.json")
+    uno, dos = _cola(tmp_path, "uno"), _cola(tmp_path, "dos")
+    uno.reclamar(1)
+    dos.reclamar(1)
+    dos.soltar(["a.json", "b.json"])   # a.json es de "uno": no se toca
+    assert uno._reserva("a.json").exists()
+    assert not dos._reserva("b.json").exists()
+    assert dos.reclamar(5) == ["b.json"]
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from services.comparador_avista import ComparadorAvista
+from utils.normalizacion import norm_num_serie
+
+
+def _cruzar(df_avista, idx_oper, idx_ced):
+    comp = ComparadorAvista(".", ".", ".")
+    op_norm = norm_num_serie(df_avista["OPERACION"])
+    return comp._cruzar(df_avista, op_norm, "CEDULA", idx_oper, idx_ced)
+
+
+def test_cruce_por_operacion():
+    avista = pd.DataFrame({"OPERACION": ["100", "200"], "CEDULA": ["1", "2"]})
+    posiciones, llaves = _cruzar(avista, {"200": 0}, {})
+    assert posiciones.isna().tolist() == [True, False]
+    assert llaves.tolist() == ["", "OPERACION"]
+
+
+def test_cruce_por_cedula_solo_con_una_operacion():
+    avista = pd.DataFrame({"OPERACION": ["100", "101", "200"], "CEDULA": ["111", "111", "222"]})
+    # Filas del reestructurado sin número de crédito: 0 -> cédula 111, 1 -> cédula 222
+    posiciones, llaves = _cruzar(avista, {}, {"111": 0, "222": 1})
+    assert posiciones.iloc[:2].isna().all()
+    assert posiciones.iloc[2] == 1
+    assert llaves.tolist() == ["CEDULA AMBIGUA", "CEDULA AMBIGUA", "CEDULA"]
+
+
+def test_operacion_tiene_prioridad_sobre_cedula():
+    avista = pd.DataFrame({"OPERACION": ["100"], "CEDULA": ["111"]})
+    posiciones, llaves = _cruzar(avista, {"100": 3}, {"111": 0})
+    assert posiciones.iloc[0] == 3
+    assert llaves.iloc[0] == "OPERACION"
+
+
+def test_clave_evidencia_incluye_nombres_de_columna():
+    from services.comparador_avista import _clave_evidencia
+    fav = pd.Series({"OPERACION": "100", "PLAZO": "12"})
+    res = pd.Series({"libranza_plazo": "12"})
+    base = _clave_evidencia("p", fav, res, ["OPERACION", "PLAZO"], ["libranza_plazo"])
+    # Mismos valores bajo otra columna: otra clave
+    otra = pd.Series({"OPERACION": "100", "CUOTA": "12"})
+    assert base != _clave_evidencia("p", otra, res, ["OPERACION", "CUOTA"], ["libranza_plazo"])
+    # El orden de las columnas no cambia la clave
+    assert base == _clave_evidencia("p", fav, res, ["PLAZO", "OPERACION"], ["libranza_plazo"])
+    assert base != _clave_evidencia("otro plan", fav, res, ["OPERACION", "PLAZO"], ["libranza_plazo"])
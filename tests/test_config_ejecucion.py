@@ -0,0 +1,26 @@
+import os
+
+from utils.config_ejecucion import ConfigEjecucion
+
+PATRON = "clon_json_*_reestructurado.xlsx"
+
+
+def _archivo(carpeta, nombre, mtime):
+    carpeta.mkdir(parents=True, exist_ok=True)
+    ruta = carpeta / nombre
+    ruta.write_bytes(b"")
+    os.utime(ruta, (mtime, mtime))
+
+
+def test_ultima_corrida_por_fecha_del_archivo(tmp_path):
+    corridas = tmp_path / "corridas"
+    _archivo(corridas / "b_vieja", "clon_json_1_reestructurado.xlsx", 1_000)
+    _archivo(corridas / "a_nueva", "clon_json_2_reestructurado.xlsx", 2_000)
+    # Más reciente, pero sin reestructurado: no cuenta
+    _archivo(corridas / "c_incompleta", "clon_json_3.xlsx", 3_000)
+    cfg = ConfigEjecucion(carpeta_resultados=tmp_path, aislar=True)
+    assert cfg.ultima_corrida(PATRON) == "a_nueva"
+
+
+def test_sin_corridas(tmp_path):
+    assert ConfigEjecucion(carpeta_resultados=tmp_path, aislar=True).ultima_corrida(PATRON) is None
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from services.diff_avista import DiffAvista, AGREGADA, ELIMINADA, MODIFICADA
+
+
+def _diff(prev: dict, new: dict) -> dict:
+    diff = DiffAvista(".", ".").diferenciar(pd.DataFrame(prev), pd.DataFrame(new), "OPERACION")
+    return {op: (cambio, cols) for op, cambio, cols in diff.itertuples(index=False)}
+
+
+def test_agregadas_eliminadas_y_modificadas():
+    prev = {"OPERACION": ["1", "2", "3"], "PLAZO": ["12", "24", "36"], "CUOTA": ["10", "20", "30"]}
+    new = {"OPERACION": ["2", "3", "4"], "PLAZO": ["24", "48", "60"], "CUOTA": ["20", "31", "40"]}
+    assert _diff(prev, new) == {
+        "4": (AGREGADA, ""),
+        "1": (ELIMINADA, ""),
+        "3": (MODIFICADA, "PLAZO, CUOTA"),
+    }
+
+
+def test_operacion_normalizada_y_vacios():
+    # "0002" y "2.0" son la misma operación; vacío y NaN no son un cambio
+    prev = {"OPERACION": ["0002", ""], "PLAZO": [None, "1"]}
+    new = {"OPERACION": ["2.0"], "PLAZO": [""]}
+    assert _diff(prev, new) == {}
+
+
+def test_columnas_solo_en_una_base_no_cuentan_como_cambio():
+    prev = {"OPERACION": ["1"], "PLAZO": ["12"], "VIEJA": ["x"]}
+    new = {"OPERACION": ["1"], "PLAZO": ["12"], "NUEVA": ["y"]}
+    assert _diff(prev, new) == {}
@@ -0,0 +1,36 @@
+import json
+
+from services.comparador_avista import ComparadorAvista
+from services.ejecutor_lotes import RESUMEN, EjecutorLotes
+from utils.config_ejecucion import ConfigEjecucion
+
+
+def test_dos_lotes_con_la_base_avista_cargada_una_vez(lote_davinci, tmp_path, monkeypatch):
+    otro = lote_davinci.escribir_jsons(tmp_path / "lote_2", [4, 5, 6])
+    vacio = tmp_path / "vacio"
+    vacio.mkdir()
+    cargas = []
+    cargar = ComparadorAvista.cargar_avista
+
+    def _contar(self, *args, **kwargs):
+        cargas.append(args or kwargs)
+        return cargar(self, *args, **kwargs)
+
+    monkeypatch.setattr(ComparadorAvista, "cargar_avista", _contar)
+    cfg = ConfigEjecucion(carpeta_bases_avista=lote_davinci.avista, carpeta_resultados=lote_davinci.resultados,
+                          aislar=True, autoajuste=False, checkpoints=False, cache_evidencia=False)
+    resumenes = EjecutorLotes(cfg, [str(lote_davinci.jsons), str(otro), str(vacio)]).ejecutar()
+
+    assert len(cargas) == 1
+    assert [r["estado"] for r in resumenes] == ["ok", "ok", "sin_datos"]
+    assert [r["creditos"] for r in resumenes] == [4, 3, 0]
+    corridas = [r["corrida"] for r in resumenes]
+    assert len(set(corridas)) == 3
+    for resumen in resumenes:
+        carpeta = lote_davinci.resultados / "corridas" / resumen["corrida"]
+        assert resumen["carpeta"] == str(carpeta)
+        guardado = json.loads((carpeta / RESUMEN).read_text(encoding="utf-8"))
+        assert guardado["estado"] == resumen["estado"] and guardado["origen"] == resumen["origen"]
+    for resumen in resumenes[:2]:
+        carpeta = lote_davinci.resultados / "corridas" / resumen["corrida"]
+        assert resumen["unificado"] and any(carpeta.glob("Davinci_Resultado_*.xlsx"))
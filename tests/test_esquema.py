@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from utils import esquema
+
+
+def _escribir(columnas: dict) -> pd.DataFrame:
+    # Como lo deja el reestructurador antes de tipar: vacíos -> ""
+    return esquema.tipar_escritura(pd.DataFrame(columnas).fillna(""), "reestructurado", inferir=True)
+
+
+def test_numero_declarado_con_celda_vacia_sigue_siendo_numero():
+    df = _escribir({"libranza_valor_cuota": ["100", "200", None]})
+    assert df["libranza_valor_cuota"].dtype == "float64"
+    assert df["libranza_valor_cuota"].iloc[:2].tolist() == [100.0, 200.0]
+    assert pd.isna(df["libranza_valor_cuota"].iloc[2])
+
+
+def test_columna_no_declarada_con_vacios_se_infiere_numero():
+    df = _escribir({"campo_x": ["1", " ", "3"]})
+    assert df["campo_x"].dtype == "float64"
+
+
+def test_columna_con_texto_queda_como_texto():
+    df = _escribir({"campo_x": ["1", "", "a"], "libranza_valor_cuota": ["100", "N/A", ""]})
+    assert df["campo_x"].tolist() == ["1", "", "a"]
+    assert df["libranza_valor_cuota"].tolist() == ["100", "N/A", ""]
+
+
+def test_llaves_como_texto():
+    df = _escribir({"Numero credito": [772025300001.0, "0019143788", None]})
+    assert df["Numero credito"].tolist() == ["772025300001", "0019143788", ""]
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    ("0019143788", "0019143788"),
+    (" 19143788 ", "19143788"),
+    ("1.234.567", "1.234.567"),
+    ("1.000", "1.000"),
+    ("60.0", "60"),
+    (60.0, "60"),
+    (772025300001, "772025300001"),
+    ("7.72025E+11", "772025000000"),
+    ("ABC-12", "ABC-12"),
+    (float("nan"), ""),
+])
+def test_a_llave_conserva_los_digitos_tal_cual(valor, esperado):
+    assert esquema.a_llave(valor) == esperado
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    ("$ 1.500.000", 1500000.0),
+    ("1,500,000.5", 1500000.5),
+    ("60.0", 60.0),
+    (60, 60.0),
+    ("", None),
+    ("abc", None),
+])
+def test_a_numero(valor, esperado):
+    assert esquema.a_numero(valor) == esperado
+
+
+def test_tipar_lectura_canoniza_llaves_y_numeros():
+    df = pd.DataFrame({"Numero credito": ["772025300001.0", None], "libranza_valor_cuota": ["60.0", "1.500.000"]})
+    esquema.tipar_lectura(df, "reestructurado")
+    assert df["Numero credito"].iloc[0] == "772025300001"
+    assert pd.isna(df["Numero credito"].iloc[1])
+    assert df["libranza_valor_cuota"].tolist() == ["60", "1500000"]
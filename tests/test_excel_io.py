@@ -0,0 +1,37 @@
+import pandas as pd
+
+from services.trabajador_cola import _col_operacion
+from utils.excel_io import reemplazar_filas, unir_excel
+from utils.normalizacion import norm_num_like
+
+
+def _xlsx(ruta, columnas: dict):
+    pd.DataFrame(columnas).to_excel(ruta, index=False)
+    return ruta
+
+
+def test_unir_excel_une_columnas_en_orden_de_aparicion(tmp_path):
+    a = _xlsx(tmp_path / "a.xlsx", {"OPERACION": ["1"], "X": ["a"]})
+    b = _xlsx(tmp_path / "b.xlsx", {"Y": ["b"], "OPERACION": ["1"]})
+    assert unir_excel([a, b], tmp_path / "u.xlsx") == 2
+    unido = pd.read_excel(tmp_path / "u.xlsx", dtype=str)
+    assert list(unido.columns) == ["OPERACION", "X", "Y"]
+
+
+def test_evidencia_unida_sin_operaciones_repetidas(tmp_path):
+    # La operación 2 quedó en dos shards (JSON en tomas distintas): vale la del primero
+    a = _xlsx(tmp_path / "a.xlsx", {"OPERACION": ["1", "2", None], "ESTADO": ["a1", "a2", "sin op"]})
+    b = _xlsx(tmp_path / "b.xlsx", {"OPERACION": ["2.0", "3", None], "ESTADO": ["b2", "b3", "sin op"]})
+    filas = unir_excel([a, b], tmp_path / "u.xlsx", columna_unica=_col_operacion, normalizar=norm_num_like)
+    unido = pd.read_excel(tmp_path / "u.xlsx", dtype=str)
+    assert filas == 5
+    assert unido["ESTADO"].tolist() == ["a1", "a2", "sin op", "b3", "sin op"]
+
+
+def test_reemplazar_filas_solo_toca_las_claves(tmp_path):
+    ruta = _xlsx(tmp_path / "r.xlsx", {"OPERACION": ["1", "2", "3"], "PLAZO": [12, 24, 36]})
+    nuevas = pd.DataFrame({"OPERACION": ["2"], "PLAZO": [48], "NUEVA": ["x"]})
+    assert reemplazar_filas(ruta, nuevas, "OPERACION", {"2"}, norm_num_like) == (2, 1)
+    df = pd.read_excel(ruta, dtype=str)
+    assert list(df.columns) == ["OPERACION", "PLAZO", "NUEVA"]
+    assert df.fillna("").values.tolist() == [["1", "12", ""], ["3", "36", ""], ["2", "48", "x"]]
@@ -0,0 +1,52 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from utils import fechas
+
+
+@pytest.mark.parametrize("textos, formato", [
+    (["15/01/2024", "03/12/2023", ""], "%d/%m/%Y"),
+    (["2024/01/15", "2023/12/03"], "%Y/%m/%d"),
+    (["15/01/2024 10:30:00"], "%d/%m/%Y %H:%M:%S"),
+    (["hola", ""], None),
+])
+def test_inferir_formato(textos, formato):
+    assert fechas.inferir_formato(pd.Series(textos)) == formato
+
+
+def test_inferir_formato_toma_el_dominante():
+    textos = pd.Series(["15/01/2024", "16/01/2024", "17/01/2024", "2024/01/18"])
+    assert fechas.inferir_formato(textos) == "%d/%m/%Y"
+
+
+def test_parsear_serie_con_atipicos():
+    serie = pd.Series(["15/01/2024", "2024-01-16", "17/ENE/2024", None, "", datetime(2024, 1, 18), "xx",
+                       "05/02/2024"])
+    esperado = [pd.Timestamp(2024, 1, 15), pd.Timestamp(2024, 1, 16), pd.Timestamp(2024, 1, 17), None, None,
+                pd.Timestamp(2024, 1, 18), None, pd.Timestamp(2024, 2, 5)]
+    salida = fechas.parsear_serie(serie)
+    assert [None if pd.isna(v) else v for v in salida] == esperado
+
+
+def test_dia_primero_en_formato_dominante():
+    # 05/02 es 5 de febrero (no 2 de mayo) cuando la columna es DD/MM/AAAA
+    salida = fechas.parsear_serie(pd.Series(["25/01/2024", "05/02/2024"]))
+    assert salida.iloc[1] == pd.Timestamp(2024, 2, 5)
+
+
+@pytest.mark.parametrize("valor", ["2024-01-15", "15/01/2024", "15/ENE/2024", "15-ene-2024", date(2024, 1, 15)])
+def test_norm_fecha_misma_fecha_en_varios_formatos(valor):
+    assert fechas.norm_fecha(valor) == "15/01/2024"
+
+
+def test_norm_fecha_no_fecha_y_vacios():
+    assert fechas.norm_fecha("xyz") == "XYZ"
+    assert fechas.norm_fecha(None) == ""
+    assert fechas.norm_fecha("  ") == ""
+
+
+def test_precargar_llena_el_memo():
+    fechas.precargar(pd.Series(["01/03/2024", "02/03/2024"]))
+    assert fechas.parsear_fecha("02/03/2024") == pd.Timestamp(2024, 3, 2)
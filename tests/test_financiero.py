@@ -0,0 +1,48 @@
+import math
+
+import numpy as np
+import pytest
+
+from utils.financiero import cuota_francesa, dentro_de_tolerancia
+
+
+def _cuota_escalar(p, n, i):
+    return p / n if i == 0 else p * i / (1 - (1 + i) ** -n)
+
+
+def test_cuota_conocida():
+    # 1.000.000 a 12 meses al 2% mensual
+    assert cuota_francesa(1_000_000, 12, 0.02) == pytest.approx(94_559.60, abs=0.01)
+
+
+def test_coincide_con_la_formula_escalar():
+    montos = np.array([1_000_000, 5_500_000, 32_000_000])
+    plazos = np.array([12, 48, 120])
+    tasas = np.array([0.01, 0.0185, 0.0])
+    esperado = [_cuota_escalar(p, n, i) for p, n, i in zip(montos, plazos, tasas)]
+    assert cuota_francesa(montos, plazos, tasas) == pytest.approx(esperado)
+
+
+def test_tasa_cero_es_monto_sobre_plazo():
+    assert cuota_francesa(1_200_000, 12, 0.0) == pytest.approx(100_000)
+
+
+def test_la_cuota_amortiza_el_monto():
+    p, n, i = 7_000_000, 36, 0.0165
+    cuota = float(cuota_francesa(p, n, i))
+    saldo = p
+    for _ in range(n):
+        saldo = saldo * (1 + i) - cuota
+    assert saldo == pytest.approx(0, abs=1e-4)
+
+
+@pytest.mark.parametrize("monto, plazo, tasa", [
+    (0, 12, 0.01), (-5, 12, 0.01), (1000, 0, 0.01), (1000, 12, -0.01), (math.nan, 12, 0.01), (1000, 12, math.nan),
+])
+def test_datos_invalidos_dan_nan(monto, plazo, tasa):
+    assert np.isnan(cuota_francesa(monto, plazo, tasa))
+
+
+def test_dentro_de_tolerancia():
+    assert dentro_de_tolerancia([100, 100, 100, math.nan], [101, 98, 100, 100], 0.01).tolist() == \
+        [True, False, True, False]
@@ -0,0 +1,49 @@
+import random
+
+from utils.muestreo import muestra_estratificada, orden_estable
+
+NOMBRES = [f"{i:04d}_{'A' if i < 90 else 'B' if i < 98 else 'C'}.json" for i in range(100)]
+
+
+def _estrato(nombre):
+    return nombre[5]
+
+
+def test_misma_semilla_misma_muestra_sin_importar_el_orden_de_entrada():
+    barajados = NOMBRES[:]
+    random.Random(1).shuffle(barajados)
+    assert muestra_estratificada(NOMBRES, 10, _estrato, semilla=7) == \
+        muestra_estratificada(barajados, 10, _estrato, semilla=7)
+    assert orden_estable(NOMBRES, 7) != orden_estable(NOMBRES, 8)
+
+
+def test_agregar_archivos_no_reordena_los_anteriores():
+    antes = orden_estable(NOMBRES, 3)
+    despues = orden_estable(NOMBRES + ["nuevo_1.json", "nuevo_2.json"], 3)
+    assert [n for n in despues if n in set(NOMBRES)] == antes
+
+
+def test_estratos_chicos_quedan_representados():
+    muestra, conteo = muestra_estratificada(NOMBRES, 6, _estrato, sobremuestreo=100)
+    assert len(muestra) == 6 and len(set(muestra)) == 6
+    # Por turnos: uno de cada estrato por vuelta hasta agotar C (2) y B
+    assert conteo["C"] == 2 and conteo["B"] == 2 and conteo["A"] == 2
+    assert sum(conteo.values()) == len(muestra)
+
+
+def test_estrato_solo_se_evalua_en_los_candidatos():
+    evaluados = []
+
+    def estrato(nombre):
+        evaluados.append(nombre)
+        return _estrato(nombre)
+
+    muestra, _ = muestra_estratificada(NOMBRES, 4, estrato, sobremuestreo=3)
+    assert len(evaluados) == 12
+    assert set(muestra) <= set(evaluados)
+
+
+def test_menos_nombres_que_n():
+    muestra, conteo = muestra_estratificada(NOMBRES[:3], 10, _estrato)
+    assert sorted(muestra) == NOMBRES[:3]
+    assert conteo == {"A": 3}
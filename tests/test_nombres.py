@@ -0,0 +1,34 @@
+import pandas as pd
+
+from utils.nombres import evidencia_nombre, partes_avista, partes_avista_serie
+
+
+def _partes(**partes):
+    return partes_avista(pd.Series({k.replace("_", " "): v for k, v in partes.items()}))
+
+
+def test_nombre_completo_por_tokens():
+    partes = _partes(PRIMER_NOMBRE="Ana", PRIMER_APELLIDO="Pérez")
+    assert evidencia_nombre(partes, "PEREZ GOMEZ ANA") == ("OK",)
+
+
+def test_token_no_coincide_dentro_de_otra_palabra():
+    # Con `in` sobre el texto, "ANA" aparecía dentro de "SANTANA"
+    partes = _partes(PRIMER_NOMBRE="ANA", PRIMER_APELLIDO="SANTANA")
+    assert evidencia_nombre(partes, "MARIA SANTANA") == ("FALLO PRIMER NOMBRE",)
+
+
+def test_parte_con_varios_tokens_requiere_todos():
+    partes = _partes(PRIMER_APELLIDO="DE LA CRUZ")
+    assert evidencia_nombre(partes, "JUAN DE LA CRUZ") == ("OK",)
+    assert evidencia_nombre(partes, "JUAN CRUZ") == ("FALLO PRIMER APELLIDO",)
+
+
+def test_sin_partes_en_avista():
+    assert evidencia_nombre(_partes(PRIMER_NOMBRE=None), "ANA") == ("ND-AV NOMBRE COMPLETO",)
+
+
+def test_serie_igual_que_fila_a_fila():
+    df = pd.DataFrame({"PRIMER NOMBRE": ["Ana", None], "SEGUNDO NOMBRE": ["", "Luz"],
+                       "PRIMER APELLIDO": ["Pérez", "Gómez"], "SEGUNDO APELLIDO": [None, "Ruiz"]})
+    assert partes_avista_serie(df).tolist() == [partes_avista(fila) for _, fila in df.iterrows()]
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from utils.normalizacion import norm_header, norm_num_like, norm_num_serie, norm_text
+
+
+def _norm_num_like_anterior(v):
+    """La versión que tenían el comparador y el reestructurador antes del núcleo común."""
+    if pd.isna(v): return ""
+    s = str(v).strip()
+    try:
+        if "e" in s.lower():
+            return str(int(float(s)))
+    except Exception:
+        pass
+    s2 = s.replace(".", "").replace(",", "").replace(" ", "")
+    try:
+        f = float(s2)
+        return str(int(f)) if f.is_integer() else str(int(round(f)))
+    except Exception:
+        return s2
+
+
+@pytest.mark.parametrize("valor", [
+    "772025300001", " 19143788 ", "0019143788", "1.234.567", "1,234,567", "2.5", "1.000",
+    "1500000.50", "7.72025E+11", "ABC-12", "No encontrado", "", None, 19143788,
+])
+def test_llaves_igual_que_antes(valor):
+    assert norm_num_like(valor) == _norm_num_like_anterior(valor)
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    # Celdas numéricas leídas como float o como texto "<n>.0": antes daban "<n>0"
+    (60.0, "60"),
+    ("60.0", "60"),
+    ("60.00", "60"),
+    (772025300001.0, "772025300001"),
+    ("1500000.0000", "1500000"),
+])
+def test_quita_decimal_en_cero(valor, esperado):
+    assert norm_num_like(valor) == esperado
+
+
+def test_no_redondea_decimales():
+    assert norm_num_like("2.5") == "25"
+    assert norm_num_like("3.5") == "35"
+
+
+def test_serie_conserva_vacios():
+    serie = pd.Series(["1.0", None, "002"])
+    assert norm_num_serie(serie).tolist() == ["1", "", "2"]
+
+
+def test_textos_y_encabezados():
+    assert norm_text("  José   Pérez ") == "JOSE PEREZ"
+    assert norm_text(None) == ""
+    assert norm_header(" Operación ") == "OPERACION"
@@ -0,0 +1,77 @@
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+from services.normalizador_excel import NormalizadorExcel, OK, CON_ERRORES, SIN_DATOS, NO_APLICA
+
+# Los bloques que tenía fijos el normalizador antes de declararlos en config (todos de texto)
+BLOQUES_ANTERIORES = [
+    ["desprendible_nomina_pagaduria", "amortizacion_pagaduria", "libranza_pagaduria"],
+    ["formato_conocimiento_plazo_meses", "amortizacion_plazo_meses", "libranza_plazo"],
+    ["libranza_valor_cuota", "amortizacion_valor_cuota"],
+    ["libranza_valor_prestamo", "amortizacion_valor_credito", "formato_conocimiento_valor_total_credito"],
+    ["solicitud_credito_solicitud", "amortizacion_numero_solicitud"],
+]
+
+
+def _estado_anterior(fila: pd.Series, umbral: float) -> str:
+    """El 'Estado Normalizado' de la versión fila a fila."""
+    def sim(a, b):
+        return SequenceMatcher(None, str(a).strip().upper(), str(b).strip().upper()).ratio()
+
+    for cols in BLOQUES_ANTERIORES:
+        presentes = [c for c in cols if c in fila.index]
+        if not presentes:
+            continue
+        vals = [str(fila[c]) for c in presentes if pd.notna(fila[c]) and str(fila[c]).strip() != ""]
+        if not vals:
+            return CON_ERRORES
+        pares = [sim(vals[i], vals[j]) for i in range(len(vals)) for j in range(i + 1, len(vals))]
+        if pares and sum(pares) / len(pares) < umbral:
+            return CON_ERRORES
+    return OK
+
+
+def _reestructurado() -> pd.DataFrame:
+    return pd.DataFrame({
+        "desprendible_nomina_pagaduria": ["FOPEP", "COLPENSIONES", None, "CASUR", " fopep "],
+        "amortizacion_pagaduria": ["FOPEP", "COLPENSIONES S.A.", "", "POLICIA", "FOPEP"],
+        "libranza_pagaduria": ["CONSORCIO FOPEP", None, None, "CASUR", "FOPEP"],
+        "amortizacion_plazo_meses": ["60", "60", "48", "72", "60"],
+        "libranza_plazo": ["60", "60.0", "48", "72", "6O"],
+        "libranza_valor_cuota": ["351.000", "351000", None, "1", "2"],
+        "amortizacion_valor_cuota": ["351000", "351000", None, "1", "2"],
+        "solicitud_credito_solicitud": ["1000", "1001", "1002", "1003", "1004"],
+    })
+
+
+def test_estado_normalizado_igual_que_fila_a_fila():
+    df = _reestructurado()
+    bloques = [{"nombre": f"B{i}", "tipo": "texto", "columnas": cols} for i, cols in enumerate(BLOQUES_ANTERIORES)]
+    salida = NormalizadorExcel(".", ".", umbral_similitud=0.70, bloques=bloques).normalizar_df(df.copy())
+    assert salida["Estado Normalizado"].tolist() == [_estado_anterior(f, 0.70) for _, f in df.iterrows()]
+    assert list(salida.columns[:len(df.columns)]) == list(df.columns)
+
+
+def test_estado_por_bloque_tipado():
+    bloques = [
+        {"nombre": "Pagaduría", "tipo": "texto", "tolerancia": 0.70,
+         "columnas": ["desprendible_nomina_pagaduria", "amortizacion_pagaduria", "libranza_pagaduria"]},
+        {"nombre": "Plazo", "tipo": "numero", "tolerancia": 0,
+         "columnas": ["amortizacion_plazo_meses", "libranza_plazo"]},
+        {"nombre": "Cuota", "tipo": "numero", "tolerancia": 1,
+         "columnas": ["libranza_valor_cuota", "amortizacion_valor_cuota"]},
+        {"nombre": "Fechas", "tipo": "fecha", "columnas": ["no_existe_fecha"]},
+    ]
+    salida = NormalizadorExcel(".", ".", bloques=bloques).normalizar_df(_reestructurado())
+    estados = salida.filter(like="Estado")
+    assert list(estados.columns) == ["Estado Pagaduría", "Estado Plazo", "Estado Cuota", "Estado Fechas",
+                                     "Estado Normalizado"]
+    assert estados["Estado Plazo"].tolist() == [OK, OK, OK, OK, CON_ERRORES]   # "60.0" = 60; "6O" no es número
+    # "351.000" se lee con punto decimal (351), no como 351000
+    assert estados["Estado Cuota"].tolist() == [CON_ERRORES, OK, SIN_DATOS, OK, OK]
+    assert estados["Estado Fechas"].tolist() == [NO_APLICA] * 5
+    assert estados["Estado Pagaduría"].iloc[2] == SIN_DATOS
+    assert estados["Estado Normalizado"].tolist() == [
+        OK if fila.isin([OK, NO_APLICA]).all() else CON_ERRORES for _, fila in estados.iloc[:, :-1].iterrows()
+    ]
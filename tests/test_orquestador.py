@@ -0,0 +1,62 @@
+import threading
+
+from services.orquestador import (
+    Etapa, Orquestador, CLON, REESTRUCTURADO, EVIDENCIA, NORMALIZADO, UNIFICADO,
+    OK, ERROR, OMITIDA,
+)
+
+
+_CERROJO = threading.Lock()
+
+
+def _pipeline(registro, fallan=(), no_criticas=()):
+    def funcion(nombre):
+        def correr():
+            with _CERROJO:
+                registro.append(nombre)
+            return nombre not in fallan
+        return correr
+
+    definicion = [
+        ("consolidar", (REESTRUCTURADO, EVIDENCIA, NORMALIZADO), (UNIFICADO,)),
+        ("normalizar", (REESTRUCTURADO,), (NORMALIZADO,)),
+        ("comparar", (REESTRUCTURADO,), (EVIDENCIA,)),
+        ("reestructurar", (CLON,), (REESTRUCTURADO,)),
+        ("clonar", (), (CLON,)),
+    ]
+    return [Etapa(n, funcion(n), e, s, critica=n not in no_criticas) for n, e, s in definicion]
+
+
+def test_orden_por_dependencias():
+    registro = []
+    orq = Orquestador(_pipeline(registro), max_hilos=4)
+    assert orq.orden == ["clonar", "reestructurar", "normalizar", "comparar", "consolidar"]
+    estados = orq.ejecutar()
+    assert set(estados.values()) == {OK}
+    assert registro[:2] == ["clonar", "reestructurar"]
+    assert set(registro[2:4]) == {"normalizar", "comparar"}
+    assert registro[4] == "consolidar"
+
+
+def test_falla_critica_omite_dependientes():
+    registro = []
+    estados = Orquestador(_pipeline(registro, fallan={"reestructurar"})).ejecutar()
+    assert estados["reestructurar"] == ERROR
+    assert [estados[n] for n in ("comparar", "normalizar", "consolidar")] == [OMITIDA] * 3
+    assert registro == ["clonar", "reestructurar"]
+
+
+def test_falla_no_critica_deja_seguir():
+    registro = []
+    estados = Orquestador(_pipeline(registro, fallan={"comparar"}, no_criticas={"comparar"})).ejecutar()
+    assert estados["comparar"] == ERROR
+    assert estados["consolidar"] == OK
+
+
+def test_reanudar_omite_etapas_con_salidas(tmp_path):
+    (tmp_path / "clon_json_2025-10-01_08-00-00.xlsx").touch()
+    (tmp_path / "clon_json_2025-10-01_08-00-00_reestructurado.xlsx").touch()
+    registro = []
+    estados = Orquestador(_pipeline(registro), max_hilos=1, reanudar_en=tmp_path).ejecutar()
+    assert set(estados.values()) == {OK}
+    assert registro == ["normalizar", "comparar", "consolidar"]
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+import config
+from services.reestructurador_excel import MAP_PAGADURIAS
+from utils.config_ejecucion import ConfigEjecucion
+from utils.pagadurias import ResolutorPagadurias, RESUELTO, BAJA_CONFIANZA, SIN_CANDIDATO
+
+TOLIMA = "SECRETARIA DE EDUCACION DEPARTAMENTAL DEL TOLIMA"
+
+
+@pytest.fixture
+def resolutor():
+    return ResolutorPagadurias(MAP_PAGADURIAS, 0.80)
+
+
+@pytest.mark.parametrize("valor", [
+    "SECRETARIA DE EDUCACION DEPARTAMENTAL DEL VALLE",
+    "SECRETARIA DE EDUCACION DEPARTAMENTAL DEL HUILA",
+    "GOBERNACION DEL HUILA PENSIONADOS",
+    "FONDO DE PENSIONES PUBLICAS",
+    "SKANDIA PENSIONES",
+])
+def test_no_confunde_pagadurias_distintas(resolutor, valor):
+    canonico, _, _ = resolutor.resolver(valor)
+    assert canonico is None
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    ("SECRETARIA DE EDUCASION DEPARTAMENTAL DEL TOLIMA", TOLIMA),
+    ("SECRETARIA EDUCACION DEPARTAMENTAL TOLIMA", TOLIMA),
+    ("SKANDYA", "SKANDIA"),
+    ("FONDO DE PENSIONES PROTECION SA", "FONDO DE PENSIONES PROTECCION S.A."),
+])
+def test_resuelve_errores_de_digitacion(resolutor, valor, esperado):
+    canonico, confianza, _ = resolutor.resolver(valor)
+    assert canonico == esperado
+    assert confianza >= 0.80
+
+
+def test_alias_exacto(resolutor):
+    assert resolutor.resolver("GOBIERNO DEPARTAMENTAL DEL TOLIMA") == (TOLIMA, 1.0, "GOBIERNO DEPARTAMENTAL DEL TOLIMA")
+
+
+def test_mapear_y_reporte(resolutor):
+    serie = pd.Series(["Skandya", "SECRETARIA DE EDUCACION DEPARTAMENTAL DEL VALLE", "xyz", "skandia", None])
+    mapeada = resolutor.mapear(serie)
+    assert mapeada.iloc[0] == "SKANDIA"
+    assert mapeada.iloc[1] == "SECRETARIA DE EDUCACION DEPARTAMENTAL DEL VALLE"
+    assert mapeada.iloc[2] == "xyz"
+    assert mapeada.iloc[3] == "SKANDIA"
+
+    reporte = resolutor.reporte().set_index("VALOR")
+    assert reporte.loc["SKANDYA", "ESTADO"] == RESUELTO
+    assert reporte.loc["SECRETARIA DE EDUCACION DEPARTAMENTAL DEL VALLE", "ESTADO"] == BAJA_CONFIANZA
+    assert reporte.loc["SECRETARIA DE EDUCACION DEPARTAMENTAL DEL VALLE", "TOKENS SIN PAR"] == "TOLIMA, VALLE"
+    assert reporte.loc["XYZ", "ESTADO"] == SIN_CANDIDATO
+    assert "SKANDIA" not in reporte.index
+
+
+def test_resolucion_difusa_apagada_por_defecto():
+    assert config.PAGADURIA_RESOLUCION_DIFUSA is False
+    assert ConfigEjecucion().pagaduria_resolucion_difusa is False
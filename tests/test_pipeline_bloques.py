@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+from services.pipeline_bloques import PipelineBloques
+
+
+class _Escritor:
+    def __init__(self):
+        self.partes = []
+
+    def agregar(self, df):
+        self.partes.append(df)
+
+
+class _Comparador:
+    """Evidencia = las filas Avista cuya operación está en el bloque (como con solo_lote)."""
+    cols_re = {"Numero credito"}
+
+    def __init__(self):
+        self.evaluadas = []
+
+    def evaluar_lote(self, df_res, df_avista, col_oper, op_norm=None, cache=None):
+        self.evaluadas.append(df_res["Numero credito"].tolist())
+        return df_avista.loc[op_norm.isin(set(df_res["Numero credito"]))].copy()
+
+
+def test_operacion_repetida_en_otro_bloque_no_duplica_la_evidencia():
+    bloques = [pd.DataFrame({"Numero credito": ["1", "2"]}), pd.DataFrame({"Numero credito": ["2", "3"]})]
+    clon = SimpleNamespace(iter_bloques=lambda tamano: iter(bloques))
+    reestr = SimpleNamespace(reestructurar_df=lambda df, resolutor: df)
+    norm = SimpleNamespace(normalizar_df=lambda df: df)
+    comp = _Comparador()
+    escritores = {e: _Escritor() for e in ("clon", "reestructurado", "evidencia", "normalizado")}
+    avista = pd.DataFrame({"OPERACION": ["1", "2", "3"]})
+
+    pipeline = PipelineBloques(".", ".", ".", tamano_bloque=2)
+    n = pipeline._procesar_bloques(clon, reestr, comp, norm, escritores, avista, "OPERACION",
+                                   avista["OPERACION"], None, None)
+
+    assert n == 2
+    # El "2" del segundo bloque ni se re-evalúa ni se vuelve a escribir
+    assert comp.evaluadas == [["1", "2"], ["3"]]
+    evidencia = pd.concat(escritores["evidencia"].partes)["OPERACION"].tolist()
+    assert evidencia == ["1", "2", "3"]
+    # Las demás etapas conservan todas las filas, como el flujo normal
+    assert sum(len(p) for p in escritores["reestructurado"].partes) == 4
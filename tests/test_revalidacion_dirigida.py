@@ -0,0 +1,56 @@
+import json
+
+import pandas as pd
+
+from services.pipeline_bloques import PipelineBloques
+from services.revalidacion_dirigida import RevalidacionDirigida, leer_operaciones
+from utils.config_ejecucion import ConfigEjecucion
+from utils.normalizacion import norm_num_like
+
+ARTEFACTOS = {"": "Numero credito", "_reestructurado": "Numero credito",
+              "_evidencia_avista_unica": "OPERACION", "_resultado_normalizado": "Numero credito"}
+
+
+def _leer(carpeta) -> dict:
+    """Artefacto -> {operación: fila} de la corrida."""
+    base = next(carpeta.glob("*_reestructurado.xlsx")).name[:-len("_reestructurado.xlsx")]
+    leidos = {}
+    for sufijo, columna in ARTEFACTOS.items():
+        df = pd.read_excel(carpeta / f"{base}{sufijo}.xlsx", dtype=str)
+        leidos[sufijo] = {norm_num_like(f[columna]): f.fillna("").to_dict() for _, f in df.iterrows()}
+    return leidos
+
+
+def test_leer_operaciones():
+    assert leer_operaciones("772025300001, 772025300002\n772025300001.0;") == {"772025300001", "772025300002"}
+
+
+def test_parcha_solo_las_operaciones_pedidas(lote_davinci):
+    cfg = ConfigEjecucion(ruta_jsons=str(lote_davinci.jsons), carpeta_bases_avista=lote_davinci.avista,
+                          carpeta_resultados=lote_davinci.resultados, corrida="c1", aislar=True,
+                          cache_evidencia=False, checkpoints=False)
+    salida = cfg.preparar()
+    assert PipelineBloques(cfg.ruta_jsons, lote_davinci.avista, salida, modo_ingesta=1, cfg=cfg).ejecutar()
+    antes = _leer(salida)
+
+    # Se corrige el plazo de la libranza de la operación 1 y se re-valida sólo esa
+    op = lote_davinci.operaciones[1]
+    ruta = lote_davinci.jsons / "cred_1.json"
+    docs = json.loads(ruta.read_text(encoding="utf-8"))
+    next(d for d in docs if d["tipo_documento"] == "libranza")["data_extraida"]["plazo"] = 48
+    ruta.write_text(json.dumps(docs), encoding="utf-8")
+
+    resumen = RevalidacionDirigida(cfg.con(corrida=None), [op]).ejecutar()
+    assert resumen is not None and resumen["corrida"] == str(salida)
+    assert resumen["sin_json"] == [] and resumen["jsons"] == 1
+    despues = _leer(salida)
+
+    for sufijo in ARTEFACTOS:
+        assert despues[sufijo].keys() == antes[sufijo].keys(), sufijo
+        for clave, fila in antes[sufijo].items():
+            if clave != op:
+                assert despues[sufijo][clave] == fila, (sufijo, clave)
+    assert despues["_reestructurado"][op]["libranza_plazo"] == "48"
+    assert antes["_reestructurado"][op]["libranza_plazo"] == "60"
+    assert despues["_evidencia_avista_unica"][op] != antes["_evidencia_avista_unica"][op]
+    assert next(salida.glob("Davinci_Resultado_*.xlsx"))
@@ -0,0 +1,76 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import config
+from services.clonador_excel import ClonadorExcel
+from services.comparador_avista import ComparadorAvista
+from services.reestructurador_excel import ReestructuradorExcel
+from services.servicio_validacion import ServicioValidacion, crear_servidor
+from utils import esquema
+from utils.config_ejecucion import ConfigEjecucion
+from utils.excel_io import como_texto
+
+
+def _cfg(lote):
+    return ConfigEjecucion(ruta_jsons=str(lote.jsons), carpeta_bases_avista=lote.avista,
+                           carpeta_resultados=lote.resultados, cache_evidencia=False, checkpoints=False)
+
+
+def _evidencia_del_lote(lote, cfg) -> dict:
+    """Evidencia por operación como la deja el pipeline por lotes (clon -> reestructurado -> evaluar_lote)."""
+    salida = str(cfg.carpeta_salida)
+    clon = ClonadorExcel(str(lote.jsons), salida, 1, cfg=cfg)
+    reestr = ReestructuradorExcel(salida, salida, cfg=cfg)
+    comp = ComparadorAvista(salida, lote.avista, salida, solo_lote=True, cfg=cfg)
+    df_clon = clon.construir_df(list(clon._filas()))
+    df_re = reestr.reestructurar_df(esquema.tipar_lectura(como_texto(df_clon), "clon"), reestr.nuevo_resolutor())
+    df_re = esquema.tipar_lectura(como_texto(df_re), "reestructurado")
+    df_avista, col_oper, op_norm = comp.cargar_avista()
+    cols_comp = [c for c in df_re.columns if c in comp.cols_re]
+    hoja = comp.evaluar_lote(df_re[cols_comp].copy(), df_avista, col_oper, op_norm=op_norm)
+    return {op: fila for op, (_, fila) in zip(op_norm.loc[hoja.index], hoja.iterrows())}
+
+
+def test_validar_da_la_misma_evidencia_que_el_lote(lote_davinci):
+    cfg = _cfg(lote_davinci)
+    lote = _evidencia_del_lote(lote_davinci, cfg)
+    servicio = ServicioValidacion(cfg)
+    assert servicio.cargar()
+    for k in (1, 2):
+        respuesta = servicio.validar(f"cred_{k}.json", lote_davinci.json_de(k))
+        op = lote_davinci.operaciones[k]
+        assert respuesta["encontrado_en_avista"]
+        [evidencia] = respuesta["evidencia"]
+        for doc in config.DOCUMENTOS:
+            assert evidencia[doc] == lote[op][doc], doc
+
+
+def test_json_invalido(lote_davinci):
+    servicio = ServicioValidacion(_cfg(lote_davinci))
+    with pytest.raises(ValueError):
+        servicio.validar("roto.json", b"{no es json")
+
+
+def test_http_validar_json_invalido_da_400(lote_davinci):
+    servicio = ServicioValidacion(_cfg(lote_davinci))
+    assert servicio.cargar()
+    servidor = crear_servidor(servicio, "127.0.0.1", 0)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    try:
+        url = f"http://127.0.0.1:{servidor.server_address[1]}/validar?nombre=roto.json"
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(urllib.request.Request(url, data=b"{no es json", method="POST"), timeout=10)
+        assert error.value.code == 400
+        assert "roto.json" in json.loads(error.value.read())["error"]
+
+        ok = urllib.request.Request(url.replace("roto.json", "cred_0.json"), data=lote_davinci.json_de(0), method="POST")
+        with urllib.request.urlopen(ok, timeout=10) as resp:
+            assert json.loads(resp.read())["numero_credito"] == lote_davinci.operaciones[0]
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
@@ -0,0 +1,32 @@
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+from utils.similitud import ratio, similar
+
+
+def _textos(n, semilla):
+    rnd = random.Random(semilla)
+    alfabeto = "ABCDE FGH"
+    return [("".join(rnd.choice(alfabeto) for _ in range(rnd.randint(0, 12))),
+             "".join(rnd.choice(alfabeto) for _ in range(rnd.randint(0, 12)))) for _ in range(n)]
+
+
+@pytest.mark.parametrize("umbral", [0.0, 0.3, 0.5, 0.7, 0.85, 1.0])
+def test_similar_coincide_con_sequencematcher(umbral):
+    for a, b in _textos(400, semilla=int(umbral * 100)):
+        assert similar(a, b, umbral) == (SequenceMatcher(None, a, b).ratio() >= umbral), (a, b)
+
+
+def test_similar_textos_largos_con_autojunk():
+    a = "JUAN CARLOS PEREZ " * 15
+    b = "JUAN CARLOS PERES " * 15
+    for umbral in (0.5, 0.9, 0.99):
+        assert similar(a, b, umbral) == (SequenceMatcher(None, a, b).ratio() >= umbral)
+
+
+def test_ratio_iguales_y_distintos():
+    assert ratio("ABC", "ABC") == 1.0
+    assert ratio("ABC", "XYZ") == 0.0
+    assert ratio("", "") == 1.0
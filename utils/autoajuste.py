@@ -0,0 +1,197 @@
+# utils/autoajuste.py
+"""
+Autoajuste de paralelismo y tamaños de bloque según la entrada y la máquina.
+
+Al arrancar se perfila, sin leer contenidos:
+  - los JSON de la carpeta de entrada (cantidad y tamaños, con os.scandir),
+  - la base Avista más reciente (filas x columnas, de la cabecera del .xlsx),
+  - la máquina (núcleos y memoria disponible; psutil si está instalado).
+
+y se eligen MODO_POR_BLOQUES, TAMANO_BLOQUE, ETAPAS_EN_PARALELO, COLA_PROCESOS y
+COLA_ARCHIVOS_POR_TOMA. Cada decisión queda en el log con su razón. Los parámetros
+en AUTOAJUSTE_FIJOS (o en `fijos`) conservan su valor.
+
+Las estimaciones de memoria son gruesas a propósito: un crédito ocupa en pandas unas
+_FACTOR_JSON veces lo que pesa su JSON (clon + reestructurado + copias tipadas) y una
+celda Avista unos _BYTES_CELDA_AVISTA bytes. La base se cuenta con todas sus columnas,
+que es lo que queda residente con AVISTA_SALIDA_COMPLETA; sin ella sólo se leen las
+columnas de las reglas y la estimación es una cota superior.
+"""
+from __future__ import annotations
+from pathlib import Path
+import logging
+import math
+import os
+from openpyxl import load_workbook
+
+try:
+    import psutil
+except Exception:
+    psutil = None
+
+_FACTOR_JSON = 6
+_BYTES_CELDA_AVISTA = 80
+_FRACCION_MEMORIA = 0.5        # del disponible, para toda la corrida
+_FRACCION_BLOQUE = 0.5         # de lo que le queda a un proceso tras la base Avista
+_BLOQUE_MINIMO, _BLOQUE_MAXIMO = 100, 5000
+_JSONS_POR_PROCESO = 50        # por debajo no compensa lanzar otro proceso
+_TOMAS_POR_PROCESO = 4         # reparto de la cola: ~4 tomas por trabajador
+_MEMORIA_SUPUESTA = 4 * 1024 ** 3
+
+AJUSTABLES = ("modo_por_bloques", "tamano_bloque", "etapas_en_paralelo", "cola_procesos", "cola_archivos_por_toma")
+
+_logger = logging.getLogger("Autoajuste")
+
+
+def _mb(n: float) -> str:
+    return f"{n / 1024 ** 2:,.0f} MB"
+
+
+def memoria_disponible() -> int | None:
+    """Bytes de memoria disponible (None si no se puede saber)."""
+    if psutil is not None:
+        return int(psutil.virtual_memory().available)
+    try:
+        with open("/proc/meminfo", encoding="ascii") as fh:
+            for linea in fh:
+                if linea.startswith("MemAvailable:"):
+                    return int(linea.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _ultimo_avista(carpeta: Path) -> Path | None:
+    if not carpeta.is_dir():
+        return None
+    archivos = [p for p in carpeta.glob("*.xlsx") if p.is_file() and not p.name.startswith("~$")]
+    return max(archivos, key=lambda f: f.stat().st_mtime) if archivos else None
+
+
+def _dimensiones_avista(ruta: Path | None) -> tuple[int, int]:
+    """(filas, columnas) según la cabecera del .xlsx (0, 0 si no se puede)."""
+    if ruta is None:
+        return 0, 0
+    try:
+        wb = load_workbook(ruta, read_only=True)
+        try:
+            ws = wb.worksheets[0]
+            return max(0, (ws.max_row or 1) - 1), ws.max_column or 0
+        finally:
+            wb.close()
+    except Exception as e:
+        _logger.warning(f"No se pudo perfilar la base Avista ({ruta.name}): {e}")
+        return 0, 0
+
+
+class PerfilEntrada:
+    """Lo que se sabe de la entrada y la máquina antes de procesar."""
+    def __init__(self, cfg):
+        tamanos = []
+        self.local = cfg.modo_ingesta == 1
+        if self.local and Path(cfg.ruta_jsons).is_dir():
+            with os.scandir(cfg.ruta_jsons) as it:
+                tamanos = [e.stat().st_size for e in it if e.name.endswith(".json") and e.is_file()]
+        tamanos.sort()
+        self.n_jsons = len(tamanos)
+        self.bytes_jsons = sum(tamanos)
+        self.json_medio = self.bytes_jsons / self.n_jsons if tamanos else 0
+        self.json_p95 = tamanos[min(len(tamanos) - 1, int(len(tamanos) * 0.95))] if tamanos else 0
+        self.avista_filas, self.avista_columnas = _dimensiones_avista(_ultimo_avista(Path(cfg.carpeta_bases_avista)))
+        self.nucleos = os.cpu_count() or 1
+        self.memoria = memoria_disponible()
+
+    @property
+    def memoria_avista(self) -> int:
+        return self.avista_filas * self.avista_columnas * _BYTES_CELDA_AVISTA
+
+    def __str__(self) -> str:
+        memoria = _mb(self.memoria) if self.memoria else "desconocida"
+        return (f"{self.n_jsons} JSON ({_mb(self.bytes_jsons)}, medio {self.json_medio / 1024:,.1f} KB, "
+                f"p95 {self.json_p95 / 1024:,.1f} KB); Avista {self.avista_filas} x {self.avista_columnas}; "
+                f"{self.nucleos} núcleo(s), memoria disponible {memoria}")
+
+
+def proponer(perfil: PerfilEntrada, cfg, parametros=AJUSTABLES) -> tuple[dict, list[tuple[str | None, str]]]:
+    """Valores propuestos para AJUSTABLES y (parámetro, razón) de cada uno (None: nota general)."""
+    valores, razones = {}, []
+    memoria = perfil.memoria or _MEMORIA_SUPUESTA
+    if not perfil.memoria:
+        razones.append((None, f"memoria disponible desconocida: se asume {_mb(memoria)}"))
+    if not perfil.local:
+        razones.append((None, "entrada SFTP: no se perfilan los JSON (sólo la base Avista y la máquina)"))
+    presupuesto = memoria * _FRACCION_MEMORIA
+    por_credito = max(perfil.json_p95, perfil.json_medio, 1) * _FACTOR_JSON
+
+    # Bloques: se activan si el lote entero no cabe en el presupuesto (nunca se desactivan)
+    lote = perfil.n_jsons * por_credito + perfil.memoria_avista
+    no_cabe = lote > presupuesto
+    valores["modo_por_bloques"] = cfg.modo_por_bloques or (no_cabe and cfg.comparacion_solo_lote)
+    razon = f"lote estimado ~{_mb(lote)} vs presupuesto {_mb(presupuesto)} (50% de la memoria)"
+    if no_cabe and not cfg.comparacion_solo_lote and not cfg.modo_por_bloques:
+        razon += ": no cabe, pero con COMPARACION_SOLO_LOTE=False no se usa el modo por bloques"
+    elif cfg.modo_por_bloques:
+        razon += ": modo por bloques ya pedido en la configuración"
+    else:
+        razon += f" -> modo por bloques {'sí' if no_cabe else 'no'}"
+    razones.append(("modo_por_bloques", razon))
+
+    valores["etapas_en_paralelo"] = perfil.nucleos >= 2
+    razones.append(("etapas_en_paralelo", f"{perfil.nucleos} núcleo(s) -> comparación y normalización "
+                                          f"{'en paralelo' if valores['etapas_en_paralelo'] else 'en serie'}"))
+
+    # Trabajadores: uno por núcleo (el pipeline es de CPU), limitado por memoria (cada uno
+    # carga su base Avista) y por lote
+    minimo = perfil.memoria_avista + _BLOQUE_MINIMO * por_credito
+    por_memoria = max(1, int(presupuesto // max(minimo, 1)))
+    por_lote = max(1, math.ceil(perfil.n_jsons / _JSONS_POR_PROCESO))
+    valores["cola_procesos"] = max(1, min(perfil.nucleos, por_memoria, por_lote))
+    razones.append(("cola_procesos", f"procesos: min({perfil.nucleos} núcleos, {por_memoria} por memoria a "
+                                     f"~{_mb(minimo)} c/u, {por_lote} por lote a {_JSONS_POR_PROCESO} JSON c/u)"
+                                     f" = {valores['cola_procesos']}"))
+    procesos = valores["cola_procesos"] if "cola_procesos" in parametros else max(1, int(cfg.cola_procesos))
+
+    # Bloque: la mitad de lo que le queda a cada proceso después de la base Avista
+    libre = max(presupuesto / procesos - perfil.memoria_avista, 0)
+    bloque = int(libre * _FRACCION_BLOQUE // por_credito)
+    valores["tamano_bloque"] = min(_BLOQUE_MAXIMO, max(_BLOQUE_MINIMO, bloque // 50 * 50))
+    razones.append(("tamano_bloque", f"bloque: {_FRACCION_BLOQUE:.0%} de ~{_mb(libre)} libres por proceso "
+                                     f"({procesos}) / ~{por_credito / 1024:,.0f} KB por crédito (p95 x {_FACTOR_JSON})"
+                                     f" = {bloque} -> {valores['tamano_bloque']}"
+                                     f" (entre {_BLOQUE_MINIMO} y {_BLOQUE_MAXIMO})"))
+
+    toma = math.ceil(perfil.n_jsons / (procesos * _TOMAS_POR_PROCESO)) if perfil.n_jsons else 200
+    valores["cola_archivos_por_toma"] = min(1000, max(20, toma))
+    razones.append(("cola_archivos_por_toma", f"toma: {perfil.n_jsons} JSON / ({procesos} x {_TOMAS_POR_PROCESO} "
+                                              f"tomas) -> {valores['cola_archivos_por_toma']} archivo(s)"
+                                              " (entre 20 y 1000)"))
+    return valores, razones
+
+
+def autoajustar(cfg, fijos=(), parametros=AJUSTABLES, logger: logging.Logger | None = None):
+    """
+    Copia de `cfg` con los `parametros` ajustados (la misma `cfg` si AUTOAJUSTE está
+    apagado). `fijos`: parámetros que no se tocan, además de AUTOAJUSTE_FIJOS.
+    """
+    if not cfg.autoajuste:
+        return cfg
+    logger = logger or _logger
+    fijos = set(fijos) | set(cfg.autoajuste_fijos or ())
+    perfil = PerfilEntrada(cfg)
+    logger.info(f"Autoajuste — entrada: {perfil}")
+    valores, razones = proponer(perfil, cfg, parametros)
+    for nombre, razon in razones:
+        if nombre is None or nombre in parametros:
+            logger.info(f"Autoajuste — {razon}")
+    cambios = {}
+    for nombre in parametros:
+        actual = getattr(cfg, nombre)
+        if nombre in fijos:
+            logger.info(f"Autoajuste — {nombre} fijo en {actual!r}")
+        elif valores[nombre] != actual:
+            cambios[nombre] = valores[nombre]
+            logger.info(f"Autoajuste — {nombre}: {actual!r} -> {valores[nombre]!r}")
+    return cfg.con(**cambios) if cambios else cfg
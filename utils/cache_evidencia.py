@@ -0,0 +1,75 @@
+# utils/cache_evidencia.py
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+
+def huella(*partes) -> str:
+    """Hash estable (sha1) de estructuras simples: dicts, listas, textos, números."""
+    crudo = json.dumps(partes, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(crudo.encode("utf-8")).hexdigest()
+
+
+class CacheEvidencia:
+    """
+    Evidencia ya calculada, indexada por el hash de (fila Avista, fila reestructurado,
+    versión del plan de reglas). Se persiste como JSON entre corridas:
+
+        {"plan": "<hash plan>", "filas": {"<hash fila>": {"CEDULA COMPARADA": "OK", ...}}}
+
+    Si el plan de reglas cambia (mapeo, tolerancias...), la caché anterior se descarta.
+    """
+    def __init__(self, ruta: str | Path, plan: str, max_filas: int = 200_000):
+        self.ruta = Path(ruta)
+        self.plan = plan
+        self.max_filas = max_filas
+        self.logger = logging.getLogger("CacheEvidencia")
+        self._previas: dict[str, dict] = {}
+        self._usadas: dict[str, dict] = {}
+        self.aciertos = 0
+        self.fallos = 0
+        self._cargar()
+
+    def _cargar(self):
+        if not self.ruta.exists():
+            return
+        try:
+            data = json.loads(self.ruta.read_text(encoding="utf-8"))
+        except Exception as e:
+            self.logger.warning(f"Caché de evidencia ilegible, se ignora ({self.ruta.name}): {e}")
+            return
+        if data.get("plan") != self.plan:
+            self.logger.info("Plan de reglas cambió: se recalcula toda la evidencia.")
+            return
+        self._previas = data.get("filas", {}) or {}
+
+    def obtener(self, clave: str) -> dict | None:
+        evid = self._usadas.get(clave) or self._previas.get(clave)
+        if evid is None:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        self._usadas[clave] = evid
+        return evid
+
+    def guardar(self, clave: str, evidencia: dict):
+        self._usadas[clave] = evidencia
+
+    def persistir(self):
+        # Se conservan las entradas de corridas previas mientras quepan (lotes distintos)
+        filas = dict(self._previas)
+        filas.update(self._usadas)
+        if len(filas) > self.max_filas:
+            filas = dict(self._usadas)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        # Temporal propio: otra corrida puede estar persistiendo la misma caché
+        tmp = self.ruta.with_name(f"{self.ruta.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"plan": self.plan, "filas": filas}, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.ruta)
+        self.logger.info(
+            f"Caché de evidencia: {self.aciertos} fila(s) reutilizadas, {self.fallos} recalculadas."
+        )
@@ -0,0 +1,125 @@
+# utils/checkpoint.py
+"""
+Puntos de control de etapas largas (clonación, comparación Avista).
+
+Cada etapa agrega a un JSONL en <carpeta de la corrida>/.checkpoints/ lo que ya
+procesó (una línea por unidad: JSON clonado, fila Avista evaluada) y lo vuelca a
+disco cada `cada` unidades. Si la etapa se cae, al reanudar la MISMA corrida se
+recuperan esas unidades y sólo se procesa el resto. Al terminar bien el archivo se
+borra.
+
+    {"firma": "<hash de las entradas>"}          <- cabecera
+    {"clave": "cred_1.json", "datos": {...}}
+    ...
+
+Si la firma no coincide (otras entradas, otras reglas) el checkpoint se ignora.
+Una última línea truncada por la caída se descarta.
+"""
+from __future__ import annotations
+from pathlib import Path
+import json
+import logging
+import os
+
+CARPETA = ".checkpoints"
+
+
+class Checkpoint:
+    def __init__(self, carpeta_corrida: str | Path, etapa: str, firma: str, cada: int = 200):
+        self.ruta = Path(carpeta_corrida) / CARPETA / f"{etapa}.jsonl"
+        self.firma = firma
+        self.cada = max(1, int(cada))
+        self.logger = logging.getLogger("Checkpoint")
+        self._pendientes: list[str] = []
+        self._fh = None
+        self.hechas: dict[str, object] = {}
+
+    def cargar(self) -> dict[str, object]:
+        """Unidades ya procesadas de un intento anterior ({} si no hay o no corresponde)."""
+        if not self.ruta.exists():
+            return {}
+        hechas = {}
+        try:
+            with open(self.ruta, encoding="utf-8") as fh:
+                cabecera = json.loads(fh.readline() or "{}")
+                if cabecera.get("firma") != self.firma:
+                    self.logger.info(f"Checkpoint '{self.ruta.name}' de otras entradas: se ignora.")
+                    return {}
+                for linea in fh:
+                    try:
+                        reg = json.loads(linea)
+                    except ValueError:
+                        break   # última línea a medio escribir
+                    hechas[reg["clave"]] = reg["datos"]
+        except Exception as e:
+            self.logger.warning(f"Checkpoint ilegible, se ignora ({self.ruta.name}): {e}")
+            return {}
+        self.logger.info(f"Reanudando desde checkpoint: {len(hechas)} unidad(es) ya procesadas.")
+        return hechas
+
+    def abrir(self, reanudar: bool) -> dict[str, object]:
+        """Empieza a registrar; con `reanudar` conserva (y devuelve) lo del intento anterior."""
+        self.hechas = self.cargar() if reanudar else {}
+        self.iniciar(self.hechas)
+        return self.hechas
+
+    def iniciar(self, previas: dict[str, object] | None = None) -> None:
+        """Reescribe el checkpoint con la cabecera y las unidades que se conservan."""
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.ruta, "w", encoding="utf-8")
+        self._fh.write(json.dumps({"firma": self.firma}) + "\n")
+        for clave, datos in (previas or {}).items():
+            self._fh.write(json.dumps({"clave": clave, "datos": datos}, ensure_ascii=False, default=str) + "\n")
+        self._volcar_archivo()
+
+    def agregar(self, clave: str, datos) -> None:
+        self._pendientes.append(json.dumps({"clave": clave, "datos": datos}, ensure_ascii=False, default=str))
+        if len(self._pendientes) >= self.cada:
+            self.volcar()
+
+    def volcar(self) -> None:
+        if self._fh is None or not self._pendientes:
+            return
+        self._fh.write("\n".join(self._pendientes) + "\n")
+        self._pendientes = []
+        self._volcar_archivo()
+
+    def _volcar_archivo(self) -> None:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def cerrar(self, completado: bool) -> None:
+        """Completado: se borra. Si no, se deja en disco lo pendiente para reanudar."""
+        if self._fh is not None:
+            if not completado:
+                self.volcar()
+            self._fh.close()
+            self._fh = None
+        if completado:
+            self.ruta.unlink(missing_ok=True)
+            try:
+                self.ruta.parent.rmdir()   # sólo si ya no queda ningún checkpoint
+            except OSError:
+                pass
+
+
+def hay_checkpoints(carpeta_corrida: str | Path) -> bool:
+    carpeta = Path(carpeta_corrida) / CARPETA
+    return carpeta.is_dir() and any(carpeta.glob("*.jsonl"))
+
+
+def ultima_corrida_interrumpida(carpeta_resultados: str | Path) -> str | None:
+    """Nombre de la corrida más reciente de <resultados>/corridas/ que dejó checkpoints."""
+    corridas = Path(carpeta_resultados) / "corridas"
+    if not corridas.is_dir():
+        return None
+    candidatas = sorted((p for p in corridas.iterdir() if p.is_dir() and hay_checkpoints(p)),
+                        key=lambda p: p.stat().st_mtime)
+    return candidatas[-1].name if candidatas else None
+
+
+def corrida_a_reanudar(cfg) -> str | None:
+    """Corrida interrumpida que se puede reanudar con esta ConfigEjecucion (None si no hay)."""
+    if cfg.aislar:
+        return ultima_corrida_interrumpida(cfg.carpeta_resultados)
+    return cfg.corrida if hay_checkpoints(cfg.carpeta_salida) else None
@@ -0,0 +1,153 @@
+# utils/cola_archivos.py
+"""
+Cola de archivos compartida entre trabajadores (mismo equipo o carpeta de red).
+
+Los JSON de la carpeta de entrada no se mueven: cada trabajador los reserva creando
+un archivo de reserva con O_CREAT | O_EXCL (sólo uno gana) y, al terminar, deja una
+marca de hecho con el lote ("shard") donde quedó procesado:
+
+    <cola>/reservas/<archivo>.reserva   {"trabajador": ..., "desde": ...}
+    <cola>/hechos/<archivo>             {"shard": ..., "trabajador": ...}
+
+El trabajador renueva sus reservas (mtime) mientras procesa. Una reserva sin renovar
+por más de `ttl` segundos es de un trabajador caído: otro la toma renombrándola
+(rename atómico: sólo uno lo logra) y la vuelve a crear a su nombre. Entre equipos el
+TTL debe ser bastante mayor que la diferencia de relojes.
+"""
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+
+_SUFIJO = ".reserva"
+
+
+def nuevo_trabajador() -> str:
+    """Identificador único del proceso: <equipo>-<pid>-<aleatorio>."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+
+
+def _crear_exclusivo(ruta: Path, contenido: dict) -> bool:
+    """Crea `ruta` sólo si no existe (atómico). False si otro la creó primero."""
+    try:
+        fd = os.open(ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(json.dumps(contenido, ensure_ascii=False))
+    return True
+
+
+def _leer(ruta: Path) -> dict:
+    try:
+        return json.loads(ruta.read_text(encoding="utf-8") or "{}")
+    except (OSError, ValueError):
+        return {}
+
+
+class ColaArchivos:
+    """Reservas y marcas de hecho de los JSON de `carpeta_jsons`, en `carpeta_cola`."""
+    def __init__(self, carpeta_jsons: str | Path, carpeta_cola: str | Path, trabajador: str, ttl: float = 600):
+        self.carpeta_jsons = Path(carpeta_jsons)
+        self.carpeta_cola = Path(carpeta_cola)
+        self.reservas = self.carpeta_cola / "reservas"
+        self.hechos = self.carpeta_cola / "hechos"
+        self.trabajador = trabajador
+        self.ttl = float(ttl)
+        self.logger = logging.getLogger("ColaArchivos")
+        self.reservas.mkdir(parents=True, exist_ok=True)
+        self.hechos.mkdir(parents=True, exist_ok=True)
+
+    def _reserva(self, nombre: str) -> Path:
+        return self.reservas / f"{nombre}{_SUFIJO}"
+
+    def _vencida(self, ruta: Path) -> bool:
+        try:
+            return time.time() - ruta.stat().st_mtime > self.ttl
+        except FileNotFoundError:
+            return False
+
+    # -------------------- Estado --------------------
+    def archivos(self) -> list[str]:
+        return sorted(p.name for p in self.carpeta_jsons.glob("*.json"))
+
+    def hechos_por_shard(self) -> dict[str, str]:
+        """archivo -> shard donde quedó procesado."""
+        return {p.name: _leer(p).get("shard", "") for p in self.hechos.iterdir() if p.is_file()}
+
+    def pendientes(self) -> list[str]:
+        hechos = {p.name for p in self.hechos.iterdir()}
+        return [n for n in self.archivos() if n not in hechos]
+
+    def reservas_activas(self) -> int:
+        return sum(1 for p in self.reservas.glob(f"*{_SUFIJO}") if not self._vencida(p))
+
+    # -------------------- Reservar / renovar / soltar --------------------
+    def reservar(self, nombre: str) -> bool:
+        """Reserva `nombre` si está libre o su reserva venció (también sirve de cerrojo)."""
+        ruta = self._reserva(nombre)
+        contenido = {"trabajador": self.trabajador, "desde": datetime.now().isoformat(timespec="seconds")}
+        if _crear_exclusivo(ruta, contenido):
+            return True
+        return self._vencida(ruta) and self._robar(ruta, nombre, contenido)
+
+    def reclamar(self, n: int) -> list[str]:
+        """Reserva hasta `n` archivos pendientes."""
+        tomados = []
+        for nombre in self.pendientes():
+            if len(tomados) >= n:
+                break
+            if not self.reservar(nombre):
+                continue
+            if (self.hechos / nombre).exists():   # otro lo terminó entre el listado y la reserva
+                self._reserva(nombre).unlink(missing_ok=True)
+                continue
+            tomados.append(nombre)
+        return tomados
+
+    def _robar(self, ruta: Path, nombre: str, contenido: dict) -> bool:
+        anterior = _leer(ruta).get("trabajador", "?")
+        retirada = ruta.with_name(f"{ruta.name}.{self.trabajador}.vencida")
+        try:
+            os.rename(ruta, retirada)          # si dos lo intentan, sólo uno lo logra
+        except OSError:
+            return False
+        retirada.unlink(missing_ok=True)
+        if not _crear_exclusivo(ruta, contenido):
+            return False
+        self.logger.warning(f"Reserva vencida de '{nombre}' (trabajador {anterior}): se retoma.")
+        return True
+
+    def renovar(self, nombres: list[str]) -> list[str]:
+        """Renueva las reservas propias; devuelve las que se perdieron (tomadas por otro)."""
+        perdidas = []
+        for nombre in nombres:
+            ruta = self._reserva(nombre)
+            if _leer(ruta).get("trabajador") != self.trabajador:
+                perdidas.append(nombre)
+                continue
+            try:
+                os.utime(ruta)
+            except FileNotFoundError:
+                perdidas.append(nombre)
+        return perdidas
+
+    def completar(self, nombres: list[str], shard: str) -> None:
+        """Marca los archivos como hechos en `shard` y suelta sus reservas."""
+        for nombre in nombres:
+            marca = self.hechos / nombre
+            if not _crear_exclusivo(marca, {"shard": shard, "trabajador": self.trabajador}):
+                self.logger.warning(f"'{nombre}' ya estaba marcado como hecho: se conserva la marca anterior.")
+        self.soltar(nombres)
+
+    def soltar(self, nombres: list[str]) -> None:
+        """Libera las reservas propias (p. ej. si el lote falló) para que otro las tome."""
+        for nombre in nombres:
+            ruta = self._reserva(nombre)
+            if _leer(ruta).get("trabajador") == self.trabajador:
+                ruta.unlink(missing_ok=True)
@@ -0,0 +1,119 @@
+# utils/config_ejecucion.py
+"""
+Configuración de UNA corrida del pipeline.
+
+Los servicios leen de aquí las rutas y los parámetros que cambian entre corridas
+(tolerancias, toggles) en lugar de leer/mutar el módulo `config`, así dos lotes
+pueden correr a la vez en la misma máquina. Las tablas de reglas (DOCUMENTOS,
+mapeos, esquema, bloques del normalizador) siguen en `config`: son las mismas para
+todas las corridas.
+
+Con `aislar=True` cada corrida escribe en su propia carpeta
+
+    <carpeta_resultados>/corridas/<corrida>/
+
+y la búsqueda del "último archivo" de cada etapa queda acotada a ella. La caché de
+evidencia sigue compartida en <carpeta_resultados>/.cache/.
+"""
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime
+import uuid
+import config
+
+# atributo -> (nombre en config, valor por defecto)
+_CAMPOS = {
+    "ruta_jsons": ("RUTA_JSONS", ""),
+    "ruta_no_json": ("RUTA_NO_JSON", ""),
+    "carpeta_resultados": ("CARPETA_RESULTADOS_DAVINCI", "."),
+    "carpeta_bases_avista": ("CARPETA_BASES_AVISTA", "."),
+    "modo_ingesta": ("MODO_INGESTA_DEFAULT", 1),
+    "sftp_dir_jsons": ("SFTP_DIR_JSONS", ""),
+    "tolerancia_texto": ("TOLERANCIA_TEXTO", 0.70),
+    "tasa_tolerancia": ("TASA_TOLERANCIA", 0.001),
+    "mostrar_detalle_tasa": ("MOSTRAR_DETALLE_TASA", False),
+    "avista_salida_completa": ("AVISTA_SALIDA_COMPLETA", True),
+    "comparacion_solo_lote": ("COMPARACION_SOLO_LOTE", False),
+    "cache_evidencia": ("CACHE_EVIDENCIA", True),
+    "validar_consistencia_financiera": ("VALIDAR_CONSISTENCIA_FINANCIERA", True),
+    "cuota_tolerancia_relativa": ("CUOTA_TOLERANCIA_RELATIVA", 0.01),
+    "pagaduria_resolucion_difusa": ("PAGADURIA_RESOLUCION_DIFUSA", False),
+    "pagaduria_umbral_confianza": ("PAGADURIA_UMBRAL_CONFIANZA", 0.80),
+    "modo_por_bloques": ("MODO_POR_BLOQUES", False),
+    "tamano_bloque": ("TAMANO_BLOQUE", 500),
+    "etapas_en_paralelo": ("ETAPAS_EN_PARALELO", True),
+    "checkpoints": ("CHECKPOINTS", True),
+    "checkpoint_cada": ("CHECKPOINT_CADA", 200),
+    "cola_archivos_por_toma": ("COLA_ARCHIVOS_POR_TOMA", 200),
+    "cola_ttl_reserva": ("COLA_TTL_RESERVA", 600),
+    "cola_procesos": ("COLA_PROCESOS", 1),
+    "vista_previa_creditos": ("VISTA_PREVIA_CREDITOS", 50),
+    "vista_previa_estrato": ("VISTA_PREVIA_ESTRATO", "pagaduria"),
+    "vista_previa_semilla": ("VISTA_PREVIA_SEMILLA", 0),
+    "autoajuste": ("AUTOAJUSTE", False),
+    "autoajuste_fijos": ("AUTOAJUSTE_FIJOS", ()),
+    # Reanudar desde los checkpoints de la corrida (se indica por corrida, no en config)
+    "reanudar": ("REANUDAR", False),
+}
+
+
+def _nueva_corrida() -> str:
+    return f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{uuid.uuid4().hex[:6]}"
+
+
+class ConfigEjecucion:
+    """
+    Valores de `config` al momento de crearla, con los que se pasen como keyword
+    (mismos nombres en minúscula: ruta_jsons=..., tasa_tolerancia=..., etc.).
+    Cambiar `config` después no afecta a una corrida ya creada.
+    """
+    def __init__(self, corrida: str | None = None, aislar: bool | None = None, **valores):
+        desconocidos = set(valores) - set(_CAMPOS)
+        if desconocidos:
+            raise TypeError(f"Parámetros de corrida desconocidos: {', '.join(sorted(desconocidos))}")
+        for attr, (nombre, defecto) in _CAMPOS.items():
+            setattr(self, attr, valores[attr] if attr in valores else getattr(config, nombre, defecto))
+        self.ruta_jsons = str(self.ruta_jsons)
+        self.ruta_no_json = str(self.ruta_no_json)
+        self.carpeta_resultados = Path(self.carpeta_resultados)
+        self.carpeta_bases_avista = Path(self.carpeta_bases_avista)
+        self.modo_ingesta = 2 if int(self.modo_ingesta or 1) == 2 else 1
+        self.aislar = getattr(config, "CORRIDAS_AISLADAS", True) if aislar is None else aislar
+        self.corrida = corrida or _nueva_corrida()
+
+    @property
+    def carpeta_salida(self) -> Path:
+        """Donde escriben (y buscan su entrada) todas las etapas de la corrida."""
+        if self.aislar:
+            return self.carpeta_resultados / "corridas" / self.corrida
+        return self.carpeta_resultados
+
+    @property
+    def carpeta_cache(self) -> Path:
+        return self.carpeta_resultados / ".cache"
+
+    def preparar(self) -> Path:
+        """Crea la carpeta de salida de la corrida y la devuelve."""
+        salida = self.carpeta_salida
+        salida.mkdir(parents=True, exist_ok=True)
+        return salida
+
+    def ultima_corrida(self, patron: str) -> str | None:
+        """Nombre de la corrida de <resultados>/corridas/ con el archivo `patron` más reciente."""
+        corridas = self.carpeta_resultados / "corridas"
+        if not corridas.is_dir():
+            return None
+        candidatas = [(max(p.stat().st_mtime for p in c.glob(patron)), c.name)
+                      for c in corridas.iterdir() if c.is_dir() and any(c.glob(patron))]
+        return max(candidatas)[1] if candidatas else None
+
+    def con(self, **cambios) -> "ConfigEjecucion":
+        """Copia con algunos valores cambiados (misma corrida salvo que se indique otra)."""
+        valores = {attr: getattr(self, attr) for attr in _CAMPOS}
+        corrida = cambios.pop("corrida", self.corrida)
+        aislar = cambios.pop("aislar", self.aislar)
+        valores.update(cambios)
+        return ConfigEjecucion(corrida=corrida, aislar=aislar, **valores)
+
+    def __repr__(self) -> str:
+        return f"ConfigEjecucion(corrida={self.corrida!r}, salida={str(self.carpeta_salida)!r})"
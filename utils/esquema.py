@@ -0,0 +1,156 @@
+# utils/esquema.py
+"""
+Registro de esquema: tipo lógico de cada columna conocida, por etapa ("clon",
+"reestructurado", "avista"), según config.ESQUEMA_COLUMNAS.
+
+- `tipar_lectura`: al leer un Excel, las llaves quedan como texto canónico y los
+  números como texto numérico canónico ("60.0" -> "60"), una vez por valor distinto.
+  Así ninguna etapa vuelve a adivinar el tipo de lo que escribió la anterior.
+- `tipar_escritura`: al escribir, llaves como texto, numero/tasa como número cuando
+  toda la columna lo es, fecha/texto intactas. Las columnas no declaradas sólo se
+  tipan si se pide `inferir` (regla anterior: número si todos los valores no vacíos lo son).
+"""
+from __future__ import annotations
+from functools import lru_cache
+import re
+import pandas as pd
+import config
+from utils.normalizacion import norm_header
+
+LLAVE = "llave"
+NUMERO = "numero"
+FECHA = "fecha"
+TEXTO = "texto"
+TASA = "tasa"
+
+_RE_MILES_PUNTO = re.compile(r"-?\d{1,3}(?:\.\d{3})+(?:,\d+)?")
+_RE_MILES_COMA = re.compile(r"-?\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+
+
+@lru_cache(maxsize=None)
+def _registro(etapa: str) -> dict[str, str]:
+    return {norm_header(c): t for c, t in config.ESQUEMA_COLUMNAS.get(etapa, {}).items()}
+
+
+def tipo_columna(etapa: str, columna: str) -> str | None:
+    """Tipo declarado de la columna (None si no está en el esquema)."""
+    return _registro(etapa).get(norm_header(columna))
+
+
+# -------------------- Conversores escalares --------------------
+_RE_ENTERO_DECIMAL_CERO = re.compile(r"-?\d+\.(?:0{1,2}|0{4,})")   # "60.0", no "1.000" (miles)
+
+
+def a_llave(v) -> str:
+    """
+    Identificador como texto, tal como viene: los dígitos no se tocan (ceros a la
+    izquierda incluidos). Sólo los números enteros leídos como float (772025300001.0,
+    "60.0") o en notación científica ("7.72025E+11") pasan a entero. Vacíos -> ''.
+    """
+    if v is None or isinstance(v, bool):
+        return "" if v is None else str(v)
+    if isinstance(v, float):
+        if v != v:
+            return ""
+        return str(int(v)) if v.is_integer() else str(v)
+    if isinstance(v, int):
+        return str(v)
+    s = str(v).strip()
+    if _RE_ENTERO_DECIMAL_CERO.fullmatch(s):
+        return s.split(".")[0]
+    if "e" in s.lower():
+        try:
+            f = float(s)
+        except ValueError:
+            return s
+        if f.is_integer():
+            return str(int(f))
+    return s
+
+
+def a_numero(v) -> float | None:
+    """Número desde celda o texto ('$ 1.500.000', '1,500,000.5', '60.0'). None si no es número."""
+    if v is None or isinstance(v, bool):
+        return None
+    if isinstance(v, (int, float)):
+        return None if v != v else float(v)
+    s = str(v).strip().replace("$", "").replace(" ", "")
+    if not s:
+        return None
+    if _RE_MILES_PUNTO.fullmatch(s):
+        s = s.replace(".", "").replace(",", ".")
+    elif _RE_MILES_COMA.fullmatch(s):
+        s = s.replace(",", "")
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def _texto_numero(v):
+    n = a_numero(v)
+    if n is None or n in (float("inf"), float("-inf")):
+        return v
+    return str(int(n)) if n.is_integer() else repr(n)
+
+
+_POCAS_FILAS = 16
+
+
+def _por_valor_distinto(serie: pd.Series, fn) -> pd.Series:
+    """Aplica `fn` una vez por valor distinto no vacío; los vacíos quedan NaN."""
+    if len(serie) <= _POCAS_FILAS:
+        # Pocas filas (un crédito suelto): el bucle evita el costo fijo de pandas por columna
+        valores = serie.tolist()
+        if all(pd.isna(v) for v in valores):
+            return serie
+        return pd.Series([v if pd.isna(v) else fn(v) for v in valores], index=serie.index, dtype=object)
+    presentes = serie.notna()
+    if not presentes.any():
+        return serie
+    mapa = {v: fn(v) for v in pd.unique(serie[presentes])}
+    salida = serie.astype(object).copy()
+    salida[presentes] = serie[presentes].map(mapa)
+    return salida
+
+
+# -------------------- DataFrames --------------------
+def tipar_lectura(df: pd.DataFrame, etapa: str) -> pd.DataFrame:
+    """Llaves y números declarados -> texto canónico (modifica `df`)."""
+    for col in df.columns:
+        tipo = tipo_columna(etapa, col)
+        if tipo == LLAVE:
+            df[col] = _por_valor_distinto(df[col], a_llave)
+        elif tipo == NUMERO:
+            df[col] = _por_valor_distinto(df[col], _texto_numero)
+    return df
+
+
+def _numerica(serie: pd.Series, conversor=None) -> pd.Series | None:
+    """La columna como número si TODOS sus valores no vacíos lo son; si no, None."""
+    if conversor is None:
+        numeros = pd.to_numeric(serie, errors="coerce")
+    else:
+        numeros = pd.to_numeric(_por_valor_distinto(serie, conversor), errors="coerce")
+    # "" / espacios cuentan como vacíos (el reestructurador rellena con "")
+    vacios = serie.isna() | (serie.astype(str).str.strip() == "")
+    return numeros if (numeros.notna() | vacios).all() else None
+
+
+def tipar_escritura(df: pd.DataFrame, etapa: str, inferir: bool = False) -> pd.DataFrame:
+    """Tipos de salida según el esquema (modifica `df`)."""
+    for col in df.columns:
+        tipo = tipo_columna(etapa, col)
+        if tipo != LLAVE and pd.api.types.is_numeric_dtype(df[col].dtype):
+            continue
+        if tipo == LLAVE:
+            df[col] = df[col].map(a_llave)
+        elif tipo == NUMERO:
+            numeros = _numerica(df[col], a_numero)
+            if numeros is not None:
+                df[col] = numeros
+        elif tipo == TASA or (tipo is None and inferir):
+            numeros = _numerica(df[col])
+            if numeros is not None:
+                df[col] = numeros
+    return df
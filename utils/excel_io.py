@@ -0,0 +1,283 @@
+# utils/excel_io.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Callable, Iterable
+import math
+import os
+import pandas as pd
+import shutil
+from openpyxl import Workbook, load_workbook
+
+
+# Textos que pd.read_excel interpreta como vacío por defecto (na_values)
+_NA_TEXTOS = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+
+def _celda(v):
+    """Textos tipo 'nan' / 'NULL' -> None, igual que pd.read_excel."""
+    if isinstance(v, str) and v in _NA_TEXTOS:
+        return None
+    return v
+
+
+def _a_texto(v):
+    """Replica lo que hace pd.read_excel(dtype=str) con una celda de openpyxl."""
+    v = _celda(v)
+    if v is None:
+        return math.nan
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _deduplicar(encabezados: list) -> list:
+    """Encabezados repetidos -> 'X', 'X.1', 'X.2' (mismo criterio que pandas)."""
+    vistos: dict = {}
+    salida = []
+    for h in encabezados:
+        h = "" if h is None else h
+        n = vistos.get(h, 0)
+        salida.append(h if n == 0 else f"{h}.{n}")
+        vistos[h] = n + 1
+    return salida
+
+
+def leer_excel_columnas(
+    ruta: str | Path,
+    incluir: Callable[[str], bool] | Iterable[str] | None = None,
+    como_texto: bool = False,
+    normalizar_encabezado: Callable[[str], str] | None = None,
+    filtro_filas: Callable[[list[str]], Callable[[tuple], bool] | None] | None = None,
+) -> pd.DataFrame:
+    """
+    Lee la primera hoja de un Excel quedándose sólo con las columnas pedidas.
+
+    - `incluir`: función (encabezado -> bool) o colección de encabezados. None = todas.
+      Si se pasa `normalizar_encabezado`, el filtro y las columnas resultantes usan
+      el encabezado ya normalizado.
+    - `como_texto`: equivalente a dtype=str (vacíos -> NaN).
+    - `filtro_filas`: recibe las columnas elegidas y devuelve una función
+      (valores de la fila en ese orden -> bool) o None; sólo se conservan las filas
+      para las que da True (se descartan mientras se lee).
+
+    En .xlsx se recorre la hoja por streaming (openpyxl read_only) y sólo se
+    materializan las celdas de las columnas elegidas; otros formatos caen a
+    pd.read_excel(usecols=...).
+    """
+    ruta = Path(ruta)
+    if incluir is not None and not callable(incluir):
+        permitidas = set(incluir)
+        incluir = permitidas.__contains__
+    norm = normalizar_encabezado or (lambda h: h)
+
+    if ruta.suffix.lower() not in {".xlsx", ".xlsm"}:
+        df = pd.read_excel(
+            ruta,
+            dtype=str if como_texto else None,
+            usecols=(lambda h: incluir(norm(h))) if incluir else None,
+        )
+        df.columns = [norm(c) for c in df.columns]
+        conservar = filtro_filas(list(df.columns)) if filtro_filas else None
+        if conservar is not None:
+            df = df.loc[[conservar(f) for f in df.itertuples(index=False, name=None)]].reset_index(drop=True)
+        return df
+
+    wb = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        filas = ws.iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return pd.DataFrame()
+        nombres = _deduplicar([norm(str(h)) if h is not None else "" for h in encabezado])
+        posiciones = [i for i, h in enumerate(nombres) if h and (incluir is None or incluir(h))]
+        columnas = [nombres[i] for i in posiciones]
+        conservar = filtro_filas(columnas) if filtro_filas else None
+
+        datos = []
+        for fila in filas:
+            if all(v is None for v in fila):
+                continue  # filas totalmente vacías: no aportan nada al cruce
+            valores = [fila[i] if i < len(fila) else None for i in posiciones]
+            if conservar is None or conservar(tuple(valores)):
+                datos.append(valores)
+    finally:
+        wb.close()
+
+    if como_texto:
+        datos = [[_a_texto(v) for v in fila] for fila in datos]
+        return pd.DataFrame(datos, columns=columnas, dtype=object)
+    datos = [[_celda(v) for v in fila] for fila in datos]
+    return pd.DataFrame(datos, columns=columnas).infer_objects()
+
+
+def como_texto(df: pd.DataFrame) -> pd.DataFrame:
+    """El DataFrame tal como quedaría al escribirlo y leerlo con dtype=str (vacíos -> NaN)."""
+    def _valor(v):
+        if v is None or (not isinstance(v, str) and pd.isna(v)):
+            return math.nan
+        return _a_texto(v)
+    return pd.DataFrame({c: [_valor(v) for v in df[c]] for c in df.columns}, index=df.index, dtype=object)
+
+
+class EscritorExcelIncremental:
+    """
+    Arma un .xlsx por bloques sin retener el lote completo: cada bloque se guarda como
+    parte temporal (pickle, conserva tipos) y al cerrar se vuelcan en orden a una sola
+    hoja con la unión de columnas (en orden de aparición), una parte a la vez
+    (openpyxl write_only).
+    """
+    def __init__(self, ruta: str | Path):
+        self.ruta = Path(ruta)
+        self.carpeta_partes = self.ruta.parent / f".partes_{self.ruta.stem}"
+        self.columnas: list[str] = []
+        self.filas = 0
+        self._partes: list[Path] = []
+
+    def agregar(self, df: pd.DataFrame):
+        if df is None or df.empty:
+            return
+        self.carpeta_partes.mkdir(parents=True, exist_ok=True)
+        parte = self.carpeta_partes / f"{len(self._partes):05d}.pkl"
+        df.to_pickle(parte)
+        self._partes.append(parte)
+        self.columnas.extend(c for c in df.columns if c not in self.columnas)
+        self.filas += len(df)
+
+    def descartar(self):
+        """Borra las partes sin escribir el .xlsx (ejecución abortada)."""
+        shutil.rmtree(self.carpeta_partes, ignore_errors=True)
+        self._partes = []
+
+    def cerrar(self) -> Path | None:
+        """Escribe el .xlsx final (None si no llegó ninguna fila) y borra las partes."""
+        try:
+            if not self._partes:
+                return None
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("Sheet1")
+            ws.append(self.columnas)
+            for parte in self._partes:
+                df = pd.read_pickle(parte).reindex(columns=self.columnas)
+                df = df.astype(object).where(df.notna(), None)
+                for fila in df.itertuples(index=False, name=None):
+                    ws.append(fila)
+            wb.save(self.ruta)
+            return self.ruta
+        finally:
+            shutil.rmtree(self.carpeta_partes, ignore_errors=True)
+
+
+def unir_excel(
+    rutas: Iterable[str | Path],
+    destino: str | Path,
+    columna_unica: Callable[[list[str]], str | None] | None = None,
+    normalizar: Callable[[object], str] | None = None,
+) -> int:
+    """
+    Une la primera hoja de varios .xlsx en uno solo (p. ej. las salidas de cada
+    trabajador), con la unión de columnas en orden de aparición. Copia las celdas tal
+    cual, una fila a la vez (openpyxl read_only -> write_only). Devuelve las filas escritas.
+
+    Con `columna_unica` (elige la columna a partir de las columnas unidas) sólo se
+    escribe la primera fila de cada valor, `normalizar`-do; las filas con ese valor
+    vacío se escriben todas.
+    """
+    rutas = [Path(r) for r in rutas]
+    encabezados = []
+    for ruta in rutas:
+        wb = load_workbook(ruta, read_only=True)
+        try:
+            fila = next(wb.worksheets[0].iter_rows(values_only=True), None)
+        finally:
+            wb.close()
+        encabezados.append(list(fila or ()))
+    columnas = []
+    for enc in encabezados:
+        columnas.extend(h for h in enc if h is not None and h not in columnas)
+
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    salida = Workbook(write_only=True)
+    ws_salida = salida.create_sheet("Sheet1")
+    ws_salida.append(columnas)
+    unica = columna_unica(columnas) if columna_unica is not None else None
+    i_unica = columnas.index(unica) if unica in columnas else None
+    normalizar = normalizar or (lambda v: "" if v is None else str(v).strip())
+    vistos: set[str] = set()
+    n = 0
+    for ruta, enc in zip(rutas, encabezados):
+        if not enc:
+            continue
+        posiciones = {h: i for i, h in enumerate(enc) if h is not None}
+        orden = [posiciones.get(c) for c in columnas]
+        wb = load_workbook(ruta, read_only=True)
+        try:
+            filas = wb.worksheets[0].iter_rows(values_only=True)
+            next(filas, None)
+            for fila in filas:
+                if all(v is None for v in fila):
+                    continue
+                fila = [fila[i] if i is not None and i < len(fila) else None for i in orden]
+                if i_unica is not None:
+                    valor = normalizar(fila[i_unica])
+                    if valor in vistos:
+                        continue
+                    if valor:
+                        vistos.add(valor)
+                ws_salida.append(fila)
+                n += 1
+        finally:
+            wb.close()
+    salida.save(destino)
+    return n
+
+
+def reemplazar_filas(
+    ruta: str | Path,
+    nuevas: pd.DataFrame,
+    columna: str,
+    claves: set[str],
+    normalizar: Callable[[object], str],
+) -> tuple[int, int]:
+    """
+    Reescribe `ruta` (primera hoja) sin las filas cuya `columna`, normalizada, está en
+    `claves`, y agrega al final las filas de `nuevas` (columnas nuevas, al final). El
+    resto se copia tal cual, una fila a la vez. Devuelve (conservadas, retiradas).
+    """
+    ruta = Path(ruta)
+    temporal = ruta.with_name(f".{ruta.stem}.{os.getpid()}.tmp.xlsx")
+    wb = load_workbook(ruta, read_only=True)
+    try:
+        filas = wb.worksheets[0].iter_rows(values_only=True)
+        encabezado = list(next(filas, None) or ())
+        if columna not in encabezado:
+            raise ValueError(f"{ruta.name} no tiene la columna '{columna}'.")
+        i = encabezado.index(columna)
+        columnas = encabezado + [c for c in nuevas.columns if c not in encabezado]
+
+        salida = Workbook(write_only=True)
+        ws = salida.create_sheet("Sheet1")
+        ws.append(columnas)
+        conservadas = retiradas = 0
+        for fila in filas:
+            if all(v is None for v in fila):
+                continue
+            if i < len(fila) and normalizar(fila[i]) in claves:
+                retiradas += 1
+                continue
+            ws.append(list(fila) + [None] * (len(columnas) - len(fila)))
+            conservadas += 1
+        df = nuevas.reindex(columns=columnas)
+        df = df.astype(object).where(df.notna(), None)
+        for fila in df.itertuples(index=False, name=None):
+            ws.append(fila)
+        salida.save(temporal)
+    finally:
+        wb.close()
+    os.replace(temporal, ruta)
+    return conservadas, retiradas
@@ -0,0 +1,181 @@
+# utils/fechas.py
+"""
+Parseo de fechas por columna.
+
+En vez de llamar pd.to_datetime valor por valor (con reintentos dayfirst/yearfirst),
+se detecta UNA vez el formato dominante de la columna sobre una muestra, se parsea
+toda la columna vectorizado con ese formato explícito y sólo los valores atípicos
+pasan por el parseo flexible. El resultado queda en un memo que usan las funciones
+escalares (`parsear_fecha`), así el comparador fila a fila no vuelve a parsear.
+"""
+from __future__ import annotations
+from datetime import date, datetime
+import re
+import warnings
+import pandas as pd
+from utils.normalizacion import strip_accents
+
+MESES = {"ENE": "01", "FEB": "02", "MAR": "03", "ABR": "04", "MAY": "05", "JUN": "06",
+         "JUL": "07", "AGO": "08", "SEP": "09", "OCT": "10", "NOV": "11", "DIC": "12"}
+
+_RE_MES = re.compile(r"/(" + "|".join(MESES) + r")/")
+_RE_DMY_MES = re.compile(r"^(\d{1,2})/([A-Z]{3})/(\d{2,4})(?:\s+.*)?$")
+_RE_YMD = re.compile(r"^(\d{4})/(\d{1,2})/(\d{1,2})(?:\s+.*)?$")
+
+# Formatos candidatos (los textos ya vienen con '/' en lugar de '-')
+FORMATOS = (
+    "%d/%m/%Y",
+    "%Y/%m/%d",
+    "%d/%m/%y",
+    "%d/%m/%Y %H:%M:%S",
+    "%Y/%m/%d %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%Y/%m/%d %H:%M",
+)
+_MUESTRA = 200
+_MAX_MEMO = 100_000
+_memo: dict = {}
+
+
+# -------------------- Texto de fecha --------------------
+def texto_fecha(x):
+    """MAYÚSCULAS, '-' -> '/', y meses abreviados (ENE..DIC) -> número. No-texto se devuelve igual."""
+    if not isinstance(x, str):
+        return x
+    up = x.upper().replace("-", "/")
+    return _RE_MES.sub(lambda m: f"/{MESES[m.group(1)]}/", up)
+
+
+def texto_fecha_serie(serie: pd.Series) -> pd.Series:
+    """Versión vectorizada de `texto_fecha` (los no-texto quedan intactos)."""
+    es_texto = serie.map(lambda v: isinstance(v, str), na_action="ignore").fillna(False).astype(bool)
+    if not es_texto.any():
+        return serie
+    up = serie[es_texto].str.upper().str.replace("-", "/", regex=False)
+    up = up.str.replace(_RE_MES, lambda m: f"/{MESES[m.group(1)]}/", regex=True)
+    salida = serie.astype(object).copy()
+    salida[es_texto] = up.astype(object)
+    return salida
+
+
+def _canonico(v) -> str:
+    """Texto comparable: sin tildes, MAYÚSCULAS, '/' como separador, DD/MMM/AAAA -> DD/MM/AAAA."""
+    up = strip_accents(str(v).strip()).upper().replace("-", "/")
+    m = _RE_DMY_MES.match(up)
+    if m and m.group(2) in MESES:
+        up = f"{m.group(1).zfill(2)}/{MESES[m.group(2)]}/{m.group(3)}"
+    return up
+
+
+def _vacio(v) -> bool:
+    if v is None:
+        return True
+    try:
+        if pd.isna(v):
+            return True
+    except (TypeError, ValueError):
+        return False
+    return isinstance(v, str) and not v.strip()
+
+
+# -------------------- Parseo flexible (valores atípicos) --------------------
+def _parsear_flexible(up: str) -> pd.Timestamp | None:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        dt = pd.to_datetime(up, dayfirst=True, errors="coerce")
+        if pd.isna(dt):
+            m = _RE_YMD.match(up)
+            if m:
+                dt = pd.to_datetime(f"{m.group(3).zfill(2)}/{m.group(2).zfill(2)}/{m.group(1)}",
+                                    dayfirst=True, errors="coerce")
+        if pd.isna(dt):
+            dt = pd.to_datetime(up, yearfirst=True, errors="coerce")
+    return None if pd.isna(dt) else pd.Timestamp(dt)
+
+
+# -------------------- Inferencia de formato --------------------
+def inferir_formato(textos: pd.Series) -> str | None:
+    """Formato de FORMATOS que más valores de la muestra parsea (None si ninguno)."""
+    distintos = pd.Series(pd.unique(textos.dropna()))
+    distintos = distintos[distintos != ""]
+    if distintos.empty:
+        return None
+    muestra = distintos.head(_MUESTRA)
+    mejor, aciertos_mejor = None, 0
+    for fmt in FORMATOS:
+        aciertos = int(pd.to_datetime(muestra, format=fmt, errors="coerce").notna().sum())
+        if aciertos > aciertos_mejor:
+            mejor, aciertos_mejor = fmt, aciertos
+            if aciertos == len(muestra):
+                break
+    return mejor
+
+
+def parsear_serie(serie: pd.Series, formato: str | None = None) -> pd.Series:
+    """
+    Parsea una columna completa a Timestamp (NaT si no es fecha).
+    Formato explícito (dado o inferido) vectorizado + parseo flexible sólo para atípicos.
+    """
+    directos = serie.map(lambda v: isinstance(v, (datetime, date)), na_action="ignore").fillna(False).astype(bool)
+    textos = serie.map(lambda v: "" if _vacio(v) else _canonico(v)).astype(object)
+    textos[directos] = ""
+
+    formato = formato or inferir_formato(textos)
+    if formato:
+        salida = pd.to_datetime(textos, format=formato, errors="coerce")
+    else:
+        salida = pd.Series(pd.NaT, index=serie.index, dtype="datetime64[ns]")
+    if directos.any():
+        salida[directos] = pd.to_datetime(serie[directos].astype(object), errors="coerce")
+
+    atipicos = salida.isna() & (textos != "")
+    if atipicos.any():
+        resueltos = {t: _parsear_flexible(t) for t in pd.unique(textos[atipicos])}
+        salida[atipicos] = textos[atipicos].map(lambda t: resueltos[t] if resueltos[t] is not None else pd.NaT)
+    return salida
+
+
+# -------------------- Escalares con memo --------------------
+def precargar(serie: pd.Series) -> None:
+    """Parsea la columna de una vez y deja cada valor distinto en el memo de `parsear_fecha`."""
+    if len(_memo) > _MAX_MEMO:
+        _memo.clear()
+    presentes = serie[serie.map(lambda v: not _vacio(v))]
+    if presentes.empty:
+        return
+    distintos = pd.Series(pd.unique(presentes.astype(object)), dtype=object)
+    parseadas = parsear_serie(distintos)
+    for v, dt in zip(distintos, parseadas):
+        try:
+            _memo[v] = None if pd.isna(dt) else dt
+        except TypeError:
+            pass
+
+
+def parsear_fecha(v) -> pd.Timestamp | None:
+    """Fecha de un valor suelto (usa el memo que llenó `precargar`)."""
+    if _vacio(v):
+        return None
+    try:
+        return _memo[v]
+    except (KeyError, TypeError):
+        pass
+    if isinstance(v, (datetime, date)):
+        dt = pd.Timestamp(v)
+    else:
+        dt = _parsear_flexible(_canonico(v))
+    if len(_memo) > _MAX_MEMO:
+        _memo.clear()
+    try:
+        _memo[v] = dt
+    except TypeError:
+        pass
+    return dt
+
+
+def norm_fecha(v) -> str:
+    """Fecha como DD/MM/AAAA cuando es reconocible; si no, el texto canónico."""
+    if _vacio(v):
+        return ""
+    dt = parsear_fecha(v)
+    return dt.strftime("%d/%m/%Y") if dt is not None else _canonico(v)
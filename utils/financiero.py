@@ -0,0 +1,34 @@
+# utils/financiero.py
+"""
+Cálculos financieros vectorizados (NumPy) para validar la coherencia de un crédito.
+"""
+from __future__ import annotations
+import numpy as np
+
+
+def cuota_francesa(monto, plazo, tasa_mensual) -> np.ndarray:
+    """
+    Cuota fija del sistema francés para arreglos de monto, plazo (meses) y tasa mensual (fracción):
+
+        cuota = P * i / (1 - (1 + i) ** -n)        (P / n cuando i == 0)
+
+    Devuelve NaN donde falten datos o no tengan sentido (monto/plazo <= 0, tasa < 0).
+    """
+    p = np.asarray(monto, dtype=float)
+    n = np.asarray(plazo, dtype=float)
+    i = np.asarray(tasa_mensual, dtype=float)
+
+    validos = (p > 0) & (n > 0) & (i >= 0)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        con_interes = p * i / (1.0 - np.power(1.0 + i, -n))
+        sin_interes = p / n
+        cuota = np.where(i > 0, con_interes, sin_interes)
+    return np.where(validos, cuota, np.nan)
+
+
+def dentro_de_tolerancia(calculada, declarada, tolerancia_relativa: float) -> np.ndarray:
+    """|calculada - declarada| <= tolerancia * declarada (False donde falte alguno)."""
+    c = np.asarray(calculada, dtype=float)
+    d = np.asarray(declarada, dtype=float)
+    with np.errstate(invalid="ignore"):
+        return np.abs(c - d) <= tolerancia_relativa * np.abs(d)
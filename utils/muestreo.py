@@ -0,0 +1,47 @@
+# utils/muestreo.py
+"""
+Muestras determinísticas y estratificadas de nombres de archivo.
+
+El orden de cada archivo sale de un hash (sha1) de "<semilla>:<nombre>": la misma
+carpeta y semilla dan siempre la misma muestra, y agregar archivos nuevos no
+reordena los que ya estaban.
+"""
+from __future__ import annotations
+from typing import Callable, Hashable, Iterable
+import hashlib
+
+
+def orden_estable(nombres: Iterable[str], semilla: int | str = 0) -> list[str]:
+    """Los nombres en un orden pseudoaleatorio reproducible."""
+    return sorted(nombres, key=lambda n: hashlib.sha1(f"{semilla}:{n}".encode("utf-8")).hexdigest())
+
+
+def muestra_estratificada(
+    nombres: Iterable[str],
+    n: int,
+    estrato: Callable[[str], Hashable],
+    semilla: int | str = 0,
+    sobremuestreo: int = 5,
+) -> tuple[list[str], dict]:
+    """
+    Hasta `n` nombres repartidos por turnos entre los estratos (uno de cada estrato
+    por vuelta), de modo que los estratos pequeños también queden representados.
+
+    Sólo se evalúa `estrato(nombre)` (p. ej. abrir el JSON) para los primeros
+    `n * sobremuestreo` nombres del orden estable, no para toda la carpeta.
+    Devuelve (muestra, {estrato: cantidad en la muestra}).
+    """
+    candidatos = orden_estable(nombres, semilla)[:max(n * sobremuestreo, n)]
+    grupos: dict = {}
+    for nombre in candidatos:
+        grupos.setdefault(estrato(nombre), []).append(nombre)
+
+    muestra, conteo = [], {}
+    vuelta = 0
+    while len(muestra) < n and any(len(g) > vuelta for g in grupos.values()):
+        for clave, grupo in grupos.items():
+            if vuelta < len(grupo) and len(muestra) < n:
+                muestra.append(grupo[vuelta])
+                conteo[clave] = conteo.get(clave, 0) + 1
+        vuelta += 1
+    return muestra, conteo
@@ -0,0 +1,61 @@
+# utils/nombres.py
+"""
+Comparación de NOMBRE COMPLETO por tokens.
+
+Las cuatro partes del nombre en Avista se tokenizan una vez por crédito (vectorizado
+sobre el lote) y cada nombre completo extraído se tokeniza una vez por valor distinto.
+Una parte está presente si TODOS sus tokens aparecen como tokens del nombre completo,
+así "ANA" no coincide dentro de "SANTANA" (lo que sí pasaba con `in` sobre el texto).
+"""
+from __future__ import annotations
+from functools import lru_cache
+import re
+import pandas as pd
+from utils.normalizacion import norm_text, norm_text_serie
+
+PARTES_NOMBRE = ("PRIMER NOMBRE", "SEGUNDO NOMBRE", "PRIMER APELLIDO", "SEGUNDO APELLIDO")
+
+_RE_TOKEN = re.compile(r"[A-Z0-9]+")
+_MAX_MEMO = 131_072
+
+# Partes de un nombre Avista: ((etiqueta, tokens), ...) sólo con las partes no vacías
+PartesNombre = tuple[tuple[str, frozenset], ...]
+
+
+@lru_cache(maxsize=_MAX_MEMO)
+def tokens_nombre(texto: str) -> frozenset[str]:
+    """Tokens de un nombre ya normalizado (sin tildes, MAYÚSCULAS)."""
+    return frozenset(_RE_TOKEN.findall(texto))
+
+
+def partes_avista(fila: pd.Series) -> PartesNombre:
+    """Partes del nombre de una fila Avista."""
+    partes = []
+    for etiqueta in PARTES_NOMBRE:
+        toks = tokens_nombre(norm_text(fila.get(etiqueta, "")))
+        if toks:
+            partes.append((etiqueta, toks))
+    return tuple(partes)
+
+
+def partes_avista_serie(df: pd.DataFrame) -> pd.Series:
+    """`partes_avista` para todo el lote, normalizando una vez por valor distinto."""
+    tokens = {}
+    for etiqueta in PARTES_NOMBRE:
+        if etiqueta in df.columns:
+            tokens[etiqueta] = norm_text_serie(df[etiqueta]).map(tokens_nombre)
+    partes = [
+        tuple((etiqueta, toks) for etiqueta, toks in zip(tokens, fila) if toks)
+        for fila in zip(*tokens.values())
+    ] if tokens else [()] * len(df)
+    return pd.Series(partes, index=df.index, dtype=object)
+
+
+@lru_cache(maxsize=_MAX_MEMO)
+def evidencia_nombre(partes: PartesNombre, nombre_completo: str) -> tuple[str, ...]:
+    """("OK",) / ("FALLO <PARTE>", ...) / ("ND-AV NOMBRE COMPLETO",)."""
+    if not partes:
+        return ("ND-AV NOMBRE COMPLETO",)
+    disponibles = tokens_nombre(norm_text(nombre_completo))
+    fallos = [etiqueta for etiqueta, toks in partes if not toks <= disponibles]
+    return ("OK",) if not fallos else tuple(f"FALLO {etiqueta}" for etiqueta in fallos)
@@ -0,0 +1,130 @@
+# utils/normalizacion.py
+"""
+Núcleo único de normalización (tildes, textos, llaves y números tipo cédula/crédito).
+
+- Quitar tildes es por tabla: cada carácter no ASCII se descompone UNA vez y queda
+  en la tabla de `str.translate`; los textos ASCII ni siquiera se recorren.
+- Las funciones escalares tienen memo acotado (LRU), porque los mismos créditos,
+  cédulas y pagadurías se repiten muchas veces por corrida.
+- Las variantes *_serie trabajan sobre pd.Series calculando una vez por valor distinto.
+"""
+from __future__ import annotations
+from functools import lru_cache, wraps
+import re
+import unicodedata
+import pandas as pd
+
+_MAX_MEMO = 262_144
+# Parte decimal en cero que NO es un grupo de miles (3 dígitos): "60.0", "60.00", "1500000.0000"
+_RE_DECIMAL_CERO = re.compile(r"-?\d+\.(?:0{1,2}|0{4,})")
+
+
+# -------------------- Tildes por tabla --------------------
+class _TablaAcentos(dict):
+    """Tabla para str.translate que se llena sola: código -> carácter sin marcas (Mn)."""
+    def __missing__(self, codigo: int) -> str:
+        c = chr(codigo)
+        base = "".join(x for x in unicodedata.normalize("NFD", c) if unicodedata.category(x) != "Mn")
+        self[codigo] = base
+        return base
+
+
+_TABLA_ACENTOS = _TablaAcentos()
+
+
+def strip_accents(s) -> str:
+    s = str(s)
+    if s.isascii():
+        return s
+    return s.translate(_TABLA_ACENTOS)
+
+
+# -------------------- Memo acotado --------------------
+def _memo(fn):
+    """lru_cache tipado (1 != 1.0 != True) que tolera valores no hashables."""
+    cacheada = lru_cache(maxsize=_MAX_MEMO, typed=True)(fn)
+
+    @wraps(fn)
+    def envoltura(v):
+        try:
+            return cacheada(v)
+        except TypeError:
+            return fn(v)
+
+    envoltura.cache_info = cacheada.cache_info
+    envoltura.cache_clear = cacheada.cache_clear
+    return envoltura
+
+
+def _vacio_escalar(v) -> bool:
+    return v is None or (isinstance(v, float) and v != v) or v is pd.NA or v is pd.NaT
+
+
+# -------------------- Escalares --------------------
+@_memo
+def norm_header(h) -> str:
+    """Encabezado: sin tildes, sin espacios en los extremos, MAYÚSCULAS."""
+    return strip_accents(str(h)).strip().upper()
+
+
+@_memo
+def norm_text(v) -> str:
+    """Texto: sin tildes, MAYÚSCULAS, espacios simples. Vacíos -> ''."""
+    if _vacio_escalar(v):
+        return ""
+    return " ".join(strip_accents(str(v)).upper().split())
+
+
+def norm_key(s) -> str:
+    """Clave normalizada para mapas (pagadurías...): mismo criterio que norm_text."""
+    return norm_text(s)
+
+
+@_memo
+def norm_num_like(v) -> str:
+    """
+    Número tipo llave (cédula, crédito): sin separadores ni notación científica.
+    Un ".0" de celda numérica se quita ("60.0" -> "60"); cualquier otro punto o coma
+    se trata como separador, como siempre ("1.234" -> "1234", "2.5" -> "25").
+    """
+    if _vacio_escalar(v):
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    s = str(v).strip()
+    if _RE_DECIMAL_CERO.fullmatch(s):
+        return str(int(s.split(".")[0]))
+    try:
+        if "e" in s.lower():
+            return str(int(float(s)))
+    except Exception:
+        pass
+    s2 = s.replace(".", "").replace(",", "").replace(" ", "")
+    try:
+        f = float(s2)
+        return str(int(f)) if f.is_integer() else str(int(round(f)))
+    except Exception:
+        return s2
+
+
+# -------------------- Series (una vez por valor distinto) --------------------
+def _por_valor_distinto(serie: pd.Series, fn) -> pd.Series:
+    presentes = serie.notna()
+    mapa = {v: fn(v) for v in pd.unique(serie[presentes])}
+    salida = serie.map(mapa)
+    if not presentes.all():
+        salida = salida.astype(object)
+        salida[~presentes] = fn(None)
+    return salida.astype(object)
+
+
+def norm_text_serie(serie: pd.Series) -> pd.Series:
+    return _por_valor_distinto(serie, norm_text)
+
+
+def norm_key_serie(serie: pd.Series) -> pd.Series:
+    return _por_valor_distinto(serie, norm_key)
+
+
+def norm_num_serie(serie: pd.Series) -> pd.Series:
+    return _por_valor_distinto(serie, norm_num_like)
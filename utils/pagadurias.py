@@ -0,0 +1,161 @@
+# utils/pagadurias.py
+"""
+Resolución difusa de pagadurías que no están en el mapa de alias.
+
+Se indexan UNA vez los alias conocidos y los nombres canónicos (ya normalizados
+con norm_key) por token y por trigrama de caracteres. Un valor sin mapeo exacto
+se compara con los candidatos que comparten trigramas/tokens con él, token a token
+(cada token con su par más parecido, tolerando errores de digitación):
+
+    confianza = Dice de tokens informativos, ponderado por la similitud de cada par
+
+Sólo se resuelve si TODOS los tokens informativos de ambos lados tienen par: un
+token sin par ("VALLE" frente a "TOLIMA", "PENSIONES" frente a "SKANDIA") es justo
+lo que distingue una pagaduría de otra, así que el valor queda igual aunque el resto
+coincida. Los números (NIT, año) sólo cuentan si ambos lados traen alguno.
+
+Por encima del umbral se toma el canónico del mejor candidato; si no, el valor
+queda igual y se reporta para curaduría (junto con los resueltos por aproximación,
+para que se agreguen al mapa).
+"""
+from __future__ import annotations
+from collections import Counter, defaultdict
+import re
+import pandas as pd
+from utils.normalizacion import norm_key, norm_key_serie
+from utils.similitud import ratio
+
+RESUELTO = "RESUELTO (DIFUSO)"
+BAJA_CONFIANZA = "BAJA CONFIANZA"
+SIN_CANDIDATO = "SIN CANDIDATO"
+
+# Tokens que no distinguen una pagaduría de otra
+_VACIOS = {"S", "A", "SA", "SAS", "DE", "DEL", "LA", "LAS", "LOS", "Y", "E", "NIT"}
+_RE_TOKEN = re.compile(r"[A-Z0-9]+")
+# Similitud mínima para que dos tokens cuenten como el mismo (EDUCASION ~ EDUCACION: 0.89,
+# PENSIONES ~ PENSIONADOS: 0.80 no)
+_UMBRAL_TOKEN = 0.85
+
+
+def _tokens(clave: str) -> frozenset[str]:
+    return frozenset(t for t in _RE_TOKEN.findall(clave) if t not in _VACIOS)
+
+
+def _trigramas(clave: str) -> frozenset[str]:
+    s = f"  {' '.join(_RE_TOKEN.findall(clave))} "
+    return frozenset(s[i:i + 3] for i in range(len(s) - 2))
+
+
+class ResolutorPagadurias:
+    """
+    `mapa`: alias normalizado (norm_key) -> nombre canónico. Los canónicos también
+    se indexan (un valor que ya es canónico se resuelve a sí mismo).
+    """
+    def __init__(self, mapa: dict[str, str], umbral: float = 0.80):
+        self.umbral = float(umbral)
+        self._exactos: dict[str, str] = dict(mapa)
+        for canonico in set(mapa.values()):
+            self._exactos.setdefault(norm_key(canonico), canonico)
+
+        self._claves = list(self._exactos)
+        self._toks = [_tokens(c) for c in self._claves]
+        self._idx_trig: dict[str, list[int]] = defaultdict(list)
+        self._idx_tok: dict[str, list[int]] = defaultdict(list)
+        for i, (clave, toks) in enumerate(zip(self._claves, self._toks)):
+            for g in _trigramas(clave):
+                self._idx_trig[g].append(i)
+            for t in toks:
+                self._idx_tok[t].append(i)
+
+        self._memo: dict[str, tuple[str | None, float, str, list[str]]] = {}
+        self._vistos: Counter = Counter()
+
+    # -------------------- Un valor --------------------
+    @staticmethod
+    def _pares(toks: frozenset[str], otros: frozenset[str]) -> tuple[float, list[str]]:
+        """(suma de similitudes de cada token con su mejor par, tokens sin par)."""
+        suma, sin_par = 0.0, []
+        for t in toks:
+            mejor = max((1.0 if t == o else ratio(t, o) for o in otros), default=0.0)
+            if mejor >= _UMBRAL_TOKEN:
+                suma += mejor
+            else:
+                sin_par.append(t)
+        return suma, sin_par
+
+    def _comparar(self, toks: frozenset[str], otros: frozenset[str]) -> tuple[float, list[str]]:
+        """(confianza, tokens sin par de ambos lados) entre dos conjuntos de tokens."""
+        if not (any(t.isdigit() for t in toks) and any(o.isdigit() for o in otros)):
+            toks = frozenset(t for t in toks if not t.isdigit())
+            otros = frozenset(o for o in otros if not o.isdigit())
+        if not toks or not otros:
+            return 0.0, sorted(toks | otros)
+        suma_a, sin_par_a = self._pares(toks, otros)
+        suma_b, sin_par_b = self._pares(otros, toks)
+        return (suma_a + suma_b) / (len(toks) + len(otros)), sorted(set(sin_par_a) | set(sin_par_b))
+
+    def _mejor_candidato(self, clave: str) -> tuple[int | None, float, list[str]]:
+        """(índice, confianza, tokens sin par) del mejor candidato; primero los que no dejan tokens sin par."""
+        toks = _tokens(clave)
+        candidatos = {i for g in _trigramas(clave) for i in self._idx_trig.get(g, ())}
+        candidatos |= {i for t in toks for i in self._idx_tok.get(t, ())}
+
+        mejor, puntaje, sin_par = None, 0.0, []
+        for i in sorted(candidatos):
+            p, faltan = self._comparar(toks, self._toks[i])
+            if mejor is None or (not faltan, p) > (not sin_par, puntaje):
+                mejor, puntaje, sin_par = i, p, faltan
+        return mejor, puntaje, sin_par
+
+    def resolver(self, clave: str) -> tuple[str | None, float, str]:
+        """(canónico o None, confianza, alias candidato) para una clave normalizada."""
+        if clave in self._memo:
+            return self._memo[clave][:3]
+        if clave in self._exactos:
+            res = (self._exactos[clave], 1.0, clave, [])
+        else:
+            i, puntaje, sin_par = self._mejor_candidato(clave)
+            candidato = self._claves[i] if i is not None else ""
+            resuelto = i is not None and not sin_par and puntaje >= self.umbral
+            res = (self._exactos[candidato] if resuelto else None, puntaje, candidato, sin_par)
+        self._memo[clave] = res
+        return res[:3]
+
+    # -------------------- Columnas --------------------
+    def mapear(self, serie: pd.Series) -> pd.Series:
+        """Reemplaza cada valor por su canónico (exacto o difuso); sin resolución queda igual."""
+        claves = norm_key_serie(serie)
+        presentes = claves != ""
+        conteo = claves[presentes].value_counts()
+        mapa = {}
+        for clave, n in conteo.items():
+            canonico, confianza, _ = self.resolver(clave)
+            if clave not in self._exactos:
+                self._vistos[clave] += int(n)
+            if canonico is not None:
+                mapa[clave] = canonico
+        mapeados = claves.map(mapa)
+        return mapeados.where(mapeados.notna(), serie)
+
+    def reporte(self) -> pd.DataFrame:
+        """Valores sin mapeo exacto vistos en las columnas mapeadas, para curaduría."""
+        filas = []
+        for clave, n in self._vistos.most_common():
+            canonico, confianza, candidato, sin_par = self._memo[clave]
+            if canonico is not None:
+                estado = RESUELTO
+            elif candidato:
+                estado = BAJA_CONFIANZA
+            else:
+                estado = SIN_CANDIDATO
+            filas.append({
+                "VALOR": clave,
+                "OCURRENCIAS": n,
+                "ESTADO": estado,
+                "CANONICO ASIGNADO": canonico or "",
+                "MEJOR CANDIDATO": candidato,
+                "CONFIANZA": round(confianza, 3),
+                "TOKENS SIN PAR": ", ".join(sin_par),
+            })
+        return pd.DataFrame(filas, columns=["VALOR", "OCURRENCIAS", "ESTADO", "CANONICO ASIGNADO",
+                                            "MEJOR CANDIDATO", "CONFIANZA", "TOKENS SIN PAR"])
@@ -1,6 +1,6 @@
 # utils/sftp_client.py
 import paramiko
-from typing import Iterator, Tuple, Optional
+from typing import Container, Iterator, Tuple, Optional
 
 class SFTPReader:
     """
@@ -30,8 +30,12 @@ class SFTPReader:
         finally:
             if self._client: self._client.close()
 
-    def iter_json_files(self, remote_dir: str) -> Iterator[Tuple[str, bytes]]:
+    def iter_json_files(self, remote_dir: str, omitir: Container[str] = ()) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """(nombre, bytes); los nombres en `omitir` se listan sin descargarlos (bytes=None)."""
         for f in self._sftp.listdir_attr(remote_dir):
             if f.filename.lower().endswith(".json"):
+                if f.filename in omitir:
+                    yield f.filename, None
+                    continue
                 with self._sftp.open(f"{remote_dir}/{f.filename}", "rb") as fh:
                     yield f.filename, fh.read()
@@ -0,0 +1,52 @@
+# utils/similitud.py
+"""
+Motor de similitud acotado para comparaciones de texto.
+
+La decisión "ratio >= umbral" casi nunca necesita el SequenceMatcher completo:
+  - textos iguales -> 1.0 (el caso más común tras normalizar)
+  - cota superior por longitudes:       2*min(la, lb) / (la + lb)
+  - cota superior por multiconjunto:    2*|A ∩ B| / (la + lb)   (quick_ratio)
+  - cota inferior cuando hay al menos un carácter común y no aplica autojunk
+    (len(b) < 200): 2 / (la + lb)
+Sólo si las cotas no deciden se calcula el ratio real, con memo acotado por par.
+"""
+from __future__ import annotations
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+_MAX_MEMO = 131_072
+_AUTOJUNK_MIN = 200  # SequenceMatcher activa autojunk desde este largo de `b`
+
+
+@lru_cache(maxsize=_MAX_MEMO)
+def ratio(a: str, b: str) -> float:
+    """SequenceMatcher(None, a, b).ratio() con atajo para textos iguales."""
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _comunes(a: str, b: str) -> int:
+    ca, cb = Counter(a), Counter(b)
+    if len(ca) > len(cb):
+        ca, cb = cb, ca
+    return sum(min(n, cb[ch]) for ch, n in ca.items() if ch in cb)
+
+
+@lru_cache(maxsize=_MAX_MEMO)
+def similar(a: str, b: str, umbral: float) -> bool:
+    """True si ratio(a, b) >= umbral, evitando el cálculo completo cuando las cotas deciden."""
+    if a == b or umbral <= 0:
+        return True
+    total = len(a) + len(b)
+    if total == 0:
+        return True
+    if 2.0 * min(len(a), len(b)) / total < umbral:
+        return False
+    comunes = _comunes(a, b)
+    if 2.0 * comunes / total < umbral:
+        return False
+    if comunes and len(b) < _AUTOJUNK_MIN and umbral <= 2.0 / total:
+        return True
+    return ratio(a, b) >= umbral